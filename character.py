@@ -1,4 +1,12 @@
-from typing import Any, Dict
+from string import Formatter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Tuple
+
+from managers.context_packer import approx_tokens
+
+# 로어 청크 메타데이터에서 "이 기억이 드러나는 SAN 단계"를 담는 필드
+# (필드가 없는 청크는 모든 단계에서 검색됨)
+RAG_SAN_FIELD = "san"
 
 # ==========================================
 # [Prompt Modules]
@@ -108,6 +116,50 @@ OUTPUT_FORMAT = """## 8. 출력 형식 (JSON Only)
   "action_post": "대사 후 행동 묘사"
 }"""
 
+# 사용자 프롬프트 템플릿 (턴마다 값만 채움)
+USER_PROMPT_TEMPLATE = """
+### [Context: RAG 지식베이스]
+{rag_content}
+
+### [Last Context: 직전 상황]
+# 당신은 아래 감정과 주제가 방금 전까지 이어졌다고 **가정**하고 연기를 시작하십시오.
+- **직전 감정**: {last_emotion} (이 감정의 잔재가 현재 대사의 시작 부분에 묻어나야 함)
+- **직전 주제**: {last_topic}
+
+### [User Input: 사용자 입력]
+# 관리자(사용자)가 당신에게 다음과 같이 말하거나 행동했습니다.
+# 이 내용에 대해 반응하십시오. (따라 말하지 마십시오)
+"{user_input}"
+"""
+
+
+def compile_template(template: str) -> Callable[..., str]:
+    """템플릿을 (고정 문자열, 필드명) 조각으로 한 번만 나눠 두고, 채울 때는 이어 붙이기만 함"""
+    parts = tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
+
+    def fill(**values: Any) -> str:
+        return "".join(
+            literal if field is None else f"{literal}{values[field]}"
+            for literal, field in parts
+        )
+    return fill
+
+
+fill_user_prompt = compile_template(USER_PROMPT_TEMPLATE)
+
+# (SAN 단계, 호감도 단계) → 완성된 System Prompt (4 × 6 = 24가지, 읽기 전용)
+SYSTEM_PROMPTS: Mapping[Tuple[str, str], str] = MappingProxyType({
+    (san_label, sadism_label): (
+        f"{BASE_SYSTEM}\n\n"
+        f"{san_module}\n\n"
+        f"{sadism_module}\n\n"
+        f"{OUTPUT_FORMAT}"
+    )
+    for san_label, san_module in SAN_PROMPTS.items()
+    for sadism_label, sadism_module in SADISM_PROMPTS.items()
+})
+
+
 class Character:
     """유화 캐릭터"""
     
@@ -117,58 +169,98 @@ class Character:
         # model_name: str = "gpt-oss:120b-cloud",
         # model_name: str = "deepseek-v3.1:671b-cloud",
         model_name: str = "gemini-3-pro-preview",
-        rag_manager = None
+        rag_manager = None,
+        rag_token_budget: int = 600,
+        count_tokens: Callable[[str], int] = approx_tokens
     ) -> None:
+        """
+        Args:
+            count_tokens: 프롬프트 토큰 수 계산 함수 (기본값은 근사치)
+        """
         self.name = name
         self.model_name = model_name
         self.rag_manager = rag_manager
+        self.rag_token_budget = rag_token_budget
+        self.count_tokens = count_tokens
+        self.last_rag_report: Dict[str, Any] = {}
+        self.last_prompt_tokens: Dict[str, int] = {}
+
+        # System Prompt별 토큰 수 (조립 전에 예산 확인용, 읽기 전용)
+        self.system_prompt_tokens: Mapping[Tuple[str, str], int] = MappingProxyType({
+            key: count_tokens(prompt) for key, prompt in SYSTEM_PROMPTS.items()
+        })
+    
+    def build_rag_context(self, user_input: str, san_label: str, turn=None) -> Dict[str, Any]:
+        """
+        User Prompt에 넣을 RAG 컨텍스트 (입력 중 미리 계산할 때도 같은 조건으로 호출)
+        토큰 예산 안에서 중복 없는 청크만 (프롬프트가 짧을수록 prefill 지연/비용 감소)
+        """
+        return self.rag_manager.build_context(
+            user_input,
+            filters={RAG_SAN_FIELD: san_label},
+            token_budget=self.rag_token_budget,
+            turn=turn
+        )
     
-    def generate_prompt(self, user_input: str, context_data: Dict[str, str]) -> Dict[str, Any]:
+    def generate_prompt(
+        self,
+        user_input: str,
+        context_data: Dict[str, str],
+        turn=None,
+        use_rag: bool = True
+    ) -> Dict[str, Any]:
         """
         Modular Prompting을 사용하여 프롬프트를 생성합니다.
+        (System Prompt는 미리 조립된 표에서 조회, User Prompt는 템플릿에 값만 채움)
+
+        Args:
+            turn: TurnContext (이번 턴의 질문 임베딩 / RAG 결과 재사용)
+            use_rag: False면 참고 지식 없이 조립 (RAG 단계가 기한을 넘긴 경우)
         """
-        # 1. 상태값 추출
+        # 1. 상태값 추출 (모르는 단계는 기본 단계로)
         san_label = context_data.get("san_label", "안정")
         sadism_label = context_data.get("likability_label", "무관심")
         last_emotion = context_data.get("last_emotion", "평온")
         last_topic = context_data.get("last_topic", "새로운 관리자를 기다리는 중")
+        if san_label not in SAN_PROMPTS:
+            san_label = "안정"
+        if sadism_label not in SADISM_PROMPTS:
+            sadism_label = "무관심"
 
-        # 2. System Prompt 조립
-        san_module = SAN_PROMPTS.get(san_label, SAN_PROMPTS["안정"])
-        sadism_module = SADISM_PROMPTS.get(sadism_label, SADISM_PROMPTS["무관심"])
-        
-        system_prompt = (
-            f"{BASE_SYSTEM}\n\n"
-            f"{san_module}\n\n"
-            f"{sadism_module}\n\n"
-            f"{OUTPUT_FORMAT}"
-        )
+        # 2. System Prompt 조회
+        system_prompt = SYSTEM_PROMPTS[(san_label, sadism_label)]
 
         # 3. RAG 검색 (User Prompt용)
         rag_content = "관련 정보 없음."
-        if self.rag_manager:
+        self.last_rag_report = {}
+        if self.rag_manager and use_rag:
             try:
-                results = self.rag_manager.search(user_input, top_k=3)
-                if results:
-                    rag_content = self.rag_manager.format_for_prompt(results)
+                report = self.build_rag_context(user_input, san_label, turn)
+                self.last_rag_report = report
+                if report["text"]:
+                    rag_content = report["text"]
+                print(f"[RAG] 컨텍스트 {report['chunks']}/{report['candidates']}개 청크, "
+                      f"{report['tokens']}/{report['budget']} 토큰 "
+                      f"(중복 제외 {report['duplicates']}, 잘림 {report['trimmed']})")
             except Exception as e:
                 print(f"[RAG][Error] {e}")
 
-        # 4. User Prompt 조립
-        user_prompt = f"""
-### [Context: RAG 지식베이스]
-{rag_content}
-
-### [Last Context: 직전 상황]
-# 당신은 아래 감정과 주제가 방금 전까지 이어졌다고 **가정**하고 연기를 시작하십시오.
-- **직전 감정**: {last_emotion} (이 감정의 잔재가 현재 대사의 시작 부분에 묻어나야 함)
-- **직전 주제**: {last_topic}
+        # 4. User Prompt 채우기
+        user_prompt = fill_user_prompt(
+            rag_content=rag_content,
+            last_emotion=last_emotion,
+            last_topic=last_topic,
+            user_input=user_input
+        )
 
-### [User Input: 사용자 입력]
-# 관리자(사용자)가 당신에게 다음과 같이 말하거나 행동했습니다.
-# 이 내용에 대해 반응하십시오. (따라 말하지 마십시오)
-"{user_input}"
-"""
+        system_tokens = self.system_prompt_tokens[(san_label, sadism_label)]
+        user_tokens = self.count_tokens(user_prompt)
+        self.last_prompt_tokens = {
+            "system": system_tokens,
+            "user": user_tokens,
+            "total": system_tokens + user_tokens,
+        }
+        print(f"[Prompt] 토큰: system {system_tokens} + user {user_tokens} = {system_tokens + user_tokens}")
 
         # 5. Ollama API 페이로드 반환
         return {
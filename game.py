@@ -4,6 +4,7 @@ import os
 
 # 초기 상태만 임포트 (나머지는 LoadingState에서 로드)
 from states.loading_state import LoadingState
+from managers.completion_channel import CompletionChannel
 
 class Game:
     """
@@ -17,6 +18,14 @@ class Game:
         pygame.display.set_caption("LLM Game Prototype - Virtual Yuhwa")
         self.clock = pygame.time.Clock()
         self.running = True
+
+        # 프레임 속도: 작업 중에는 fps, 상태가 쉬는 중이면 입력 / 완료 알림이 올 때까지
+        # 최대 1/idle_fps초 대기 (배경 애니메이션 0.1초 간격보다 촘촘하게)
+        self.fps = 60
+        self.idle_fps = 20
+
+        # 워커 스레드 → 메인 스레드 완료 알림 (STT / LLM / 요약 / TTS), 프레임마다 한 번 처리
+        self.channel = CompletionChannel()
         
         # 설정값 정의
         # self.current_model_name = "deepseek-v3.1:671b-cloud"
@@ -42,15 +51,26 @@ class Game:
     
     def run(self):
         while self.running:
-            time_delta = self.clock.tick(60) / 1000.0
-            events = pygame.event.get()
+            if self.current_state.is_idle() and not self.channel.pending:
+                # 할 일이 없으면 이벤트(입력 또는 채널의 깨우기 이벤트)가 올 때까지 잠듦
+                first = pygame.event.wait(1000 // self.idle_fps)
+                events = [first] if first.type != pygame.NOEVENT else []
+                events += pygame.event.get()
+                time_delta = self.clock.tick() / 1000.0
+            else:
+                time_delta = self.clock.tick(self.fps) / 1000.0
+                events = pygame.event.get()
             
             for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
+                if self.channel.is_wake_event(event):
+                    continue
                 
                 self.current_state.handle_events(event)
             
+            # 워커가 넘긴 작업을 도착 순서대로 (스트리밍 필드, 응답 표시, 요약, 턴 종료 정리)
+            self.channel.drain()
             self.current_state.update(time_delta)
             self.current_state.draw(self.screen)
             
@@ -8,7 +8,7 @@
 
 import json
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from rapidfuzz import fuzz
 
 
@@ -143,15 +143,12 @@ class GameSystemManager:
         
         return delta
     
-    def check_san_keywords(self, user_input: str) -> bool:
+    def scan_san_keywords(self, user_input: str) -> List[Tuple[str, float]]:
         """
-        사용자 입력에서 SAN 감소 키워드 검사 (유사도 기반)
+        SAN 감소 키워드 검출만 수행 (상태 변경 없음, 입력 중 미리 계산에도 사용)
+
+        Returns: [(키워드, 유사도), ...]
         """
-        if not user_input.strip():
-            return False
-            
-        print(f"[GameSystem] SAN 키워드 스캔 중... (입력 길이: {len(user_input)})")
-        
         user_input_lower = user_input.lower()
         detected_keywords = []
         
@@ -161,7 +158,16 @@ class GameSystemManager:
             
             if similarity >= self.similarity_threshold:
                 detected_keywords.append((keyword, similarity))
-        
+        return detected_keywords
+    
+    def san_after_scan(self, detected: List[Tuple[str, float]]) -> int:
+        """scan_san_keywords 결과가 반영됐을 때의 SAN 수치 (상태 변경 없음)"""
+        return max(0, self.san - self.decrease_amount) if detected else self.san
+    
+    def apply_san_hits(self, detected_keywords: List[Tuple[str, float]]) -> bool:
+        """
+        scan_san_keywords 결과 반영 (키워드가 검출됐으면 SAN 감소, 메인 스레드에서 호출)
+        """
         # 키워드가 검출되면 SAN 감소
         if detected_keywords:
             old_san = self.san
@@ -177,11 +183,13 @@ class GameSystemManager:
         
         return False
     
-    def get_san_label(self) -> str:
-        """SAN 수치를 상태 레이블로 변환"""
-        if self.san >= 75: return "안정"
-        elif self.san >= 50: return "균열"
-        elif self.san >= 25: return "착란"
+    def get_san_label(self, san: Optional[int] = None) -> str:
+        """SAN 수치를 상태 레이블로 변환 (san을 주면 해당 수치 기준)"""
+        if san is None:
+            san = self.san
+        if san >= 75: return "안정"
+        elif san >= 50: return "균열"
+        elif san >= 25: return "착란"
         else: return "붕괴"
     
     def get_likability_label(self) -> str:
@@ -7,11 +7,18 @@ MIT License
 
 import requests
 import pygame
+import io
 import os
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Union
 from pathlib import Path
 
+from .tts_cache import TtsCache
+from .tts_pipeline import TtsPipeline, split_sentences
+
+# 대사 음성 전용 믹서 채널 (효과음이 자동 할당으로 가로채지 못하도록 예약)
+VOICE_CHANNEL_ID = 0
+
 class AudioManager:
     """TTS 기능 관리 (음성 합성 + 재생)"""
 
@@ -25,6 +32,10 @@ class AudioManager:
         self.enabled = False
         self.engine = "gpt-sovits"
         self._current_sound = None
+        self._voice_channel = None
+        self._pipeline: Optional[TtsPipeline] = None
+        self.pipeline_enabled = False
+        self.cache: Optional[TtsCache] = None
         
         # 2. 설정 파일(config)이 비어있는지 체크
         if not config:
@@ -65,6 +76,21 @@ class AudioManager:
             self.top_p = synthesis_params.get("top_p", 1.0)
             self.timeout = synthesis_params.get("timeout", 120)
 
+            # 문장 단위 파이프라인 설정
+            pipeline_conf = config.get("pipeline", {})
+            self.pipeline_enabled = pipeline_conf.get("enabled", False)
+            self.pipeline_max_in_flight = pipeline_conf.get("max_in_flight", 2)
+            self.pipeline_min_chars = pipeline_conf.get("min_chars", 6)
+            self.pipeline_max_chars = pipeline_conf.get("max_chars", 60)
+
+            # 디스크 캐시 (같은 대사는 서버에 다시 요청하지 않음)
+            cache_conf = config.get("cache", {})
+            if cache_conf.get("enabled", False):
+                self.cache = TtsCache(
+                    cache_conf.get("dir", "assets/audio/cache"),
+                    max_bytes=int(cache_conf.get("max_mb", 200) * 1024 * 1024)
+                )
+
             # 4. Pygame Mixer 초기화
             if self.enabled:
                 if not pygame.mixer.get_init():
@@ -75,6 +101,11 @@ class AudioManager:
                         print(f"[AudioManager] ❌ Pygame Mixer 초기화 실패: {e}")
                         self.enabled = False  # 사운드 장치가 없으면 비활성화
 
+            # 5. 대사 전용 채널 예약
+            if self.enabled:
+                pygame.mixer.set_reserved(VOICE_CHANNEL_ID + 1)
+                self._voice_channel = pygame.mixer.Channel(VOICE_CHANNEL_ID)
+
         except Exception as e:
             print(f"[AudioManager] ❌ 초기화 중 로직 오류 발생: {e}")
             import traceback
@@ -84,6 +115,123 @@ class AudioManager:
         status = "✅ 활성화" if self.enabled else "❌ 비활성화"
         print(f"[AudioManager] 초기화 완료: {status} (Engine: {self.engine})")
 
+    def _resolve_reference(self, emotion: str) -> Tuple[Optional[str], str, str]:
+        """
+        감정 키워드에 맞는 참조 음성 정보 반환
+
+        Returns:
+            (참조 음성 절대 경로, 참조 텍스트, 참조 언어)
+        """
+        # 1. 한글 감정을 영어 키로 변환
+        mapped_key = self.ko_to_en_map.get(emotion, "neutral")
+        
+        # 2. 영어 키가 emotion_maps에 있는지 확인
+        if mapped_key not in self.emotion_maps:
+            mapped_key = self.default_emotion
+
+        target_ref = self.emotion_maps.get(mapped_key)
+        
+        # 3. 참조 파일 정보 설정
+        if target_ref:
+            ref_wav = target_ref["path"]
+            prompt_text = target_ref["text"]
+            prompt_lang = target_ref.get("lang", "ko")
+        else:
+            # 안전장치: 매핑 실패 시 기본 설정 사용
+            ref_wav = self.speaker_wav
+            prompt_text = self.speaker_prompt_text
+            prompt_lang = self.speaker_prompt_lang
+
+        # [중요] API 서버에 보내기 전, 상대 경로를 절대 경로로 변환
+        # (API 서버는 프로젝트 내부의 상대 경로를 모를 수 있음)
+        if ref_wav:
+            ref_wav = os.path.abspath(ref_wav)
+
+        return ref_wav, prompt_text, prompt_lang
+
+    def _request_audio(self, text: str, emotion: str) -> bytes:
+        """
+        GPT-SoVITS에 합성 요청을 보내고 WAV 바이트를 반환
+        (실패 시 예외 발생 → 호출자가 처리)
+        """
+        ref_wav, prompt_text, prompt_lang = self._resolve_reference(emotion)
+
+        # 4. 페이로드 구성
+        payload = {
+            "text": text,
+            "text_lang": self.text_lang,
+            "ref_audio_path": ref_wav, # 절대 경로로 변환된 값 사용
+            "prompt_text": prompt_text,
+            "prompt_lang": prompt_lang,
+            "text_split_method": "cut5",
+            "speed": self.speed_factor,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "batch_size": 1,
+            "seed": -1
+        }
+
+        # 5. 요청 전송
+        response = requests.post(
+            self.api_url,
+            json=payload,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        # 6. 응답 처리
+        if response.headers.get("content-type") == "audio/wav":
+            return response.content
+
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            raise RuntimeError(f"TTS 응답 파싱 오류: {response.text[:200]}")
+
+        if "status" in data and data["status"] == "ok":
+            # 서버가 파일로 저장한 경우 해당 파일을 읽어 옴
+            with open(data.get("audio_path", self.output_path), "rb") as f:
+                return f.read()
+        error_msg = data.get("message", "Unknown error")
+        raise RuntimeError(f"TTS 오류: {error_msg}")
+
+    def _cache_key(self, text: str, emotion: str) -> str:
+        """합성 결과를 결정하는 조건 전체로 캐시 키 생성"""
+        ref_wav, prompt_text, prompt_lang = self._resolve_reference(emotion)
+        return TtsCache.make_key(
+            text=text.strip(),
+            ref_audio_path=ref_wav,
+            prompt_text=prompt_text,
+            prompt_lang=prompt_lang,
+            text_lang=self.text_lang,
+            speed=self.speed_factor,
+            temperature=self.temperature,
+            top_p=self.top_p,
+        )
+
+    def _safe_request_audio(self, text: str, emotion: str) -> Optional[bytes]:
+        """캐시 조회 → _request_audio + 공통 오류 처리 (실패 시 None)"""
+        key = None
+        if self.cache:
+            key = self._cache_key(text, emotion)
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"[AudioManager] 캐시 적중: {text[:20]}")
+                return cached
+
+        try:
+            audio = self._request_audio(text, emotion)
+            if key:
+                self.cache.put(key, audio)
+            return audio
+        except requests.exceptions.ConnectionError:
+            print(f"[AudioManager] ❌ TTS API 연결 실패: {self.api_url}")
+        except requests.exceptions.Timeout:
+            print(f"[AudioManager] ❌ TTS API 타임아웃 ({self.timeout}초)")
+        except Exception as e:
+            print(f"[AudioManager] ❌ 합성 오류: {e}")
+        return None
+
     def synthesize(self, text: str, emotion: str = "neutral") -> Optional[str]:
         """
         텍스트를 음성으로 변환하여 파일로 저장 (감정 반영)
@@ -110,89 +258,122 @@ class AudioManager:
             print(f"[AudioManager] 경로 생성 오류: {e}")
             return None
 
+        audio = self._safe_request_audio(text, emotion)
+        if audio is None:
+            return None
+
         try:
-            # 1. 한글 감정을 영어 키로 변환
-            mapped_key = self.ko_to_en_map.get(emotion, "neutral")
-            
-            # 2. 영어 키가 emotion_maps에 있는지 확인
-            if mapped_key not in self.emotion_maps:
-                mapped_key = self.default_emotion
+            with open(self.output_path, "wb") as f:
+                f.write(audio)
+        except Exception as e:
+            print(f"[AudioManager] ❌ 저장 오류: {e}")
+            return None
 
-            target_ref = self.emotion_maps.get(mapped_key)
-            
-            # 3. 참조 파일 정보 설정
-            if target_ref:
-                ref_wav = target_ref["path"]
-                prompt_text = target_ref["text"]
-                prompt_lang = target_ref.get("lang", "ko")
-            else:
-                # 안전장치: 매핑 실패 시 기본 설정 사용
-                ref_wav = self.speaker_wav
-                prompt_text = self.speaker_prompt_text
-                prompt_lang = self.speaker_prompt_lang
-
-            # [중요] API 서버에 보내기 전, 상대 경로를 절대 경로로 변환
-            # (API 서버는 프로젝트 내부의 상대 경로를 모를 수 있음)
-            if ref_wav:
-                ref_wav = os.path.abspath(ref_wav)
-
-            # 4. 페이로드 구성
-            payload = {
-                "text": text,
-                "text_lang": self.text_lang,
-                "ref_audio_path": ref_wav, # 절대 경로로 변환된 값 사용
-                "prompt_text": prompt_text,
-                "prompt_lang": prompt_lang,
-                "text_split_method": "cut5",
-                "speed": self.speed_factor,
-                "temperature": self.temperature,
-                "top_p": self.top_p,
-                "batch_size": 1,
-                "seed": -1
-            }
+        print(f"[AudioManager] ✅ 합성 완료 ({emotion}): {self.output_path}")
+        return self.output_path
 
-            # 5. 요청 전송
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-
-            # 6. 응답 처리 및 저장
-            if response.headers.get("content-type") == "audio/wav":
-                with open(self.output_path, "wb") as f:
-                    f.write(response.content)
-                print(f"[AudioManager] ✅ 합성 완료 ({emotion}): {self.output_path}")
-                return self.output_path
-            else:
-                try:
-                    data = response.json()
-                    if "status" in data and data["status"] == "ok":
-                        audio_path = data.get("audio_path", self.output_path)
-                        print(f"[AudioManager] ✅ 합성 완료: {audio_path}")
-                        return audio_path
-                    else:
-                        error_msg = data.get("message", "Unknown error")
-                        raise RuntimeError(f"TTS 오류: {error_msg}")
-                except json.JSONDecodeError:
-                    raise RuntimeError(f"TTS 응답 파싱 오류: {response.text[:200]}")
+    def _decode_sound(self, audio: bytes) -> Optional[pygame.mixer.Sound]:
+        """WAV 바이트를 메모리에서 바로 Sound로 디코딩 (디스크 왕복 없음)"""
+        try:
+            return pygame.mixer.Sound(file=io.BytesIO(audio))
+        except Exception as e:
+            print(f"[AudioManager] ❌ 디코딩 오류: {e}")
+            return None
 
-        except requests.exceptions.ConnectionError:
-            print(f"[AudioManager] ❌ TTS API 연결 실패: {self.api_url}")
+    def synthesize_sound(self, text: str, emotion: str = "neutral") -> Optional[pygame.mixer.Sound]:
+        """
+        텍스트를 음성으로 변환하여 재생 가능한 Sound 객체로 반환
+        (합성 스레드에서 호출 → 메인 스레드는 play()만 하면 됨)
+
+        Args:
+            text: 합성할 텍스트
+            emotion: 감정 키워드 (기본값: neutral)
+
+        Returns:
+            디코딩된 Sound, 실패 시 None
+        """
+        if not self.enabled:
             return None
-        except requests.exceptions.Timeout:
-            print(f"[AudioManager] ❌ TTS API 타임아웃 ({self.timeout}초)")
+
+        if not text or not text.strip():
+            print("[AudioManager] 빈 텍스트")
             return None
-        except Exception as e:
-            print(f"[AudioManager] ❌ 합성 오류: {e}")
+
+        audio = self._safe_request_audio(text, emotion)
+        if audio is None:
             return None
 
-    def play(self, audio_path: str) -> None:
+        sound = self._decode_sound(audio)
+        if sound:
+            print(f"[AudioManager] ✅ 합성 완료 ({emotion}): {sound.get_length():.1f}초")
+        return sound
+
+    # =================================================================
+    # 문장 단위 파이프라인 (합성과 재생을 겹쳐서 진행)
+    # =================================================================
+    def start_pipeline(self, text: str, emotion: str = "neutral") -> Optional[TtsPipeline]:
         """
-        음성 파일 재생
+        대사를 문장 단위로 나눠 합성을 시작 (즉시 반환)
+
+        Returns:
+            진행 중인 TtsPipeline, 비활성화/빈 텍스트면 None
+        """
+        if not self.enabled or not text or not text.strip():
+            return None
+
+        segments = split_sentences(text, self.pipeline_min_chars, self.pipeline_max_chars)
+        if not segments:
+            return None
+
+        def synthesize_segment(index: int, segment: str) -> Optional[pygame.mixer.Sound]:
+            audio = self._safe_request_audio(segment, emotion)
+            if audio is None:
+                return None
+            sound = self._decode_sound(audio)
+            if sound:
+                print(f"[AudioManager] ✅ 조각 {index + 1}/{len(segments)} 합성 완료 ({emotion})")
+            return sound
+
+        print(f"[AudioManager] 파이프라인 합성 시작: {len(segments)}개 조각 (동시 {self.pipeline_max_in_flight})")
+        return TtsPipeline(segments, synthesize_segment, self.pipeline_max_in_flight)
+
+    def play_pipeline(self, pipeline: TtsPipeline) -> None:
+        """파이프라인 재생 시작 (이후 조각은 update()에서 이어 붙임)"""
+        if not pipeline or not self.enabled or not self._voice_channel:
+            return
+
+        self.stop()
+        self._pipeline = pipeline
+        self._pump_pipeline()
+
+    def update(self) -> None:
+        """매 프레임 호출: 재생 중인 파이프라인의 다음 조각을 채널 대기열에 넣음"""
+        if self._pipeline:
+            self._pump_pipeline()
+
+    def _pump_pipeline(self) -> None:
+        channel = self._voice_channel
+        # 재생 중 조각 + 대기열 1개까지 채워 두면 조각 사이 공백 없이 이어짐
+        while channel.get_queue() is None:
+            if self._pipeline.is_exhausted():
+                self._pipeline = None
+                return
+
+            sound = self._pipeline.pop_ready()
+            if sound is None:
+                return  # 다음 조각 합성 중
+
+            if channel.get_busy():
+                channel.queue(sound)
+            else:
+                channel.play(sound)
+            self._current_sound = sound
+
+    def play(self, audio: Union[pygame.mixer.Sound, str]) -> None:
+        """
+        음성 재생 (synthesize_sound의 Sound 객체 또는 파일 경로)
         """
-        if not audio_path or not self.enabled:
+        if not audio or not self.enabled:
             return
 
         try:
@@ -200,26 +381,47 @@ class AudioManager:
             if self._current_sound:
                 self._current_sound.stop()
 
-            # 새 사운드 로드 및 재생
-            self._current_sound = pygame.mixer.Sound(audio_path)
-            self._current_sound.play()
+            # 새 사운드 재생 (경로가 오면 로드, 대사 전용 채널)
+            if isinstance(audio, str):
+                self._current_sound = pygame.mixer.Sound(audio)
+            else:
+                self._current_sound = audio
+            if self._voice_channel:
+                self._voice_channel.play(self._current_sound)
+            else:
+                self._current_sound.play()
 
         except FileNotFoundError:
-            print(f"[AudioManager] ❌ 파일 없음: {audio_path}")
+            print(f"[AudioManager] ❌ 파일 없음: {audio}")
         except Exception as e:
             print(f"[AudioManager] ❌ 재생 오류: {e}")
 
     def stop(self) -> None:
-        """음성 재생 중지"""
+        """음성 재생 중지 (진행 중인 파이프라인 포함)"""
+        if self._pipeline:
+            self._pipeline.cancel()
+            self._pipeline = None
+        if self._voice_channel:
+            self._voice_channel.stop()
         if self._current_sound:
             self._current_sound.stop()
 
     def is_playing(self) -> bool:
         """현재 재생 중인지 확인"""
+        if self._pipeline:
+            return True
         if not self._current_sound:
             return False
+        if self._voice_channel:
+            return self._voice_channel.get_busy()
         return pygame.mixer.get_busy()
 
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """TTS 캐시 적중률/사용 용량 (캐시 비활성화 시 None)"""
+        if not self.cache:
+            return None
+        return self.cache.get_stats()
+
     def test_connection(self) -> bool:
         """API 서버 연결 테스트"""
         try:
@@ -0,0 +1,76 @@
+"""
+완료 알림 채널
+워커 스레드(턴 파이프라인, 요약, STT, TTS 등)가 끝낸 작업을 메인 스레드로 넘기는 단일 통로입니다.
+
+- post(fn, *args): 어느 스레드에서나 호출 → 메인 루프가 프레임마다 한 번 drain()에서 도착 순서대로 실행
+- 대기열이 비어 있다가 처음 들어오면 pygame 사용자 이벤트(wake_type)를 하나 올려
+  이벤트를 기다리며 쉬고 있던 메인 루프를 바로 깨움 (프레임마다 매니저를 폴링하지 않음)
+- 공유 상태는 메인 스레드 콜백에서만 바꿈 → 워커가 화면 / 게임 상태를 직접 건드리지 않음
+
+MIT License
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pygame
+
+
+class CompletionChannel:
+    """워커 스레드 → 메인 스레드 콜백 대기열 (스레드 안전)"""
+
+    def __init__(self, wake_type: Optional[int] = None):
+        """
+        Args:
+            wake_type: 메인 루프를 깨울 pygame 이벤트 종류 (None이면 새 사용자 이벤트 발급)
+        """
+        self.wake_type = wake_type if wake_type is not None else pygame.event.custom_type()
+        self._queue: "queue.Queue[Tuple[Callable[..., Any], tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._wake_pending = False
+        self.stats: Dict[str, int] = {"posted": 0, "handled": 0, "errors": 0, "wakeups": 0}
+
+    def post(self, fn: Callable[..., Any], *args: Any) -> None:
+        """메인 스레드에서 fn(*args) 실행 예약 (어느 스레드에서나 호출 가능)"""
+        self._queue.put((fn, args))
+        with self._lock:
+            self.stats["posted"] += 1
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+            self.stats["wakeups"] += 1
+        try:
+            pygame.event.post(pygame.event.Event(self.wake_type))
+        except pygame.error:
+            # 디스플레이 종료 후 / 이벤트 대기열이 가득 찬 경우 → 다음 프레임 drain()에서 처리됨
+            pass
+
+    def drain(self) -> int:
+        """예약된 콜백을 도착 순서대로 실행 (메인 루프에서 프레임마다 한 번, 실행한 수 반환)"""
+        with self._lock:
+            self._wake_pending = False
+        handled = 0
+        while True:
+            try:
+                fn, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[Channel] ⚠️ 콜백 오류 ({getattr(fn, '__name__', fn)}): {e}")
+            handled += 1
+        self.stats["handled"] += handled
+        return handled
+
+    def is_wake_event(self, event: pygame.event.Event) -> bool:
+        return event.type == self.wake_type
+
+    @property
+    def pending(self) -> bool:
+        return not self._queue.empty()
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
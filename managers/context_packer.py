@@ -0,0 +1,137 @@
+"""
+RAG 컨텍스트 패커
+검색된 청크를 토큰 예산 안에 맞춰 프롬프트용 텍스트로 묶습니다.
+
+- MMR(Maximal Marginal Relevance)로 서로 겹치는 청크는 뒤로 밀거나 제외
+- 예산을 넘는 청크는 문장 경계까지만 자름
+- 사용한 토큰 수를 함께 반환 (프롬프트 prefill 비용 추적용)
+
+MIT License
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。…~])\s+|\n+")
+
+CONTEXT_HEADER = "### 참고 지식:\n"
+
+
+def approx_tokens(text: str) -> int:
+    """토크나이저가 없을 때의 근사치 (한글 UTF-8 3바이트 ≈ 0.75토큰)"""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def mmr_order(
+    relevance: np.ndarray,
+    doc_vecs: Optional[np.ndarray],
+    lambda_: float = 0.7,
+    dedup_threshold: float = 0.92
+) -> Tuple[List[int], List[int]]:
+    """
+    MMR 순서 정하기
+
+    Args:
+        relevance: [n] 질문과의 관련도 (코사인 유사도 또는 검색 점수)
+        doc_vecs: [n, dim] 정규화된 청크 임베딩 (None이면 관련도 순서 그대로)
+        lambda_: 1.0 = 관련도만, 0.0 = 다양성만
+        dedup_threshold: 이미 고른 청크와의 유사도가 이 값 이상이면 중복으로 제외
+
+    Returns:
+        (선택 순서, 중복으로 제외된 위치)
+    """
+    n = len(relevance)
+    if doc_vecs is None or n <= 1:
+        return list(range(n)), []
+
+    sim = doc_vecs @ doc_vecs.T
+    selected: List[int] = []
+    dropped: List[int] = []
+    remaining = list(range(n))
+    while remaining:
+        if selected:
+            redundancy = sim[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = lambda_ * relevance[remaining] - (1 - lambda_) * redundancy
+        best = int(np.argmax(scores))
+        pick = remaining.pop(best)
+        if selected and redundancy[best] >= dedup_threshold:
+            dropped.append(pick)
+        else:
+            selected.append(pick)
+    return selected, dropped
+
+
+def trim_to_budget(text: str, budget: int, count_tokens: Callable[[str], int]) -> Optional[str]:
+    """
+    앞에서부터 문장 단위로 예산 안에 들어가는 만큼만 남김
+    (첫 문장도 안 들어가면 None)
+    """
+    if count_tokens(text) <= budget:
+        return text
+
+    kept = ""
+    for sentence in (s.strip() for s in _SENTENCE_SPLIT.split(text)):
+        if not sentence:
+            continue
+        candidate = f"{kept} {sentence}" if kept else sentence
+        if count_tokens(candidate + " …") > budget:
+            break
+        kept = candidate
+    return f"{kept} …" if kept else None
+
+
+def pack_context(
+    chunks: Sequence[Tuple[str, dict]],
+    order: Sequence[int],
+    token_budget: int,
+    count_tokens: Callable[[str], int] = approx_tokens,
+    max_chunks: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    order 순서대로 청크를 예산 안에 채움
+
+    Args:
+        chunks: [(청크 텍스트, 메타데이터), ...]
+        order: mmr_order 결과
+        max_chunks: 최대 청크 수 (None이면 예산이 허락하는 만큼)
+
+    Returns:
+        {"text", "tokens", "budget", "chunks", "trimmed", "skipped"}
+    """
+    used = count_tokens(CONTEXT_HEADER)
+    parts: List[str] = []
+    trimmed = skipped = 0
+
+    for pos in order:
+        if max_chunks is not None and len(parts) >= max_chunks:
+            break
+        text, meta = chunks[pos]
+        label = f"[{len(parts) + 1}]" + (f" ({meta['category']})" if meta.get("category") else "")
+        overhead = count_tokens(f"\n{label}\n\n")
+        remaining = token_budget - used - overhead
+        if remaining <= 0:
+            break
+
+        body = trim_to_budget(text, remaining, count_tokens)
+        if body is None:
+            skipped += 1
+            continue
+        if body != text:
+            trimmed += 1
+        part = f"\n{label}\n{body}\n"
+        parts.append(part)
+        used += count_tokens(part)
+
+    packed = CONTEXT_HEADER + "".join(parts) if parts else ""
+    return {
+        "text": packed,
+        "tokens": count_tokens(packed) if packed else 0,
+        "budget": token_budget,
+        "chunks": len(parts),
+        "trimmed": trimmed,
+        "skipped": skipped,
+    }
@@ -0,0 +1,237 @@
+"""
+임베딩 백엔드 모음 (KURE-v1 / XLM-Roberta)
+같은 토크나이저 입력을 받아 mean pooling + L2 정규화된 임베딩을 돌려주는
+교체 가능한 추론 엔진들입니다.
+
+- torch-fp32 : 기본 PyTorch (기준값)
+- torch-int8 : PyTorch 동적 양자화 (Linear → qint8)
+- onnx-fp32  : ONNX Runtime
+- onnx-int8  : ONNX Runtime + 동적 양자화 모델
+
+MIT License
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BACKENDS = ("torch-fp32", "torch-int8", "onnx-fp32", "onnx-int8")
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+def load_tokenizer(model_path: str):
+    """KURE 토크나이저 로드 (Regex 오류 수정 플래그 지원 여부 대응)"""
+    from transformers import AutoTokenizer
+
+    try:
+        return AutoTokenizer.from_pretrained(
+            model_path,
+            fix_mistral_regex=True  # [수정] 토크나이저 정규식 오류 방지 플래그
+        )
+    except TypeError:
+        # 만약 모델이 이 플래그를 지원하지 않는 구형/다른 아키텍처일 경우 대비
+        print("[RAG] fix_mistral_regex 옵션이 필요 없거나 지원되지 않아 제외하고 로드합니다.")
+        return AutoTokenizer.from_pretrained(model_path)
+
+
+def mean_pooling(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    Mean pooling + L2 정규화 (모든 백엔드와 DB 빌더가 공유)
+
+    Args:
+        token_embeddings: [batch, seq, dim] 마지막 hidden state
+        attention_mask: [batch, seq]
+    """
+    mask = attention_mask[..., np.newaxis].astype(np.float32)
+    summed = (token_embeddings.astype(np.float32) * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class TorchEmbeddingBackend:
+    """PyTorch 추론 (fp32 또는 동적 int8)"""
+
+    def __init__(self, model_path: str, quantize: bool = False, device: str = "cpu"):
+        import torch
+        from transformers import XLMRobertaModel
+
+        self._torch = torch
+        self.device = device
+        self.name = "torch-int8" if quantize else "torch-fp32"
+
+        # safetensors를 사용하여 메모리 효율적으로 로드
+        model = XLMRobertaModel.from_pretrained(
+            model_path,
+            use_safetensors=True,
+            local_files_only=True
+        )
+        model.eval()
+        if quantize:
+            # Linear 층만 int8로 (CPU 전용)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model.to(device)
+
+    def encode(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        torch = self._torch
+        inputs = {
+            "input_ids": torch.from_numpy(encoded_input["input_ids"]).to(self.device),
+            "attention_mask": torch.from_numpy(encoded_input["attention_mask"]).to(self.device),
+        }
+        with torch.no_grad():
+            model_output = self.model(**inputs)
+        return mean_pooling(model_output[0].cpu().numpy(), encoded_input["attention_mask"])
+
+
+class OnnxEmbeddingBackend:
+    """ONNX Runtime 추론 (export_onnx로 만든 모델)"""
+
+    def __init__(self, onnx_path: str, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNX 모델이 없습니다: {onnx_path} (tools.embedding_backend export 먼저 실행)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.name = "onnx-int8" if onnx_path.endswith(ONNX_INT8_FILE) else "onnx-fp32"
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {
+            name: encoded_input[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask")
+            if name in self._input_names
+        }
+        last_hidden = self.session.run(None, feed)[0]
+        return mean_pooling(last_hidden, encoded_input["attention_mask"])
+
+
+def create_backend(name: str, model_path: str, onnx_dir: Optional[str] = None, num_threads: Optional[int] = None):
+    """
+    이름으로 백엔드 생성
+
+    Args:
+        name: BACKENDS 중 하나
+        model_path: HuggingFace 모델 폴더
+        onnx_dir: ONNX 파일 폴더 (기본값: model_path/onnx)
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 임베딩 백엔드: {name} (가능: {', '.join(BACKENDS)})")
+
+    if name.startswith("torch"):
+        return TorchEmbeddingBackend(model_path, quantize=(name == "torch-int8"))
+
+    onnx_dir = onnx_dir or os.path.join(model_path, "onnx")
+    filename = ONNX_INT8_FILE if name == "onnx-int8" else ONNX_FP32_FILE
+    return OnnxEmbeddingBackend(os.path.join(onnx_dir, filename), num_threads=num_threads)
+
+
+# =================================================================
+# 변환 (PyTorch → ONNX → int8)
+# =================================================================
+def export_onnx(model_path: str, onnx_dir: Optional[str] = None, opset: int = 17, quantize: bool = True) -> List[str]:
+    """
+    KURE 모델을 ONNX로 내보내고 (선택) 동적 int8 양자화본도 생성
+
+    Returns:
+        생성된 파일 경로 리스트
+    """
+    import torch
+    from transformers import XLMRobertaModel
+
+    onnx_dir = onnx_dir or os.path.join(model_path, "onnx")
+    os.makedirs(onnx_dir, exist_ok=True)
+    fp32_path = os.path.join(onnx_dir, ONNX_FP32_FILE)
+
+    tokenizer = load_tokenizer(model_path)
+    model = XLMRobertaModel.from_pretrained(model_path, use_safetensors=True, local_files_only=True)
+    model.eval()
+
+    dummy = tokenizer(["더미 입력 문장입니다."], return_tensors="pt")
+    print(f"[Embedding] ONNX 내보내기: {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+    created = [fp32_path]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(onnx_dir, ONNX_INT8_FILE)
+        print(f"[Embedding] int8 양자화: {int8_path}")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        created.append(int8_path)
+
+    return created
+
+
+# =================================================================
+# 정합성 검사 (기준 백엔드 대비 코사인 오차 / 검색 결과 일치율)
+# =================================================================
+def check_parity(
+    tokenizer: Any,
+    reference: Any,
+    candidate: Any,
+    queries: List[str],
+    index: Any = None,
+    top_k: int = 3
+) -> Dict[str, Any]:
+    """
+    Args:
+        tokenizer: load_tokenizer 결과
+        reference: 기준 백엔드 (보통 torch-fp32)
+        candidate: 비교 대상 백엔드
+        queries: 평가용 질문 리스트
+        index: FAISS 인덱스 (주면 top-k 결과 일치율도 측정)
+
+    Returns:
+        코사인 오차(1 - cos) 평균/최대, top-k 일치율, 질문당 평균 지연(ms)
+    """
+    encoded = tokenizer(queries, padding="longest", truncation=True, max_length=512, return_tensors="np")
+
+    def timed(backend):
+        start = time.perf_counter()
+        vecs = backend.encode(encoded)
+        return vecs, (time.perf_counter() - start) * 1000 / len(queries)
+
+    ref_vecs, ref_ms = timed(reference)
+    cand_vecs, cand_ms = timed(candidate)
+    drift = 1.0 - (ref_vecs * cand_vecs).sum(axis=1)
+
+    report = {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "queries": len(queries),
+        "cosine_drift_mean": float(drift.mean()),
+        "cosine_drift_max": float(drift.max()),
+        "reference_ms_per_query": ref_ms,
+        "candidate_ms_per_query": cand_ms,
+    }
+
+    if index is not None:
+        _, ref_ids = index.search(ref_vecs, top_k)
+        _, cand_ids = index.search(cand_vecs, top_k)
+        same_order = [list(a) == list(b) for a, b in zip(ref_ids, cand_ids)]
+        report["topk_identical_ratio"] = sum(same_order) / len(same_order)
+        report["topk_mismatches"] = [q for q, same in zip(queries, same_order) if not same]
+
+    return report
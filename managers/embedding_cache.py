@@ -0,0 +1,126 @@
+"""
+쿼리 임베딩 캐시
+정규화한 질문 문자열 → 임베딩 벡터를 LRU로 보관하고,
+선택적으로 디스크(.npz)에 저장해 다음 실행에서도 재사용합니다.
+
+MIT License
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    캐시 키용 질문 정규화
+    ("안녕", "안녕?", " 안녕 !" → "안녕")
+    - NFKC 정규화 + 소문자화
+    - 구두점/기호 제거
+    - 연속 공백 축약
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(
+        " " if unicodedata.category(c)[0] in ("P", "S") else c
+        for c in text
+    )
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """정규화된 질문 → float32 임베딩 (스레드 안전 LRU)"""
+
+    def __init__(self, max_entries: int = 512, persist_path: Optional[str] = None, namespace: str = ""):
+        """
+        Args:
+            max_entries: 최대 보관 개수 (초과 시 가장 오래 안 쓴 항목 제거)
+            persist_path: 저장 파일 경로 (.npz, None이면 메모리에만 보관)
+            namespace: 임베딩을 만든 모델 식별자 (다르면 저장본을 버림)
+        """
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+
+        if persist_path:
+            self.load()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def peek(self, key: str) -> Optional[np.ndarray]:
+        """적중 통계 / LRU 순서를 건드리지 않고 조회"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, vec: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = vec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+
+    def load(self) -> None:
+        """디스크 저장본 로드 (모델이 다르거나 파일이 손상되면 무시)"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                if str(data["namespace"]) != self.namespace:
+                    print("[EmbeddingCache] 모델이 달라 저장된 캐시를 무시합니다.")
+                    return
+                keys = data["keys"].tolist()
+                vectors = data["vectors"]
+        except Exception as e:
+            print(f"[EmbeddingCache] ⚠️ 캐시 로드 실패: {e}")
+            return
+
+        with self._lock:
+            for key, vec in zip(keys[-self.max_entries:], vectors[-self.max_entries:]):
+                self._entries[key] = vec.astype("float32")
+        print(f"[EmbeddingCache] 저장된 임베딩 {len(self._entries)}개 로드")
+
+    def save(self) -> None:
+        """디스크에 저장 (변경이 없으면 생략)"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._unsaved or not self._entries:
+                return
+            keys = np.array(list(self._entries.keys()))
+            vectors = np.stack(list(self._entries.values())).astype("float32")
+            self._unsaved = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez(tmp_path, namespace=np.array(self.namespace), keys=keys, vectors=vectors)
+        os.replace(tmp_path, self.persist_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
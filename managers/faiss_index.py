@@ -0,0 +1,185 @@
+"""
+FAISS 인덱스 종류 선택 / 검색 파라미터 / 성능 측정
+
+- flat     : 정확 검색 (기본값, 청크 수천 개까지 충분)
+- ivf-flat : 클러스터(nlist) 중 nprobe개만 탐색
+- hnsw     : 그래프 탐색 (efSearch가 클수록 정확, 느림)
+- ivf-pq   : IVF + 곱 양자화 (메모리 최소, 재현율 손실 있음)
+
+모든 종류를 IndexIDMap2로 감싸 id = 청크 저장소 행 번호를 유지합니다.
+(hnsw는 remove_ids를 지원하지 않으므로 증분 삭제는 tombstone 필터로만 처리)
+
+MIT License
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf-flat", "hnsw", "ivf-pq")
+
+DEFAULT_INDEX_PARAMS: Dict[str, Dict[str, Any]] = {
+    "flat": {},
+    "ivf-flat": {"nlist": None, "nprobe": 8},
+    "hnsw": {"m": 32, "ef_construction": 200, "ef_search": 64},
+    "ivf-pq": {"nlist": None, "pq_m": 64, "nbits": 8, "nprobe": 16},
+}
+
+
+def default_nlist(n_vectors: int) -> int:
+    """클러스터 수: 약 4·√n, 단 클러스터당 학습 벡터가 39개 이상이 되도록 제한"""
+    return max(1, min(int(4 * math.sqrt(max(1, n_vectors))), n_vectors // 39 or 1))
+
+
+def resolve_params(index_type: str, params: Optional[Dict[str, Any]], n_vectors: int, dim: int) -> Dict[str, Any]:
+    """기본값 채우기 + 데이터 크기에 맞게 보정"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"알 수 없는 인덱스 종류: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+
+    resolved = dict(DEFAULT_INDEX_PARAMS[index_type])
+    resolved.update({k: v for k, v in (params or {}).items() if v is not None})
+
+    if "nlist" in resolved and not resolved["nlist"]:
+        resolved["nlist"] = default_nlist(n_vectors)
+    if index_type == "ivf-pq":
+        # pq_m은 차원의 약수여야 하고, 코드북(2^nbits개)마다 학습 벡터가 39개 이상 필요
+        pq_m = int(resolved["pq_m"])
+        while dim % pq_m:
+            pq_m -= 1
+        resolved["pq_m"] = pq_m
+        resolved["nbits"] = max(1, min(int(resolved["nbits"]), int(math.log2(max(2, n_vectors // 39)))))
+    return resolved
+
+
+def build_index(
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    index_type: str = "flat",
+    params: Optional[Dict[str, Any]] = None
+):
+    """
+    정규화된 벡터로 인덱스 생성 (내적 = 코사인 유사도)
+
+    Args:
+        vectors: [n, dim] float32
+        ids: [n] 청크 저장소 행 번호
+        params: nlist / nprobe / m / ef_construction / ef_search / pq_m / nbits
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    params = resolve_params(index_type, params, n, dim)
+
+    if index_type == "flat":
+        base = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, int(params["m"]), faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = int(params["ef_construction"])
+    else:
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf-flat":
+            base = faiss.IndexIVFFlat(quantizer, dim, int(params["nlist"]), faiss.METRIC_INNER_PRODUCT)
+        else:
+            base = faiss.IndexIVFPQ(
+                quantizer, dim, int(params["nlist"]), int(params["pq_m"]), int(params["nbits"]),
+                faiss.METRIC_INNER_PRODUCT
+            )
+        base.train(vectors)
+
+    index = faiss.IndexIDMap2(base)
+    if n:
+        index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+    apply_search_params(index, nprobe=params.get("nprobe"), ef_search=params.get("ef_search"))
+    return index
+
+
+def _base_index(index):
+    """IDMap 래퍼 안쪽의 실제 인덱스"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return faiss.downcast_index(index)
+
+
+def describe_index(index) -> str:
+    """인덱스 종류 이름 (INDEX_TYPES 중 하나, 모르면 FAISS 클래스명)"""
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexFlat):
+        return "flat"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf-pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf-flat"
+    return type(base).__name__
+
+
+def apply_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """검색 시점 파라미터 설정 (해당 없는 인덱스 종류면 무시)"""
+    base = _base_index(index)
+    if nprobe and isinstance(base, faiss.IndexIVF):
+        base.nprobe = int(nprobe)
+    if ef_search and isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = int(ef_search)
+
+
+def selector_search_params(index, ids: np.ndarray):
+    """
+    지정한 id만 검색하도록 하는 SearchParameters (현재 nprobe/efSearch 유지)
+    ids 배열은 검색이 끝날 때까지 호출 측에서 살려 둬야 함
+    """
+    selector = faiss.IDSelectorBatch(ids)
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    elif isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    params._selector = selector  # 파이썬 쪽 참조 유지
+    return params
+
+
+def index_memory_bytes(index) -> int:
+    """직렬화 크기 (메모리 사용량 근사치)"""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+# =================================================================
+# 재현율 / 지연 측정
+# =================================================================
+def evaluate_index(
+    index,
+    queries: np.ndarray,
+    ground_truth: np.ndarray,
+    top_k: int = 3,
+    repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Args:
+        queries: [q, dim] 질문 벡터
+        ground_truth: [q, top_k] 정확 검색(flat) 결과 id
+
+    Returns:
+        recall@k, 질문 1개씩 검색할 때의 p50/p99 지연(ms), 인덱스 크기
+    """
+    found: List[np.ndarray] = []
+    latencies: List[float] = []
+    for _ in range(repeat):
+        found = []
+        for q in queries:
+            start = time.perf_counter()
+            _, ids = index.search(q[np.newaxis, :], top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(ids[0])
+
+    hits = sum(len(set(f.tolist()) & set(t.tolist()) - {-1}) for f, t in zip(found, ground_truth))
+    expected = sum(len(set(t.tolist()) - {-1}) for t in ground_truth)
+    return {
+        f"recall@{top_k}": hits / max(1, expected),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "memory_mb": index_memory_bytes(index) / 1024 / 1024,
+    }
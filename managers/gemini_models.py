@@ -0,0 +1,148 @@
+"""
+Gemini 모델 객체 재사용
+시스템 프롬프트는 (SAN 단계, 호감도 단계) 조합마다 고정(24가지)이므로
+GenerativeModel을 (모델명, 시스템 프롬프트)별로 한 번만 만들어 두고, 턴마다 사용자 프롬프트만 보냅니다.
+
+- genai.configure는 프로세스에서 한 번만 호출
+- cached_content=True면 시스템 프롬프트를 서버 측 캐시(CachedContent)로 올려 입력 토큰 과금을 줄임
+  (모델별 최소 캐시 토큰 수보다 짧거나 지원하지 않는 모델이면 자동으로 일반 모델로 대체)
+
+MIT License
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+import google.generativeai as genai
+from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+# 안전 설정 (차단 해제)
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
+
+class GeminiModelPool:
+    """(모델명, 시스템 프롬프트) → GenerativeModel (스레드 안전)"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cached_content: bool = False,
+        cache_ttl_s: int = 3600,
+        max_entries: int = 32
+    ):
+        """
+        Args:
+            api_key: None이면 첫 사용 시 환경 변수 GOOGLE_API_KEY
+            cached_content: 시스템 프롬프트를 서버 측 캐시로 올릴지 (캐시 보관 시간만큼 저장 비용 발생)
+            cache_ttl_s: 서버 측 캐시 보관 시간 (초)
+            max_entries: 보관할 모델 객체 수 (SAN 4단계 × 호감도 6단계 = 24 + 여유)
+        """
+        self.api_key = api_key
+        self.cached_content = cached_content
+        self.cache_ttl_s = cache_ttl_s
+        self.max_entries = max_entries
+        self._models: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._caches: Dict[Tuple[str, str], Any] = {}
+        self._cache_unsupported: Set[str] = set()  # 캐시 생성이 거부된 모델명 (다시 시도하지 않음)
+        self._configured = False
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "models": 0, "reused": 0, "cached_contents": 0, "cache_failures": 0,
+            "setup_ms": 0.0, "prompt_tokens": 0, "cached_tokens": 0,
+        }
+
+    def _configure(self) -> None:
+        if not self._configured:
+            genai.configure(api_key=self.api_key or os.getenv("GOOGLE_API_KEY"))
+            self._configured = True
+
+    def get(self, model_name: str, system: str):
+        """시스템 프롬프트가 적용된 모델 (없으면 생성)"""
+        key = (model_name, system)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.stats["reused"] += 1
+                return model
+
+            started = time.perf_counter()
+            self._configure()
+            model = self._create_cached(model_name, system) if self.cached_content else None
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    system_instruction=system or None,
+                    safety_settings=SAFETY_SETTINGS
+                )
+            self._models[key] = model
+            if len(self._models) > self.max_entries:
+                old_key, _ = self._models.popitem(last=False)
+                self._delete_cache(old_key)
+            self.stats["models"] += 1
+            self.stats["setup_ms"] += (time.perf_counter() - started) * 1000
+            return model
+
+    def _create_cached(self, model_name: str, system: str):
+        """시스템 프롬프트를 서버 측 캐시로 올린 모델 (실패 시 None)"""
+        if not system or model_name in self._cache_unsupported:
+            return None
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=model_name,
+                display_name="yuhwa-system",
+                system_instruction=system,
+                ttl=self.cache_ttl_s
+            )
+        except Exception as e:
+            # 최소 토큰 수 미달, 캐시 미지원 모델 등 → 이 모델은 일반 모드로 고정
+            self._cache_unsupported.add(model_name)
+            self.stats["cache_failures"] += 1
+            print(f"[LLM-Gemini] 서버 측 캐시 사용 불가 ({model_name}): {e}")
+            return None
+
+        self._caches[(model_name, system)] = cache
+        self.stats["cached_contents"] += 1
+        print(f"[LLM-Gemini] 시스템 프롬프트 캐시 생성: {cache.name} (TTL {self.cache_ttl_s}s)")
+        return genai.GenerativeModel.from_cached_content(cache, safety_settings=SAFETY_SETTINGS)
+
+    def _delete_cache(self, key: Tuple[str, str]) -> None:
+        cache = self._caches.pop(key, None)
+        if cache is None:
+            return
+        try:
+            cache.delete()
+        except Exception as e:
+            print(f"[LLM-Gemini] ⚠️ 캐시 삭제 실패: {e}")
+
+    def record_usage(self, response) -> None:
+        """응답의 입력 토큰 / 캐시 적중 토큰 누적"""
+        try:
+            usage = response.usage_metadata
+        except Exception:
+            # 중간에 끊긴 스트림 등
+            return
+        if usage is None:
+            return
+        self.stats["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+        self.stats["cached_tokens"] += getattr(usage, "cached_content_token_count", 0) or 0
+
+    def close(self) -> None:
+        """서버 측 캐시 정리 (종료 시 호출, TTL이 지나면 어차피 만료됨)"""
+        with self._lock:
+            for key in list(self._caches):
+                self._delete_cache(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.stats)
+            stats["pooled"] = len(self._models)
+        return stats
@@ -0,0 +1,160 @@
+"""
+스트리밍 JSON 필드 파서
+LLM이 토큰 단위로 내보내는 텍스트에서 최상위 JSON 객체의 필드를
+값이 닫히는 즉시 하나씩 꺼내줍니다.
+
+MIT License
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class JsonFieldStreamParser:
+    """청크를 이어 받으며 최상위 객체의 (키, 값)을 완성되는 순서대로 반환"""
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self._raw: List[str] = []
+
+        self._started = False      # 최상위 '{' 발견 여부
+        self._done = False         # 최상위 '}' 도달 여부
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        # depth 1 에서의 진행 단계: key_wait → key → colon → value_wait → value → comma
+        self._mode = "key_wait"
+        self._current_key = ""
+        self._token: List[str] = []
+        self._end_offset = -1      # 최상위 객체가 닫힌 위치 (raw 기준, 닫는 괄호 다음)
+
+    @property
+    def is_complete(self) -> bool:
+        """최상위 JSON 객체가 닫혔는지 여부"""
+        return self._done
+
+    @property
+    def raw_text(self) -> str:
+        """지금까지 받은 원문 전체"""
+        return "".join(self._raw)
+
+    @property
+    def object_text(self) -> str:
+        """닫힌 최상위 객체 원문 (아직 닫히지 않았으면 빈 문자열)"""
+        if not self._done:
+            return ""
+        raw = self.raw_text
+        return raw[raw.find("{"):self._end_offset]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        청크를 추가로 파싱합니다.
+
+        Returns:
+            이번 청크에서 값이 완성된 [(키, 값), ...]
+        """
+        emitted: List[Tuple[str, Any]] = []
+        offset = sum(len(part) for part in self._raw)
+        self._raw.append(chunk)
+
+        for i, c in enumerate(chunk):
+            if self._done:
+                break
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._token.append(c)
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._mode == "key":
+                            self._current_key = str(self._decode("".join(self._token)))
+                            self._token = []
+                            self._mode = "colon"
+                        elif self._mode == "value":
+                            self._emit(emitted, self._decode("".join(self._token)))
+                            self._mode = "comma"
+                continue
+
+            if self._depth > 1:
+                # 중첩 객체/배열 값: 괄호 짝이 맞을 때까지 통째로 모음
+                self._token.append(c)
+                if c == '"':
+                    self._in_string = True
+                elif c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._emit(emitted, self._decode("".join(self._token)))
+                        self._mode = "comma"
+                continue
+
+            # --- depth 1 (최상위 객체 내부) ---
+            if self._mode == "key_wait":
+                if c == '"':
+                    self._in_string = True
+                    self._token = [c]
+                    self._mode = "key"
+                elif c == "}":
+                    self._close(offset + i)
+            elif self._mode == "colon":
+                if c == ":":
+                    self._mode = "value_wait"
+            elif self._mode == "value_wait":
+                if c.isspace():
+                    continue
+                self._token = [c]
+                self._mode = "value"
+                if c == '"':
+                    self._in_string = True
+                elif c in "{[":
+                    self._depth += 1
+            elif self._mode == "value":
+                # 숫자/true/false/null 같은 원시값
+                if c in ",}":
+                    self._emit(emitted, self._decode("".join(self._token).strip()))
+                    if c == "}":
+                        self._close(offset + i)
+                    else:
+                        self._mode = "key_wait"
+                else:
+                    self._token.append(c)
+            elif self._mode == "comma":
+                if c == ",":
+                    self._mode = "key_wait"
+                elif c == "}":
+                    self._close(offset + i)
+
+        return emitted
+
+    def _emit(self, emitted: List[Tuple[str, Any]], value: Any) -> None:
+        self.fields[self._current_key] = value
+        emitted.append((self._current_key, value))
+        self._current_key = ""
+        self._token = []
+
+    def _close(self, index: int) -> None:
+        self._depth = 0
+        self._done = True
+        self._end_offset = index + 1
+
+    @staticmethod
+    def _decode(token: str) -> Any:
+        """JSON 조각 디코딩 (실패 시 따옴표만 벗긴 원문)"""
+        try:
+            return json.loads(token)
+        except (json.JSONDecodeError, ValueError):
+            if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+                return token[1:-1]
+            return token
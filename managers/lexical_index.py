@@ -0,0 +1,202 @@
+"""
+한국어 어휘(lexical) 검색 인덱스
+음절 bigram 역색인 + BM25 점수로, 벡터 검색이 놓치기 쉬운 고유명사(인물/장소/아이템 이름)를 잡아냅니다.
+
+- 색인 단위: 어절마다 음절 bigram (한 글자 어절은 그 글자)
+- 이름 매칭: 자모 단위로 비교해 받침이 붙은 조사("유환" = 유화 + ㄴ)도 이름으로 인식
+- 결합: 벡터 검색 순위와 Reciprocal Rank Fusion
+
+MIT License
+"""
+
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .embedding_cache import normalize_query
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"]
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 초/중/종성 자모로 분해 (그 외 문자는 그대로)"""
+    out = []
+    for c in text:
+        code = ord(c)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_CHOSEONG[offset // 588])
+            out.append(_JUNGSEONG[(offset % 588) // 28])
+            out.append(_JONGSEONG[offset % 28])
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    BM25 색인/질의용 토큰
+    ("유화의 방" → ["유화", "화의", "방"])
+    """
+    terms: List[str] = []
+    for word in normalize_query(text).split():
+        if len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def _name_key(text: str) -> str:
+    """이름 비교용 키 (정규화 + 공백 제거 + 자모 분해)"""
+    return to_jamo(normalize_query(text).replace(" ", ""))
+
+
+class LexicalIndex:
+    """청크 저장소 위의 BM25 역색인 + 로어 이름 사전"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)  # 토큰 → [(행 id, tf)]
+        self._doc_len: Dict[int, int] = {}
+        self._avg_len = 0.0
+        self._names: Dict[str, Tuple[str, List[int]]] = {}  # 자모 키 → (원래 이름, 등장 행 id)
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def name_count(self) -> int:
+        return len(self._names)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: Any,
+        name_fields: Iterable[str] = (),
+        names: Iterable[str] = (),
+        **kwargs
+    ) -> "LexicalIndex":
+        """
+        벡터DB 청크 저장소(PickleChunkStore/MmapChunkStore)로 인덱스 생성
+
+        Args:
+            name_fields: 이름으로 쓸 메타데이터 필드 (문자열 또는 문자열 리스트)
+            names: 추가 이름 목록 (lore_names.txt 등)
+        """
+        index = cls(**kwargs)
+        tombstones = getattr(store, "tombstones", frozenset())
+        name_fields = list(name_fields)
+        lore_names = set(n.strip() for n in names if n and n.strip())
+        texts: Dict[int, str] = {}
+
+        for idx in range(len(store)):
+            if idx in tombstones:
+                continue
+            text = store.get_chunk(idx)
+            texts[idx] = _name_key(text)
+            index._add(idx, tokenize(text))
+
+            if name_fields:
+                meta = store.get_metadata(idx)
+                for field in name_fields:
+                    value = meta.get(field)
+                    values = value if isinstance(value, list) else [value]
+                    lore_names.update(str(v).strip() for v in values if isinstance(v, str) and v.strip())
+
+        index._avg_len = sum(index._doc_len.values()) / max(1, len(index._doc_len))
+
+        # 이름 → 그 이름이 본문에 실제로 등장하는 행
+        for name in lore_names:
+            key = _name_key(name)
+            if len(normalize_query(name).replace(" ", "")) < 2:
+                continue  # 한 글자 이름은 오탐이 많아 제외
+            rows = [idx for idx, text in texts.items() if key in text]
+            if rows:
+                index._names[key] = (name, rows)
+        return index
+
+    def _add(self, idx: int, terms: List[str]) -> None:
+        self._doc_len[idx] = len(terms)
+        for term, tf in Counter(terms).items():
+            self._postings[term].append((idx, tf))
+
+    def search(self, query: str, top_k: int = 20, candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        BM25 검색
+
+        Args:
+            candidates: 주면 이 행들 안에서만 점수 계산
+        Returns:
+            [(행 id, BM25 점수), ...] 점수 내림차순
+        """
+        allowed = set(candidates) if candidates is not None else None
+        n_docs = len(self._doc_len)
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings:
+                if allowed is not None and idx not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[idx] / self._avg_len)
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+    def match_names(self, query: str) -> List[Tuple[str, List[int], float]]:
+        """
+        질문에 들어 있는 로어 이름 찾기 (긴 이름 우선, 겹치는 짧은 이름은 제외)
+
+        Returns:
+            [(이름, 등장 행 id, 질문 대비 이름 길이 비율), ...]
+        """
+        query_key = _name_key(query)
+        if not query_key:
+            return []
+
+        matches = []
+        covered = ""
+        for key in sorted(self._names, key=len, reverse=True):
+            if key in query_key and key not in covered:
+                name, rows = self._names[key]
+                matches.append((name, rows, len(key) / len(query_key)))
+                covered += key + "|"
+        return matches
+
+
+def load_names_file(path: Optional[str]) -> List[str]:
+    """한 줄에 이름 하나 ('#' 주석, '|'로 별칭 구분)"""
+    if not path or not os.path.exists(path):
+        return []
+    names: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                names.extend(part.strip() for part in line.split("|") if part.strip())
+    return names
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    여러 순위 리스트를 RRF로 결합 (점수 = Σ 1 / (k + 순위))
+
+    Returns:
+        [(행 id, RRF 점수), ...] 점수 내림차순
+    """
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, 1):
+            scores[idx] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
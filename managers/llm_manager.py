@@ -2,168 +2,616 @@ import threading
 import queue
 import requests
 import json
-import os
 import time
-from typing import Any, Dict, Optional
+from collections import deque
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from .context_packer import approx_tokens
+from .gemini_models import GeminiModelPool
+from .json_stream import JsonFieldStreamParser
+from .ollama_context import OllamaContextCache
+from .output_budget import OutputBudget
+from .response_cache import ResponseCache
+from .response_schema import GEMINI_RESPONSE_SCHEMA, ROLEPLAY_SCHEMA, parse_roleplay_reply
+
 # Gemini 라이브러리
 import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+# 완성된 JSON 필드를 받는 콜백 (필드명, 값)
+FieldCallback = Callable[[str, Any], None]
+
+
+class _Attempt:
+    """헤징 중인 LLM 호출 하나의 상태"""
+
+    def __init__(self, provider: str, model: str, on_field: Optional[FieldCallback] = None) -> None:
+        self.provider = provider
+        self.model = model
+        self.on_field = on_field  # None이면 완성된 필드를 전달하지 않음
+        self.parser = JsonFieldStreamParser()
+        self.cancelled = threading.Event()
+        self.first_token = threading.Event()
+        self.first_token_s: Optional[float] = None
+        self.text = ""
+        self.error: Optional[Exception] = None
+        self.meta: Dict[str, Any] = {}  # Ollama 완료 메타데이터
+        self.chunks = 0                 # 받은 스트림 청크 수 (Ollama는 청크 1개 = 토큰 1개)
+        self._started = time.perf_counter()
+
+    def mark_first_token(self) -> None:
+        if not self.first_token.is_set():
+            self.first_token_s = time.perf_counter() - self._started
+            self.first_token.set()
+
 
 class LLMManager:
-    def __init__(self, provider: str = None) -> None:
-        self.response_queue: "queue.Queue[str]" = queue.Queue()
-        self.summary_queue: "queue.Queue[str]" = queue.Queue()
-        self._is_thinking: bool = False
-        self._is_summarizing: bool = False
+    def __init__(
+        self,
+        provider: str = None,
+        stream: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+        hedge_model: Optional[str] = None,
+        hedge_deadline: float = 4.0,
+        ollama_context: Optional[OllamaContextCache] = None,
+        gemini_models: Optional[GeminiModelPool] = None,
+        structured_output: bool = True
+    ) -> None:
+        """
+        Args:
+            hedge_model: 주 모델이 hedge_deadline(초) 안에 첫 토큰을 못 내면 병렬로 부를 보조 모델
+                         (None이면 헤징 안 함)
+            ollama_context: Ollama 기본 컨텍스트 재사용 + keep_alive (None이면 매 턴 전체 프롬프트 전송)
+            gemini_models: 시스템 프롬프트별 Gemini 모델 객체 풀 (None이면 기본 설정으로 생성)
+            structured_output: 응답 JSON 스키마를 API 수준에서 강제 (Ollama format / Gemini JSON 모드)
+        """
+        # 스트리밍 모드: JSON 필드가 닫힐 때마다 (필드명, 값)을 on_field 콜백으로 전달
+        self.stream_enabled: bool = stream
+        # 진행 중인 롤플레이 호출 수 (끼어들기로 취소된 호출이 정리되는 동안 새 호출이 겹칠 수 있음)
+        self._thinking_calls: int = 0
+        self._thinking_lock = threading.Lock()
+        # 요약은 한 번에 하나만 (워커 스레드가 끝날 때 해제)
+        self._summary_lock = threading.Lock()
+
+        # 시맨틱 응답 캐시 (None이면 사용 안 함)
+        self.response_cache = response_cache
+
+        self.ollama_context = ollama_context
+        self.gemini_models = gemini_models or GeminiModelPool()
+        self.structured_output = structured_output
+
+        # 제공자별 출력 토큰 상한 (최근 응답 크기에 맞춰 조정)
+        # Gemini 사고 모델은 사고 토큰도 상한에 포함되므로 바닥값을 높게 둠
+        self.output_budgets: Dict[str, OutputBudget] = {
+            "gemini": OutputBudget(initial=8192, floor=2048, ceiling=8192),
+            "ollama": OutputBudget(initial=1024, floor=256, ceiling=2048),
+        }
+        self.reply_stats: Dict[str, int] = {"valid": 0, "repaired": 0, "invalid": 0}
+
+        # 헤징 (주 모델이 늦으면 보조 모델과 경주)
+        self.hedge_model = hedge_model
+        self.hedge_deadline = hedge_deadline
+        self.hedge_stats: Dict[str, int] = {"turns": 0, "hedged": 0, "primary_wins": 0, "secondary_wins": 0}
+        self.last_provider: Optional[str] = None
+        self._latencies: "deque[float]" = deque(maxlen=200)  # 최근 턴 응답 시간 (p99 추적)
+        self._stream_lock = threading.Lock()
+        self._stream_owner: Optional[_Attempt] = None  # 부분 응답을 화면에 보내고 있는 호출
         
         # API 키 로드
         load_dotenv()
         
     def is_thinking(self) -> bool:
-        return self._is_thinking
+        return self._thinking_calls > 0
+
+    def _enter_thinking(self) -> None:
+        with self._thinking_lock:
+            self._thinking_calls += 1
+
+    def _exit_thinking(self) -> None:
+        with self._thinking_lock:
+            self._thinking_calls = max(0, self._thinking_calls - 1)
 
     # =================================================================
     # 1. 메인 대화 (분기 처리: Gemini vs Ollama)
     # =================================================================
-    def call_roleplay(self, prompt_data: Dict[str, Any]) -> None:
-        if self._is_thinking:
-            return
-        self._is_thinking = True
-        
-        # 모델명 확인
-        model_name = prompt_data.get("model", "").lower()
-        
+    def lookup_cached(self, state: str, user_input: str, query_vec: Any) -> Optional[str]:
+        """응답 캐시 조회 (적중하면 저장된 응답 원문, 아니면 None)"""
+        if self.response_cache is None or query_vec is None:
+            return None
+
+        start = time.perf_counter()
+        cached = self.response_cache.lookup(state, query_vec)
+        if cached is None:
+            return None
+
+        stats = self.response_cache.get_stats()
+        print(f"[LLM-Cache] 적중 ({(time.perf_counter() - start) * 1000:.1f}ms, "
+              f"적중률 {stats['hit_rate']:.0%} = {stats['hits']}/{stats['lookups']})")
+        return cached
+
+    @staticmethod
+    def _provider_of(model_name: str) -> str:
         # [핵심 로직] 모델명에 'gemini'가 있으면 Google API, 아니면 로컬 Ollama
-        if "gemini" in model_name:
-            threading.Thread(target=self._gemini_roleplay_thread, args=(prompt_data,), daemon=True).start()
-        else:
-            threading.Thread(target=self._ollama_roleplay_thread, args=(prompt_data,), daemon=True).start()
+        return "gemini" if "gemini" in (model_name or "").lower() else "ollama"
 
-    # [Gemini 호출] - 토큰 제한 8192로 증량 + 빈 응답 방지
-    def _gemini_roleplay_thread(self, prompt_data: Dict[str, Any]) -> None:
+    def generate_roleplay(
+        self,
+        prompt_data: Dict[str, Any],
+        cache_query: Optional[Tuple[str, str, Any]] = None,
+        cancel: Optional[threading.Event] = None,
+        on_field: Optional[FieldCallback] = None
+    ) -> str:
+        """
+        롤플레이 응답을 호출한 스레드에서 끝까지 받아 반환 (턴 파이프라인의 작업 스레드에서 호출)
+
+        Args:
+            cancel: set되면 진행 중인 호출(헤징 포함)을 모두 끊고 CancelledError
+            on_field: 스트리밍 중 완성된 (필드명, 값)을 받을 콜백 (작업 스레드에서 호출)
+        Returns:
+            응답 JSON 원문 (오류 / 침묵도 화면에 보여 줄 JSON으로 반환)
+        """
+        self._enter_thinking()
         try:
-            print(f"[LLM-Main] Gemini 호출 시작: {prompt_data.get('model')}")
-            
-            # 1. 설정
-            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-            
-            # 2. 모델 생성
-            model = genai.GenerativeModel(
-                model_name=prompt_data.get("model"),
-                system_instruction=prompt_data.get("system", "")
-            )
-            
-            # 3. [핵심] 토큰 제한 대폭 상향 (8192)
-            # options에서 값을 가져오되, 기본값을 8192로 설정
-            user_options = prompt_data.get("options", {})
-            config = genai.types.GenerationConfig(
-                temperature=user_options.get("temperature", 0.7),
-                top_p=user_options.get("top_p", 0.95),
-                max_output_tokens=8192,
-                stop_sequences=user_options.get("stop", [])
-            )
+            return self._generate(prompt_data, cache_query, cancel, on_field)
+        finally:
+            self._exit_thinking()
 
-            # 4. 안전 설정 (차단 해제)
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-
-            # 5. 생성 요청
-            response = model.generate_content(
-                prompt_data.get("prompt"),
-                generation_config=config,
-                safety_settings=safety_settings
-            )
-            
-            # 6. 결과 처리 (빈 응답 오류 방지)
-            if response.candidates and response.candidates[0].content.parts:
-                final_text = response.text
+    @staticmethod
+    def silent_reply() -> str:
+        """응답이 없을 때(침묵 / 시간 초과) 보여 줄 대체 응답"""
+        return json.dumps({
+            "dialogue": "...",
+            "action_pre": "생각에 잠겨 있다.",
+            "new_emotion": "무표정"
+        })
+
+    def _generate(
+        self,
+        prompt_data: Dict[str, Any],
+        cache_query: Optional[Tuple[str, str, Any]],
+        cancel: Optional[threading.Event] = None,
+        on_field: Optional[FieldCallback] = None
+    ) -> str:
+        started = time.perf_counter()
+        try:
+            winner, final_text = self._race(prompt_data, cancel, on_field)
+            elapsed = time.perf_counter() - started
+            self._latencies.append(elapsed)
+
+            if final_text:
+                self.last_provider = winner.provider
+                final_text = self._normalize_reply(final_text)
+                self._remember_response(final_text, cache_query)
             else:
-                # 토큰을 늘렸는데도 내용이 없으면 진짜 오류거나 모델이 침묵을 선택한 것
-                finish_reason = "Unknown"
-                if response.candidates:
-                    finish_reason = response.candidates[0].finish_reason
-                
-                print(f"[LLM-Main] ⚠️ 내용 없음 (Reason: {finish_reason})")
-                final_text = json.dumps({
-                    "dialogue": "...", 
-                    "action_pre": "생각에 잠겨 있다.",
-                    "new_emotion": "무표정"
-                })
+                # 모든 호출이 빈 응답 → 모델이 침묵을 선택한 것으로 처리 (캐시하지 않음)
+                final_text = self.silent_reply()
 
-            self.response_queue.put(final_text)
-            print("[LLM-Main] Gemini 응답 완료")
+            print(f"[LLM-Main] {winner.provider} 응답 완료 ({elapsed:.1f}s)")
+            return final_text
 
+        except CancelledError:
+            print(f"[LLM-Main] 호출 취소 ({time.perf_counter() - started:.1f}s)")
+            raise
         except Exception as e:
-            print(f"[LLM-Main] 오류: {e}")
-            self.response_queue.put(json.dumps({"dialogue": f"(오류: {e})", "new_emotion": "고통"}))
-        finally:
-            self._is_thinking = False
+            print(f"[LLM-Main] 최종 오류: {e}")
+            return json.dumps({"dialogue": f"(오류: {e})", "new_emotion": "고통"})
+
+    # =================================================================
+    # 헤징: 주 모델이 기한 내 첫 토큰을 못 내면 보조 모델(로컬 Ollama)을 병렬 호출
+    # =================================================================
+    def _race(
+        self,
+        prompt_data: Dict[str, Any],
+        cancel: Optional[threading.Event] = None,
+        on_field: Optional[FieldCallback] = None
+    ) -> Tuple["_Attempt", str]:
+        """
+        주 호출을 시작하고, hedge_deadline 안에 첫 토큰이 없으면 보조 호출을 추가
+
+        - 먼저 정상 JSON(대사 포함)을 돌려준 쪽이 승자, 나머지는 취소(스트림 종료) 또는 결과 무시
+        - 스트리밍 중에는 먼저 필드를 화면에 보낸 쪽만 부분 응답을 전달하고,
+          그 호출이 실패하지 않는 한 그 쪽 결과를 기다림 (두 응답이 섞여 보이지 않도록)
+        - cancel이 set되면 모든 호출을 끊고 CancelledError
+
+        Returns:
+            (승자, 원문) — 모두 빈 응답이면 원문이 빈 문자열
+        """
+        results: "queue.Queue[Tuple[_Attempt, str, Optional[Exception]]]" = queue.Queue()
+        with self._stream_lock:
+            self._stream_owner = None
+
+        primary = self._start_attempt(prompt_data, results, on_field)
+        attempts = [primary]
+
+        secondary_model = self.hedge_model
+        if secondary_model and secondary_model != prompt_data.get("model"):
+            if not self._wait_event(primary.first_token, self.hedge_deadline, cancel, attempts):
+                print(f"[LLM-Hedge] {self.hedge_deadline:.1f}s 내 첫 토큰 없음 → {secondary_model} 병렬 호출")
+                attempts.append(self._start_attempt(dict(prompt_data, model=secondary_model), results, on_field))
+            elif primary.error is not None:
+                print(f"[LLM-Hedge] 주 모델 실패 → {secondary_model} 호출")
+                attempts.append(self._start_attempt(dict(prompt_data, model=secondary_model), results, on_field))
+
+        self.hedge_stats["turns"] += 1
+        if len(attempts) > 1:
+            self.hedge_stats["hedged"] += 1
+
+        winner: Optional[_Attempt] = None
+        final_text = ""
+        standby: Optional[Tuple[_Attempt, str]] = None  # 스트림 주인이 끝나길 기다리는 동안 보관한 정상 응답
+        fallback: Optional[_Attempt] = None             # 오류는 아니지만 정상 JSON도 아닌 응답
+        errors = []
+        for _ in attempts:
+            attempt, text, error = self._next_result(results, cancel, attempts)
+            if error is not None:
+                errors.append(error)
+                print(f"[LLM-Hedge] {attempt.provider}({attempt.model}) 실패: {error}")
+            elif parse_roleplay_reply(text)[0] is not None:
+                if self._stream_owner in (None, attempt):
+                    winner, final_text = attempt, text
+                    break
+                standby = standby or (attempt, text)
+                continue
+            elif fallback is None or not fallback.text:
+                fallback = attempt
+
+            if attempt is self._stream_owner and standby:
+                # 화면에 스트리밍하던 호출이 실패 → 보관해 둔 다른 쪽 응답 사용
+                winner, final_text = standby
+                break
+
+        if winner is None:
+            if standby:
+                winner, final_text = standby
+            elif fallback is not None:
+                # 내용이 있으면 그대로 전달 (파싱 실패는 화면 쪽에서 처리), 비어 있으면 침묵 처리
+                winner, final_text = fallback, fallback.text
+            else:
+                raise errors[0] if errors else RuntimeError("LLM 응답 없음")
+
+        with self._stream_lock:
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancelled.set()
+
+        if len(attempts) > 1:
+            role = "primary" if winner is primary else "secondary"
+            self.hedge_stats[f"{role}_wins"] += 1
+            print(f"[LLM-Hedge] 승자: {winner.provider}({winner.model}, {role}), 첫 토큰 {winner.first_token_s:.1f}s")
+        return winner, final_text
+
+    @staticmethod
+    def _check_cancel(cancel: Optional[threading.Event], attempts) -> None:
+        if cancel is not None and cancel.is_set():
+            for attempt in attempts:
+                attempt.cancelled.set()
+            raise CancelledError()
+
+    def _wait_event(self, event: threading.Event, timeout: float, cancel: Optional[threading.Event], attempts) -> bool:
+        """취소를 확인하며 event 대기 (timeout 안에 set되면 True)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if event.wait(max(0.0, min(0.1, remaining))):
+                return True
+            self._check_cancel(cancel, attempts)
+            if remaining <= 0:
+                return False
+
+    def _next_result(self, results: "queue.Queue", cancel: Optional[threading.Event], attempts):
+        """취소를 확인하며 다음 호출 결과 대기"""
+        while True:
+            try:
+                return results.get(timeout=0.1)
+            except queue.Empty:
+                self._check_cancel(cancel, attempts)
+
+    def _start_attempt(
+        self,
+        prompt_data: Dict[str, Any],
+        results: "queue.Queue[Tuple[_Attempt, str, Optional[Exception]]]",
+        on_field: Optional[FieldCallback] = None
+    ) -> "_Attempt":
+        attempt = _Attempt(self._provider_of(prompt_data.get("model")), prompt_data.get("model"), on_field)
+        target = self._gemini_generate if attempt.provider == "gemini" else self._ollama_generate
+
+        def run() -> None:
+            text, error = "", None
+            try:
+                text = target(prompt_data, attempt)
+            except Exception as e:
+                error = e
+            finally:
+                attempt.text, attempt.error = text, error
+                attempt.mark_first_token()
+                results.put((attempt, text, error))
+
+        threading.Thread(target=run, daemon=True).start()
+        return attempt
+
+    def _normalize_reply(self, final_text: str) -> str:
+        """스키마 검증 + 가벼운 복구 후 표준 JSON으로 다시 직렬화 (복구 불가면 원문 그대로)"""
+        reply, repairs = parse_roleplay_reply(final_text)
+        if reply is None:
+            self.reply_stats["invalid"] += 1
+            print("[LLM-Main] ⚠️ 응답 JSON 검증 실패 (원문 전달)")
+            return final_text
+        if repairs:
+            self.reply_stats["repaired"] += 1
+            print(f"[LLM-Main] 응답 JSON 복구: {', '.join(repairs)}")
+        else:
+            self.reply_stats["valid"] += 1
+        return json.dumps(reply, ensure_ascii=False)
+
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        """헤징 횟수 / 승자 분포 / 최근 턴 지연 p50·p99 (초)"""
+        latencies = sorted(self._latencies)
+        stats: Dict[str, Any] = dict(self.hedge_stats)
+        stats["last_provider"] = self.last_provider
+        if latencies:
+            stats["p50_s"] = latencies[len(latencies) // 2]
+            stats["p99_s"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return stats
+
+    # [Gemini 호출] - 토큰 제한 8192로 증량 + 빈 응답 방지
+    def _gemini_generate(self, prompt_data: Dict[str, Any], attempt: "_Attempt") -> str:
+        print(f"[LLM-Main] Gemini 호출 시작: {prompt_data.get('model')}")
+
+        # 1. 모델 (시스템 프롬프트별로 한 번만 생성해 재사용, 안전 설정 포함)
+        model = self.gemini_models.get(prompt_data.get("model"), prompt_data.get("system", ""))
+
+        # 2. 출력 토큰 상한: 최근 응답 크기 기반 (사고 토큰도 포함되므로 상한은 넉넉히)
+        user_options = prompt_data.get("options", {})
+        budget = self.output_budgets["gemini"]
+        max_tokens = budget.current()
+        config = genai.types.GenerationConfig(
+            temperature=user_options.get("temperature", 0.7),
+            top_p=user_options.get("top_p", 0.95),
+            max_output_tokens=max_tokens,
+            stop_sequences=user_options.get("stop", []),
+            **self._gemini_json_options()
+        )
+
+        # 3. 생성 요청 (항상 스트림으로 받아 최상위 JSON 객체가 닫히면 바로 중단)
+        response = model.generate_content(
+            prompt_data.get("prompt"),
+            generation_config=config,
+            stream=True
+        )
+
+        # 끝까지 읽지 않은 스트림은 response.candidates / usage_metadata 접근 시 예외
+        # (IncompleteIterationError) → 종료 사유 / 사용량은 마지막으로 받은 청크에서 읽음
+        last_chunk = response
+        stopped_early = False
+        for chunk in response:
+            last_chunk = chunk
+            if attempt.cancelled.is_set():
+                break
+            try:
+                chunk_text = chunk.text
+            except ValueError:
+                # 내용 없는 청크 (safety/finish 신호만 있는 경우)
+                continue
+            self._feed_stream(attempt, chunk_text)
+            if attempt.parser.is_complete:
+                stopped_early = True
+                break
+
+        # 4. 결과 처리 (빈 응답 오류 방지)
+        self.gemini_models.record_usage(last_chunk)
+        finish_reason = "STOP" if stopped_early else self._gemini_finish_reason(last_chunk)
+        if not attempt.cancelled.is_set():
+            budget.observe(
+                self._gemini_output_tokens(last_chunk, attempt.parser.raw_text),
+                truncated=(finish_reason == "MAX_TOKENS" and not attempt.parser.is_complete)
+            )
+        if attempt.parser.is_complete:
+            return attempt.parser.object_text
+        if attempt.parser.raw_text:
+            return attempt.parser.raw_text
+
+        # 내용이 없으면 진짜 오류거나(상한 부족 포함) 모델이 침묵을 선택한 것
+        print(f"[LLM-Main] ⚠️ 내용 없음 (Reason: {finish_reason or 'Unknown'}, 상한 {max_tokens})")
+        return ""
+
+    @staticmethod
+    def _gemini_finish_reason(response) -> str:
+        try:
+            return response.candidates[0].finish_reason.name
+        except Exception:
+            # 후보 없음 / 중간에 끊긴 스트림 등
+            return ""
+
+    @staticmethod
+    def _gemini_output_tokens(response, text: str) -> int:
+        """사용한 출력 토큰 (사고 토큰 포함, 메타데이터가 없으면 원문 길이로 보수적으로 추정)"""
+        try:
+            usage = response.usage_metadata
+            used = (usage.candidates_token_count or 0) + (getattr(usage, "thoughts_token_count", 0) or 0)
+        except Exception:
+            used = 0
+        return used or approx_tokens(text) * 2
+
+    def _gemini_json_options(self) -> Dict[str, Any]:
+        """
+        Gemini JSON 모드 설정
+        response_schema는 속성을 이름순으로 내보내므로(행동 후 묘사가 대사보다 먼저 나옴)
+        필드 단위로 화면에 먼저 보여 주는 스트리밍 모드에서는 JSON 모드만 사용
+        """
+        if not self.structured_output:
+            return {}
+        if self.stream_enabled:
+            return {"response_mime_type": "application/json"}
+        return {"response_mime_type": "application/json", "response_schema": GEMINI_RESPONSE_SCHEMA}
 
     # [수정됨] 재시도 로직이 추가된 Ollama 호출
-    def _ollama_roleplay_thread(self, prompt_data: Dict[str, Any]) -> None:
+    def _ollama_generate(self, prompt_data: Dict[str, Any], attempt: "_Attempt") -> str:
         max_retries = 3
         url = "http://localhost:11434/api/generate"
-        
-        try:
-            print(f"[LLM-Main] Ollama 호출 시작: {prompt_data.get('model')}")
-            
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(
-                        url,
-                        json=prompt_data,
-                        timeout=120,
-                    )
-                    
-                    # 200 OK인 경우 성공 처리
-                    if response.status_code == 200:
-                        data = response.json()
-                        self.response_queue.put(data.get("response", ""))
-                        print("[LLM-Main] Ollama 응답 완료")
-                        return # 성공했으므로 함수 종료
-                    
-                    # 503 Service Unavailable (모델 로딩 중 or 과부하)
-                    elif response.status_code == 503:
-                        print(f"[LLM-Main] ⚠️ 서버 혼잡 (503). 2초 후 재시도... ({attempt+1}/{max_retries})")
-                        time.sleep(2)
-                        continue
-                    
-                    # 그 외 오류는 예외 발생시킴
-                    else:
-                        response.raise_for_status()
-                        
-                except requests.exceptions.RequestException as req_err:
-                    print(f"[LLM-Main] 연결 오류: {req_err} (재시도 중...)")
+
+        print(f"[LLM-Main] Ollama 호출 시작: {prompt_data.get('model')}")
+        # 항상 스트림으로 받아 최상위 JSON 객체가 닫히면 바로 중단
+        full_payload = dict(prompt_data, stream=True)
+        budget = self.output_budgets["ollama"]
+        options = full_payload.get("options", {})
+        if "num_predict" not in options:
+            full_payload["options"] = dict(options, num_predict=budget.current())
+        if self.structured_output:
+            full_payload["format"] = ROLEPLAY_SCHEMA
+        payload, reused = full_payload, False
+        if self.ollama_context is not None:
+            # (SAN, 호감도) 조합별 기본 컨텍스트 재사용 → 시스템 프롬프트 prefill 생략
+            payload, reused = self.ollama_context.prepare(full_payload)
+
+        for retry in range(max_retries):
+            if attempt.cancelled.is_set():
+                return ""
+            try:
+                response = requests.post(
+                    url,
+                    json=payload,
+                    timeout=120,
+                    stream=True,
+                )
+
+                # 200 OK인 경우 성공 처리
+                if response.status_code == 200:
+                    text = self._read_ollama_stream(response, attempt)
+                    if self.ollama_context is not None:
+                        self.ollama_context.record("reuse" if reused else "full", attempt.meta)
+                    if not attempt.cancelled.is_set():
+                        budget.observe(
+                            attempt.meta.get("eval_count", attempt.chunks),
+                            truncated=(attempt.meta.get("done_reason") == "length" and not attempt.parser.is_complete)
+                        )
+                    return text
+
+                # 503 Service Unavailable (모델 로딩 중 or 과부하)
+                elif response.status_code == 503:
+                    print(f"[LLM-Main] ⚠️ 서버 혼잡 (503). 2초 후 재시도... ({retry+1}/{max_retries})")
                     time.sleep(2)
-                    if attempt == max_retries - 1:
-                        raise req_err # 마지막 시도에서도 실패하면 예외 던짐
+                    continue
 
-        except Exception as e:
-            print(f"[LLM-Main] 최종 오류: {e}")
-            self.response_queue.put(f"오류: {e}")
-        finally:
-             self._is_thinking = False
-    
-    def get_response(self) -> Optional[str]:
+                # JSON 스키마 format을 지원하지 않는 구버전 서버 → 일반 JSON 모드로 재시도
+                elif response.status_code in (400, 500) and isinstance(payload.get("format"), dict):
+                    print(f"[LLM-Main] ⚠️ 스키마 format 거부 ({response.status_code}) → format=json으로 재시도")
+                    full_payload["format"] = "json"
+                    payload = dict(payload, format="json")
+                    continue
+
+                # 컨텍스트 재사용 요청이 거부되면 해당 컨텍스트를 버리고 전체 프롬프트로 재시도
+                elif reused:
+                    print(f"[LLM-Context] ⚠️ 컨텍스트 재사용 실패 ({response.status_code}) → 전체 프롬프트로 재시도")
+                    self.ollama_context.invalidate(full_payload)
+                    payload, reused = self.ollama_context.with_keep_alive(full_payload), False
+                    continue
+
+                # 그 외 오류는 예외 발생시킴
+                else:
+                    response.raise_for_status()
+
+            except requests.exceptions.RequestException as req_err:
+                print(f"[LLM-Main] 연결 오류: {req_err} (재시도 중...)")
+                if retry == max_retries - 1:
+                    raise req_err # 마지막 시도에서도 실패하면 예외 던짐
+                time.sleep(2)
+
+        raise RuntimeError("Ollama 서버 혼잡 (재시도 초과)")
+
+    def _remember_response(self, final_text: str, cache_query: Optional[Tuple[str, str, Any]]) -> None:
+        """정상 JSON 응답(대사 포함)만 응답 캐시에 저장"""
+        if self.response_cache is None or cache_query is None or parse_roleplay_reply(final_text)[0] is None:
+            return
+        state, user_input, query_vec = cache_query
+        self.response_cache.store(state, user_input, query_vec, final_text)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """응답 캐시 적중률 등 (캐시 미사용이면 빈 dict)"""
+        return self.response_cache.get_stats() if self.response_cache else {}
+
+    def get_output_budgets(self) -> Dict[str, int]:
+        """제공자별 현재 출력 토큰 상한"""
+        return {name: budget.current() for name, budget in self.output_budgets.items()}
+
+    def get_reply_stats(self) -> Dict[str, int]:
+        """응답 JSON 검증 결과 (정상 / 복구 / 실패) 횟수"""
+        return dict(self.reply_stats)
+
+    def get_gemini_stats(self) -> Dict[str, Any]:
+        """Gemini 모델 재사용 / 서버 측 캐시 / 입력 토큰 누적"""
+        return self.gemini_models.get_stats()
+
+    def get_prefill_stats(self) -> Dict[str, Any]:
+        """Ollama 컨텍스트 재사용 / 전체 전송 턴의 평균 prefill (미사용이면 빈 dict)"""
+        return self.ollama_context.get_stats() if self.ollama_context else {}
+
+    def _read_ollama_stream(self, response: requests.Response, attempt: "_Attempt") -> str:
+        """
+        Ollama NDJSON 스트림을 읽으며 필드 단위로 부분 응답 전달
+        최상위 JSON 객체가 닫히면 완료 메타데이터(prefill 통계)를 몇 줄만 더 기다린 뒤 연결을 닫고 중단
+        (취소되면 바로 중단)
+        """
+        grace = 4
         try:
-            return self.response_queue.get_nowait()
-        except queue.Empty:
-            return None
+            for line in response.iter_lines():
+                if attempt.cancelled.is_set():
+                    break
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("done"):
+                    attempt.meta = data  # prompt_eval_count / prompt_eval_duration / eval_count 등
+                    break
+                if attempt.parser.is_complete:
+                    grace -= 1
+                    if grace <= 0:
+                        break
+                    continue
+                attempt.chunks += 1
+                self._feed_stream(attempt, data.get("response", ""))
+        finally:
+            response.close()
+        return attempt.parser.object_text or attempt.parser.raw_text
+
+    def _feed_stream(self, attempt: "_Attempt", chunk_text: str) -> None:
+        """
+        청크를 파서에 넣고 완성된 필드를 메인 루프로 전달
+        (스트리밍 모드가 아니면 파싱만, 헤징 중에는 먼저 필드를 완성한 호출만 화면에 전달)
+        """
+        if chunk_text:
+            attempt.mark_first_token()
+        fields = attempt.parser.feed(chunk_text)
+        if not fields or not self.stream_enabled:
+            return
+        with self._stream_lock:
+            if attempt.cancelled.is_set():
+                return
+            if self._stream_owner is None:
+                self._stream_owner = attempt
+            if self._stream_owner is attempt:
+                if attempt.on_field is not None:
+                    for field, value in fields:
+                        attempt.on_field(field, value)
 
     # =================================================================
     # 2. 요약 (무조건 Ollama) - 재시도 로직 적용
     # =================================================================
-    def call_summary(self, user_text: str, ai_text: str, prev_topic: str, model_name: str) -> None:
-        if self._is_summarizing: return
-        
-        self._is_summarizing = True
-        
+    def call_summary(
+        self,
+        user_text: str,
+        ai_text: str,
+        prev_topic: str,
+        model_name: str,
+        on_done: Callable[[str], None]
+    ) -> None:
+        """
+        Args:
+            on_done: 요약 결과를 받을 콜백 (워커 스레드에서 호출 → 완료 알림 채널로 넘길 것)
+        """
+        if not self._summary_lock.acquire(blocking=False):
+            return
+
         prompt = f"""### [Task]
 상황 기록관으로서, 아래 대화를 바탕으로 현재 핵심 주제를 한 문장으로 요약하십시오.
 (주어는 '유화' 또는 '관리자'로 시작, 20자 이내 명사형 종결)
@@ -184,10 +632,12 @@ class LLMManager:
             "stream": False,
             "options": {"num_predict": 40, "stop": ["\n", "###"]}
         }
+        if self.ollama_context is not None:
+            payload = self.ollama_context.with_keep_alive(payload)
         
-        threading.Thread(target=self._summary_thread, args=(payload,), daemon=True).start()
+        threading.Thread(target=self._summary_thread, args=(payload, on_done), daemon=True).start()
     
-    def _summary_thread(self, payload: Dict[str, Any]) -> None:
+    def _summary_thread(self, payload: Dict[str, Any], on_done: Callable[[str], None]) -> None:
         max_retries = 3
         url = "http://localhost:11434/api/generate"
         
@@ -208,7 +658,7 @@ class LLMManager:
                         print(f"[LLM-Summary] 결과: {summary_text}")
                         
                         if summary_text:
-                            self.summary_queue.put(summary_text)
+                            on_done(summary_text)
                         return # 성공 시 종료
                     
                     elif response.status_code == 503:
@@ -227,10 +677,4 @@ class LLMManager:
         except Exception as e:
             print(f"[LLM-Summary] 치명적 오류: {e}")
         finally:
-            self._is_summarizing = False
-    
-    def get_summary_update(self) -> Optional[str]:
-        try:
-            return self.summary_queue.get_nowait()
-        except queue.Empty:
-            return None
\ No newline at end of file
+            self._summary_lock.release()
@@ -0,0 +1,207 @@
+"""
+Ollama 기본 컨텍스트 재사용
+시스템 프롬프트(BASE_SYSTEM + SAN/호감도 모듈, 약 2K 토큰)는 (SAN 단계, 호감도 단계) 조합마다 고정이므로
+조합별로 한 번만 프라이밍해 Ollama가 돌려주는 `context`(토큰 목록)를 보관하고,
+이후 턴은 시스템 프롬프트 대신 그 컨텍스트 뒤에 사용자 입력만 이어 보냅니다.
+
+- 같은 토큰 접두사가 반복되므로 Ollama 러너의 KV 캐시가 접두사를 그대로 재사용 → 사용자 입력 부분만 prefill
+- 기본 컨텍스트에는 시스템 블록 토큰만 담김: 프라이밍 요청의 template을 모델 계열별 시스템 블록으로 바꿔
+  보내고 생성된 토큰(num_predict=1)은 잘라냄 (가짜 사용자 턴 / 응답이 이후 턴에 끼어들지 않음)
+- 프라이밍은 백그라운드에서: 조합이 바뀐 첫 턴은 전체 프롬프트로 보내고 다음 턴부터 재사용
+  (턴 처리 경로에서 기다리거나 다른 Ollama 호출을 막지 않음)
+- keep_alive로 턴 사이에 모델이 메모리에서 내려가지 않게 유지
+- 응답의 prompt_eval_count / prompt_eval_duration으로 재사용 / 전체 전송의 prefill 시간을 비교 기록
+
+MIT License
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import requests
+
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+
+# 모델 계열별 시스템 블록 (Ollama Go 템플릿, 프라이밍 요청의 template로 사용)
+# 모델명(태그 제외)이 키로 시작하면 사용, 없는 모델은 컨텍스트 재사용 없이 전체 프롬프트 전송
+SYSTEM_BLOCK_TEMPLATES: Dict[str, str] = {
+    "exaone3.5": "[|system|]{{ .System }}[|endofturn|]\n",
+    "llama3": "<|start_header_id|>system<|end_header_id|>\n\n{{ .System }}<|eot_id|>",
+    "qwen2.5": "<|im_start|>system\n{{ .System }}<|im_end|>\n",
+}
+
+# 컨텍스트 재사용 턴의 system 값
+# (비워 두면 Ollama가 모델 기본 SYSTEM을 끼워 넣으므로, 짧은 지시로 대신함)
+CONTEXT_SYSTEM = "앞의 지침(캐릭터 설정, 현재 상태, JSON 출력 형식)을 그대로 따르십시오."
+
+
+class OllamaContextCache:
+    """(모델, 시스템 프롬프트) → 프라이밍된 Ollama context 토큰 (스레드 안전)"""
+
+    def __init__(
+        self,
+        url: str = OLLAMA_GENERATE_URL,
+        keep_alive: Optional[str] = "30m",
+        reuse: bool = True,
+        max_entries: int = 32,
+        timeout: float = 120,
+        system_templates: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            keep_alive: 마지막 요청 후 모델을 메모리에 유지할 시간 (Ollama 형식, 예: "30m", None이면 서버 기본값)
+            reuse: False면 컨텍스트 재사용 없이 keep_alive만 붙임 (비교 측정용)
+            max_entries: 보관할 기본 컨텍스트 수 (SAN 4단계 × 호감도 6단계 = 24 + 여유)
+            system_templates: SYSTEM_BLOCK_TEMPLATES에 추가 / 덮어쓸 모델 계열별 시스템 블록
+        """
+        self.url = url
+        self.keep_alive = keep_alive
+        self.reuse = reuse
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._contexts: "OrderedDict[Tuple[str, str], List[int]]" = OrderedDict()
+        self.system_templates = dict(SYSTEM_BLOCK_TEMPLATES, **(system_templates or {}))
+        self._lock = threading.Lock()
+        self._priming: Set[Tuple[str, str]] = set()  # 백그라운드에서 프라이밍 중인 조합
+        self._unsupported: Set[str] = set()  # 시스템 블록 템플릿이 없는 모델 (한 번만 안내)
+        self.primes = 0
+        self.prime_failures = 0
+        # 모드별 최근 prefill 기록: (prompt_eval_count, prompt_eval_duration ms)
+        self._prefill: Dict[str, "deque[Tuple[int, float]]"] = {
+            "reuse": deque(maxlen=100),
+            "full": deque(maxlen=100),
+        }
+
+    def with_keep_alive(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.keep_alive is None or "keep_alive" in payload:
+            return payload
+        return dict(payload, keep_alive=self.keep_alive)
+
+    def system_template(self, model: Optional[str]) -> Optional[str]:
+        """모델 계열의 시스템 블록 템플릿 (없으면 None)"""
+        name = (model or "").split(":")[0].split("/")[-1].lower()
+        for family, template in self.system_templates.items():
+            if name.startswith(family):
+                return template
+        return None
+
+    def prime(self, payload: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        시스템 블록만 렌더링해 기본 컨텍스트 생성 (실패 / 템플릿 없음 시 None)
+        Ollama는 raw 요청에 context를 돌려주지 않으므로 일반 요청의 template을 시스템 블록으로 바꿔 보내고,
+        context(= 렌더링된 프롬프트 + 생성 텍스트의 토큰)에서 생성된 eval_count개를 잘라냄
+        """
+        template = self.system_template(payload.get("model"))
+        if template is None:
+            return None
+        options = dict(payload.get("options", {}), num_predict=1, temperature=0)
+        prime_payload = self.with_keep_alive({
+            "model": payload.get("model"),
+            "system": payload.get("system", ""),
+            "prompt": ".",  # 빈 prompt는 모델 로드 요청으로 처리됨 (template에 .Prompt가 없어 렌더링되지 않음)
+            "template": template,
+            "stream": False,
+            "options": options,  # num_ctx 등은 본 요청과 같게 유지 (다르면 모델이 다시 로드됨)
+        })
+        try:
+            response = requests.post(self.url, json=prime_payload, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.prime_failures += 1
+            print(f"[LLM-Context] ⚠️ 기본 컨텍스트 생성 실패: {e}")
+            return None
+
+        context = data.get("context") or []
+        generated = int(data.get("eval_count", 0) or 0)
+        if generated:
+            context = context[:-generated]
+        if not context:
+            self.prime_failures += 1
+            return None
+        self.primes += 1
+        print(f"[LLM-Context] 기본 컨텍스트 생성: 시스템 블록 {len(context)} 토큰 "
+              f"(prefill {data.get('prompt_eval_duration', 0) / 1e6:.0f}ms)")
+        return context
+
+    def warm(self, payload: Dict[str, Any]) -> bool:
+        """조합의 기본 컨텍스트를 지금 만들어 보관 (호출한 스레드에서 기다림, 성공 시 True)"""
+        context = self.prime(payload)
+        if context is None:
+            return False
+        with self._lock:
+            self._contexts[(payload.get("model"), payload.get("system"))] = context
+            while len(self._contexts) > self.max_entries:
+                self._contexts.popitem(last=False)
+        return True
+
+    def _warm_in_background(self, key: Tuple[str, str], payload: Dict[str, Any]) -> None:
+        try:
+            self.warm(payload)
+        finally:
+            with self._lock:
+                self._priming.discard(key)
+
+    def prepare(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        시스템 프롬프트를 기본 컨텍스트로 바꾼 요청 페이로드 (기다리지 않음)
+
+        Returns:
+            (페이로드, 컨텍스트 재사용 여부) — 기본 컨텍스트가 아직 없으면 원래 페이로드 그대로 보내고
+            백그라운드에서 프라이밍 시작 (다음 턴부터 재사용)
+        """
+        system = payload.get("system")
+        if not self.reuse or not system or payload.get("context") or payload.get("raw"):
+            return self.with_keep_alive(payload), False
+
+        model = payload.get("model")
+        if self.system_template(model) is None:
+            if model not in self._unsupported:
+                self._unsupported.add(model)
+                print(f"[LLM-Context] {model}: 시스템 블록 템플릿 없음 → 컨텍스트 재사용 안 함 "
+                      f"(config/media.json llm.ollama.system_templates)")
+            return self.with_keep_alive(payload), False
+
+        key = (model, system)
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                self._contexts.move_to_end(key)
+            elif key not in self._priming:
+                # 같은 조합은 한 번만 (턴 처리와 다른 Ollama 호출은 기다리지 않음)
+                self._priming.add(key)
+                threading.Thread(
+                    target=self._warm_in_background, args=(key, dict(payload)),
+                    name="ollama-prime", daemon=True
+                ).start()
+
+        if context is None:
+            return self.with_keep_alive(payload), False
+        reused = dict(payload, system=CONTEXT_SYSTEM, context=context)
+        return self.with_keep_alive(reused), True
+
+    def invalidate(self, payload: Dict[str, Any]) -> None:
+        """재사용 요청이 실패했을 때 해당 조합의 컨텍스트 폐기"""
+        with self._lock:
+            self._contexts.pop((payload.get("model"), payload.get("system")), None)
+
+    def record(self, mode: str, data: Dict[str, Any]) -> None:
+        """Ollama 응답 메타데이터(done 시점)의 prefill 통계 기록"""
+        if "prompt_eval_duration" not in data:
+            return
+        self._prefill[mode].append((int(data.get("prompt_eval_count", 0)), data["prompt_eval_duration"] / 1e6))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """모드별 평균 prefill 토큰 수 / 시간(ms), 프라이밍 횟수"""
+        stats: Dict[str, Any] = {
+            "contexts": len(self._contexts),
+            "primes": self.primes,
+            "prime_failures": self.prime_failures,
+        }
+        for mode, records in self._prefill.items():
+            if records:
+                stats[f"{mode}_turns"] = len(records)
+                stats[f"{mode}_prefill_tokens"] = sum(r[0] for r in records) / len(records)
+                stats[f"{mode}_prefill_ms"] = sum(r[1] for r in records) / len(records)
+        return stats
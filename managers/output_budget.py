@@ -0,0 +1,59 @@
+"""
+적응형 출력 토큰 상한
+응답은 보통 수백 자짜리 JSON 하나이므로, 고정 상한(8192) 대신
+최근 응답이 실제로 쓴 출력 토큰의 최댓값 × 여유 배율로 다음 호출의 상한을 정합니다.
+
+- 표본이 min_samples개 모이기 전에는 initial 사용
+- 상한에 걸려 응답이 잘리면 표본에 현재 상한의 2배를 넣어 다음 상한을 키움
+- 항상 [floor, ceiling] 범위로 제한
+
+MIT License
+"""
+
+import threading
+from collections import deque
+
+
+class OutputBudget:
+    """최근 출력 토큰 수 → 다음 호출의 max_output_tokens / num_predict (스레드 안전)"""
+
+    def __init__(
+        self,
+        initial: int = 1024,
+        floor: int = 256,
+        ceiling: int = 8192,
+        margin: float = 1.5,
+        window: int = 20,
+        min_samples: int = 3
+    ):
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.margin = margin
+        self.min_samples = min_samples
+        self._samples: "deque[int]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.truncations = 0
+
+    def current(self) -> int:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                budget = self.initial
+            else:
+                budget = int(max(self._samples) * self.margin)
+        return max(self.floor, min(self.ceiling, budget))
+
+    def observe(self, tokens: int, truncated: bool = False) -> None:
+        """
+        Args:
+            tokens: 이번 호출이 쓴 출력 토큰 수
+            truncated: 상한에 걸려 JSON이 닫히기 전에 끝났는지
+        """
+        if truncated:
+            self.truncations += 1
+            tokens = max(tokens, self.current()) * 2
+            print(f"[LLM-Budget] ⚠️ 출력 상한 도달 → 다음 상한 {min(self.ceiling, int(tokens * self.margin))}")
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._samples.append(int(tokens))
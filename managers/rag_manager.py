@@ -3,14 +3,38 @@ RAG 검색 매니저 (메모리 최적화 + 토크나이저 이슈 수정 버전
 벡터DB에서 사용자 질문과 관련된 지식을 검색합니다.
 """
 
+import atexit
+import json
 import os
-import pickle
-import torch
-import faiss
+import threading
+import time
+from collections import OrderedDict
 import numpy as np
-from transformers import XLMRobertaModel, AutoTokenizer
-import torch.nn.functional as F
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from .embedding_backends import create_backend, load_tokenizer
+from .context_packer import mmr_order, pack_context
+from .embedding_cache import EmbeddingCache, normalize_query
+from .faiss_index import apply_search_params, build_index, describe_index, selector_search_params
+from .lexical_index import LexicalIndex, load_names_file, reciprocal_rank_fusion
+from .vectordb_store import convert_pickle_to_mmap, load_vectors, open_vectordb
+
+
+class SearchPartition:
+    """
+    메타데이터 필터 하나에 해당하는 검색 범위
+    - 원본 임베딩(vectors.npy)이 있으면 파티션 전용 flat 인덱스 (파티션 벡터만 스캔)
+    - 없으면 전체 인덱스 + FAISS IDSelector
+    """
+
+    def __init__(self, rows: np.ndarray, index=None, params=None):
+        self.rows = rows
+        self.row_set = frozenset(rows.tolist())
+        self.index = index
+        self.params = params
+
+    def __len__(self) -> int:
+        return len(self.rows)
 
 class RAGManager:
     """파인튜닝된 KURE-v1 + FAISS 벡터DB로 지식 검색"""
@@ -18,7 +42,18 @@ class RAGManager:
     def __init__(
         self,
         model_path: str = "assets/models/KURE-v1-yuhwa-final",
-        vectordb_path: str = "assets/database/vectordb"
+        vectordb_path: str = "assets/database/vectordb",
+        query_cache_size: int = 512,
+        query_cache_path: Optional[str] = None,
+        backend: str = "torch-fp32",
+        onnx_dir: Optional[str] = None,
+        auto_convert_db: bool = False,
+        lexical: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        partition_fields: Optional[List[str]] = None,
+        max_partitions: int = 32,
+        context: Optional[Dict[str, Any]] = None
     ):
         print("[RAG] 초기화 중...")
         
@@ -28,101 +63,450 @@ class RAGManager:
         
         # 2. Tokenizer 로드 (Regex 오류 수정 적용)
         print("[RAG] Tokenizer 로딩...")
-        try:
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                model_path,
-                fix_mistral_regex=True  # [수정] 토크나이저 정규식 오류 방지 플래그
-            )
-        except TypeError:
-            # 만약 모델이 이 플래그를 지원하지 않는 구형/다른 아키텍처일 경우 대비
-            print("[RAG] fix_mistral_regex 옵션이 필요 없거나 지원되지 않아 제외하고 로드합니다.")
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.tokenizer = load_tokenizer(model_path)
         
-        # 3. Model 로드 (메모리 최적화 적용)
-        print("[RAG] Model 로딩 중 (from_pretrained)...")
+        # 3. 임베딩 백엔드 로드 (torch-fp32 / torch-int8 / onnx-fp32 / onnx-int8)
+        print(f"[RAG] Model 로딩 중 (backend: {backend})...")
         try:
-            # safetensors를 사용하여 메모리 효율적으로 로드
-            self.model = XLMRobertaModel.from_pretrained(
-                model_path,
-                use_safetensors=True,
-                local_files_only=True
-            )
+            self.backend = create_backend(backend, model_path, onnx_dir=onnx_dir)
         except Exception as e:
-            print(f"[RAG] 모델 로딩 실패: {e}")
-            raise e
-        
-        self.model = self.model.to(self.device)
-        self.model.eval()
+            if backend == "torch-fp32":
+                print(f"[RAG] 모델 로딩 실패: {e}")
+                raise e
+            # 변환 파일이 없는 등 선택한 백엔드를 쓸 수 없으면 기준 백엔드로
+            print(f"[RAG] ⚠️ {backend} 백엔드 로딩 실패 ({e}) → torch-fp32 사용")
+            self.backend = create_backend("torch-fp32", model_path)
         
-        print("[RAG] 모델 로드 완료")
+        print(f"[RAG] 모델 로드 완료 ({self.backend.name})")
         
-        # 4. 벡터DB 로드
+        # 4. 벡터DB 로드 (mmap 형식 우선, 없으면 기존 pickle 형식)
         print("[RAG] 벡터DB 로딩...")
-        index_file = os.path.join(vectordb_path, "yuhwa.index")
-        chunks_file = os.path.join(vectordb_path, "chunks.pkl")
-        metadata_file = os.path.join(vectordb_path, "metadata.pkl")
-        
-        if not os.path.exists(index_file) or not os.path.exists(chunks_file):
-             raise FileNotFoundError(f"벡터 DB 파일이 경로에 없습니다: {vectordb_path}")
+        self.index, self.store = open_vectordb(vectordb_path)
+
+        if self.store.format == "legacy" and auto_convert_db:
+            # 1회 변환: 다음 실행부터는 mmap 형식으로 지연 로드
+            try:
+                convert_pickle_to_mmap(vectordb_path)
+            except Exception as e:
+                print(f"[RAG] ⚠️ 벡터DB 변환 실패 (기존 형식 유지): {e}")
+
+        # 근사 인덱스(ivf/hnsw)는 검색 파라미터로 정확도-속도 조절 (None이면 빌드 시 값 사용)
+        apply_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+        self.index_type = describe_index(self.index)
+        print(f"[RAG] 인덱스 종류: {self.index_type} (nprobe={nprobe}, efSearch={ef_search})")
 
-        self.index = faiss.read_index(index_file)
+        # 메타데이터 필터용 파티션 (필터 조합 → SearchPartition, 전체와 같으면 None, LRU)
+        # 입력 중 미리 계산(prefetch) 스레드와 턴 스레드가 함께 쓰므로 잠금
+        self._vectors = load_vectors(vectordb_path) if self.store.format == "mmap" else None
+        self._partitions: "OrderedDict[str, Optional[SearchPartition]]" = OrderedDict()
+        self._partition_lock = threading.Lock()
+        self.max_partitions = max_partitions
+        self._live_rows = len(self.store) - sum(1 for i in self.store.tombstones if i < len(self.store))
+        for field in partition_fields or []:
+            for value in self.store.distinct_values(field):
+                self._get_partition({field: value})
+        if self._partitions:
+            sizes = ", ".join(
+                f"{key}={len(p) if p is not None else '전체'}" for key, p in self._partitions.items()
+            )
+            print(f"[RAG] 파티션 준비: {sizes}")
         
-        with open(chunks_file, 'rb') as f:
-            self.chunks = pickle.load(f)
+        # 5. 쿼리 임베딩 캐시 (반복되는 인사/잡담은 모델을 다시 돌리지 않음)
+        self.query_cache = EmbeddingCache(
+            max_entries=query_cache_size,
+            persist_path=query_cache_path,
+            namespace=f"{os.path.basename(os.path.normpath(model_path))}:{self.backend.name}"
+        )
+        if query_cache_path:
+            atexit.register(self.query_cache.save)
         
-        with open(metadata_file, 'rb') as f:
-            self.metadata = pickle.load(f)
+        # 프롬프트 컨텍스트 패킹 설정 (token_budget / candidates / mmr_lambda / dedup_threshold / max_chunks)
+        self.context_config = dict(context or {})
         
-        print(f"[RAG] 완료: {len(self.chunks)}개 청크")
-    
-    def _mean_pooling(self, model_output, attention_mask):
-        """Mean pooling for embeddings"""
-        token_embeddings = model_output[0]
-        input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-        return torch.sum(token_embeddings * input_mask_expanded, 1) / torch.clamp(input_mask_expanded.sum(1), min=1e-9)
+        # 6. 어휘 인덱스 (BM25 + 로어 이름 사전) → 벡터 검색과 RRF 결합
+        lexical = dict(lexical or {})
+        self.lexical_config = lexical
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.search_stats = {"dense": 0, "hybrid": 0, "fast_path": 0, "filtered": 0}
+        # 임베딩 모델 실행 횟수 (배치 단위, 전체 통계 — 턴별 횟수는 TurnContext.encode_calls)
+        self.encode_calls = 0
+        # 토크나이저(HF fast tokenizer는 스레드 안전하지 않음) / 백엔드 호출은 한 번에 하나씩
+        # (입력 중 미리 계산 스레드와 턴 스레드가 겹칠 수 있음)
+        self._model_lock = threading.Lock()
+        if lexical.get("enabled", True):
+            try:
+                start = time.perf_counter()
+                self.lexical_index = LexicalIndex.from_store(
+                    self.store,
+                    name_fields=lexical.get("name_fields", ("name", "title", "aliases")),
+                    names=load_names_file(lexical.get("names_path"))
+                )
+                print(f"[RAG] 어휘 인덱스 생성 ({(time.perf_counter() - start) * 1000:.0f}ms, "
+                      f"이름 {self.lexical_index.name_count}개)")
+            except Exception as e:
+                print(f"[RAG] ⚠️ 어휘 인덱스 생성 실패 (벡터 검색만 사용): {e}")
+        
+        print(f"[RAG] 완료: {len(self.store)}개 청크 ({self.store.format} 형식)")
     
+    def _encode_batch_raw(self, texts: List[str], batch_size: int = 32, turn=None) -> np.ndarray:
+        """
+        여러 텍스트를 한 번에 벡터로 변환 (캐시 미사용)
+
+        길이순으로 정렬해 묶으므로 배치마다 가장 긴 문장 길이까지만 패딩됩니다.
+        Args:
+            turn: TurnContext (주면 이 턴의 인코딩 횟수에 배치 수를 더함)
+        Returns: [len(texts), dim] float32 (입력 순서 유지)
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        output: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start:start + batch_size]
+            with self._model_lock:
+                encoded_input = self.tokenizer(
+                    [texts[i] for i in batch_ids],
+                    padding='longest',
+                    truncation=True,
+                    max_length=512,
+                    return_tensors='np'
+                )
+
+                # mean pooling + L2 정규화까지 백엔드에서 처리
+                embeddings = self.backend.encode(encoded_input)
+                self.encode_calls += 1
+            if turn is not None:
+                turn.encode_calls += 1
+
+            for row, i in enumerate(batch_ids):
+                output[i] = embeddings[row]
+
+        return np.stack(output)
+
     def _encode_text(self, text: str) -> np.ndarray:
         """텍스트를 벡터로 변환"""
-        encoded_input = self.tokenizer(
-            [text],
-            padding=True,
-            truncation=True,
-            max_length=512,
-            return_tensors='pt'
-        ).to(self.device)
-        
-        with torch.no_grad():
-            model_output = self.model(**encoded_input)
-        
-        embeddings = self._mean_pooling(model_output, encoded_input['attention_mask'])
-        embeddings = F.normalize(embeddings, p=2, dim=1)
-        
-        return embeddings.cpu().numpy().astype('float32')
+        return self._encode_batch_raw([text])
     
-    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float, dict]]:
+    def encode_query(self, text: str, turn=None) -> np.ndarray:
+        """캐시를 거쳐 질문 임베딩 반환 (shape: [1, dim], turn: 인코딩 횟수를 셀 TurnContext)"""
+        return self.encode_batch([text], turn=turn)
+
+    def cached_query(self, text: str) -> Optional[np.ndarray]:
+        """캐시에 이미 있는 질문 임베딩만 반환 (shape: [1, dim], 없으면 None — 모델은 실행하지 않음)"""
+        vec = self.query_cache.peek(normalize_query(text) or text.strip())
+        return None if vec is None else vec[None, :]
+
+    def encode_batch(self, texts: List[str], turn=None) -> np.ndarray:
+        """
+        여러 질문의 임베딩을 한 번에 계산 (캐시 적중분은 건너뜀)
+
+        Returns: [len(texts), dim] float32
+        """
+        keys = [normalize_query(t) or t.strip() for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}  # 키 → 대표 원문 (같은 키는 한 번만 인코딩)
+
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vec = self.query_cache.get(key)
+            if vec is None:
+                missing[key] = text
+            else:
+                vectors[key] = vec
+
+        if missing:
+            encoded = self._encode_batch_raw(list(missing.values()), turn=turn)
+            for key, vec in zip(missing.keys(), encoded):
+                self.query_cache.put(key, vec)
+                vectors[key] = vec
+
+        return np.stack([vectors[key] for key in keys])
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """쿼리 임베딩 캐시 적중/미스 통계"""
+        return self.query_cache.get_stats()
+
+    def get_search_stats(self) -> Dict[str, int]:
+        """검색 경로별 횟수 (dense / hybrid / fast_path)"""
+        return dict(self.search_stats)
+
+    def _collect_hits(self, distances: np.ndarray, indices: np.ndarray) -> List[Tuple[int, float]]:
+        """FAISS 결과 한 줄 → [(행 id, 점수), ...] (빈 칸/삭제 표시 제외)"""
+        return [
+            (int(idx), float(dist))
+            for dist, idx in zip(distances, indices)
+            if 0 <= idx < len(self.store) and idx not in self.store.tombstones
+        ]
+
+    def _to_results(self, hits: List[Tuple[int, float]]) -> List[Tuple[str, float, dict]]:
+        """[(행 id, 점수)] → [(청크 텍스트, 유사도, 메타데이터), ...]"""
+        # 뽑힌 청크만 디코딩 (mmap 형식)
+        return [
+            (self.store.get_chunk(idx), score, self.store.get_metadata(idx))
+            for idx, score in hits
+        ]
+
+    def _get_partition(self, filters: Dict[str, Any]) -> Optional[SearchPartition]:
+        """
+        필터 → 파티션 (처음 쓰일 때 만들고 재사용)
+        필터가 살아 있는 행 전체를 통과시키면 None (전체 인덱스를 그대로 검색, 사본을 만들지 않음)
+        """
+        key = json.dumps(filters, ensure_ascii=False, sort_keys=True, default=str)
+        with self._partition_lock:
+            if key in self._partitions:
+                self._partitions.move_to_end(key)
+                return self._partitions[key]
+
+            rows = self.store.filter_rows(filters)
+            if len(rows) == self._live_rows:
+                # 필드가 없는 청크는 제한 없음으로 보므로 필드를 아무도 안 가지면 여기로 옴
+                partition = None
+            elif self._vectors is not None and len(rows):
+                partition = SearchPartition(rows, index=build_index(self._vectors[rows], rows, "flat"))
+            else:
+                partition = SearchPartition(rows, params=selector_search_params(self.index, rows))
+
+            self._partitions[key] = partition
+            if len(self._partitions) > self.max_partitions:
+                self._partitions.popitem(last=False)
+            return partition
+
+    def _dense_search(self, query_vecs: np.ndarray, k: int, partition: Optional[SearchPartition]):
+        """FAISS 검색 (파티션이 있으면 그 범위 안에서만)"""
+        if partition is None:
+            return self.index.search(query_vecs, k)
+        if partition.index is not None:
+            return partition.index.search(query_vecs, k)
+        return self.index.search(query_vecs, k, params=partition.params)
+
+    def _candidate_count(self, top_k: int) -> int:
+        """결합 전 각 검색기에서 가져올 후보 수"""
+        return max(top_k, int(self.lexical_config.get("candidates", 20)))
+
+    def _fused_hits(self, rankings: List[List[int]], top_k: int) -> List[Tuple[int, float]]:
+        """
+        순위 리스트들을 RRF로 결합
+        점수는 모든 리스트에서 1등일 때 1.0이 되도록 정규화
+        """
+        k = int(self.lexical_config.get("rrf_k", 60))
+        fused = reciprocal_rank_fusion(rankings, k=k)[:top_k]
+        best = len(rankings) / (k + 1)
+        ids = np.array([idx for idx, _ in fused], dtype=np.int64)
+        scores = np.array([score / best for _, score in fused], dtype=np.float32)
+        return self._collect_hits(scores, ids)
+
+    def _lexical_fast_path(
+        self,
+        query: str,
+        top_k: int,
+        partition: Optional[SearchPartition] = None
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        질문이 로어 이름을 확실히 가리키면 임베딩 없이 어휘 검색만으로 결과 반환
+        (이름이 등장하는 청크 수가 적고, 질문에서 이름이 차지하는 비율이 충분할 때)
+        """
+        if not self.lexical_index or not self.lexical_config.get("fast_path", True):
+            return None
+
+        matches = self.lexical_index.match_names(query)
+        if not matches:
+            return None
+
+        rows = sorted({idx for _, name_rows, _ in matches for idx in name_rows})
+        if partition is not None:
+            rows = [idx for idx in rows if idx in partition.row_set]
+            if not rows:
+                return None
+        coverage = max(ratio for _, _, ratio in matches)
+        if len(rows) > int(self.lexical_config.get("fast_path_max_docs", 3)):
+            return None
+        if coverage < float(self.lexical_config.get("fast_path_min_coverage", 0.3)):
+            return None
+
+        ranked = [idx for idx, _ in self.lexical_index.search(query, top_k=len(rows), candidates=rows)]
+        ranked += [idx for idx in rows if idx not in ranked]
+        return self._fused_hits([ranked], top_k)
+
+    def _hybrid_hits(
+        self,
+        query: str,
+        distances: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        partition: Optional[SearchPartition] = None
+    ) -> List[Tuple[int, float]]:
+        """FAISS 결과 한 줄 + BM25 결과 → RRF 결합 (어휘 인덱스가 없으면 벡터 결과 그대로)"""
+        if not self.lexical_index:
+            self.search_stats["dense"] += 1
+            return self._collect_hits(distances[:top_k], indices[:top_k])
+
+        dense = [int(idx) for idx in indices if idx >= 0]
+        candidates = partition.rows.tolist() if partition is not None else None
+        lexical = [idx for idx, _ in self.lexical_index.search(query, top_k=len(indices), candidates=candidates)]
+        if not lexical:
+            self.search_stats["dense"] += 1
+            return self._collect_hits(distances[:top_k], indices[:top_k])
+
+        self.search_stats["hybrid"] += 1
+        return self._fused_hits([dense, lexical], top_k)
+
+    def _search_hits(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+        turn=None
+    ) -> Tuple[List[Tuple[int, float]], Optional[np.ndarray]]:
+        """
+        검색 공통 경로
+
+        Args:
+            turn: TurnContext (있으면 이번 턴에 이미 계산한 질문 임베딩을 재사용)
+        Returns:
+            ([(행 id, 점수), ...], 질문 임베딩 [1, dim] 또는 None(어휘 fast path))
+        """
+        partition = self._get_partition(filters) if filters else None
+        if partition is not None:
+            self.search_stats["filtered"] += 1
+            if not len(partition):
+                return [], None
+
+        fast = self._lexical_fast_path(query, top_k, partition)
+        if fast is not None:
+            self.search_stats["fast_path"] += 1
+            return fast, None
+
+        # 쿼리 임베딩 (턴 컨텍스트 → 캐시 순)
+        if turn is not None and turn.user_input == query:
+            query_vec = turn.query_vector()
+        else:
+            query_vec = self.encode_query(query)
+        
+        # FAISS 검색 (결합용 후보를 넉넉히)
+        k = self._candidate_count(top_k) if self.lexical_index else top_k
+        distances, indices = self._dense_search(query_vec, k, partition)
+        return self._hybrid_hits(query, distances[0], indices[0], top_k, partition), query_vec
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        filters: Optional[Dict[str, Any]] = None,
+        turn=None
+    ) -> List[Tuple[str, float, dict]]:
         """
         질문과 관련된 지식을 검색합니다.
+        (로어 이름이 확실하면 어휘 검색만, 아니면 벡터 + BM25 결합)
         
+        Args:
+            filters: 메타데이터 필터 {필드: 값 또는 값 리스트} (예: {"san": "균열"})
+                     필드가 없는 청크는 공통 지식으로 보고 항상 포함
+            turn: TurnContext (질문 임베딩 공유)
         Returns: [(청크 텍스트, 유사도, 메타데이터), ...]
         """
-        # 쿼리 임베딩
-        query_vec = self._encode_text(query)
-        
-        # FAISS 검색
-        distances, indices = self.index.search(query_vec, top_k)
-        
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < 0 or idx >= len(self.chunks):
-                continue
-                
-            results.append((
-                self.chunks[idx],
-                float(dist),
-                self.metadata[idx]
-            ))
-        
-        return results
+        hits, _ = self._search_hits(query, top_k, filters, turn)
+        return self._to_results(hits)
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[str, float, dict]]]:
+        """
+        여러 질문을 한 번의 인코딩 + 한 번의 FAISS 검색으로 처리합니다.
+        (이름 매칭으로 끝나는 질문은 인코딩에서 제외)
+
+        Returns: 질문별 [(청크 텍스트, 유사도, 메타데이터), ...]
+        """
+        if not queries:
+            return []
+
+        partition = self._get_partition(filters) if filters else None
+        if partition is not None:
+            self.search_stats["filtered"] += len(queries)
+            if not len(partition):
+                return [[] for _ in queries]
+
+        hits: List[Optional[List[Tuple[int, float]]]] = [None] * len(queries)
+        for i, query in enumerate(queries):
+            hits[i] = self._lexical_fast_path(query, top_k, partition)
+            if hits[i] is not None:
+                self.search_stats["fast_path"] += 1
+
+        pending = [i for i, h in enumerate(hits) if h is None]
+        if pending:
+            query_vecs = self.encode_batch([queries[i] for i in pending])
+            k = self._candidate_count(top_k) if self.lexical_index else top_k
+            distances, indices = self._dense_search(query_vecs, k, partition)
+            for row, i in enumerate(pending):
+                hits[i] = self._hybrid_hits(queries[i], distances[row], indices[row], top_k, partition)
+        return [self._to_results(h) for h in hits]
+
+    # =================================================================
+    # 프롬프트용 컨텍스트 (토큰 예산 + MMR 중복 제거)
+    # =================================================================
+    def count_tokens(self, text: str) -> int:
+        """프롬프트 토큰 수 추정 (임베딩 토크나이저 기준, 특수 토큰 제외)"""
+        with self._model_lock:
+            return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _row_vectors(self, rows: List[int]) -> Optional[np.ndarray]:
+        """저장된 청크 임베딩 (vectors.npy 또는 flat 인덱스에서 복원, 둘 다 안 되면 None)"""
+        if self._vectors is not None:
+            return np.asarray(self._vectors[rows], dtype=np.float32)
+        try:
+            return np.stack([self.index.reconstruct(int(row)) for row in rows])
+        except RuntimeError:
+            return None
+
+    def build_context(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+        max_chunks: Optional[int] = None,
+        turn=None
+    ) -> Dict[str, Any]:
+        """
+        검색 → MMR로 중복 제거 → 토큰 예산 안에서 문장 단위로 채움
+
+        Args:
+            turn: TurnContext (같은 조건으로 이미 만든 결과가 있으면 그대로 반환하고,
+                  없으면 턴의 질문 임베딩으로 검색한 뒤 결과를 턴에 저장)
+        Returns:
+            context_packer.pack_context 결과 + {"candidates", "duplicates"}
+            (text가 빈 문자열이면 관련 지식 없음)
+        """
+        cfg = self.context_config
+        token_budget = token_budget or int(cfg.get("token_budget", 600))
+        max_chunks = max_chunks or cfg.get("max_chunks")
+
+        # 같은 턴(같은 입력) 안에서 검색 조건이 같으면 저장된 결과 재사용
+        key = (repr(sorted((filters or {}).items())), token_budget, max_chunks)
+        if turn is not None and turn.user_input != query:
+            turn = None
+        if turn is not None and turn.rag_key == key and turn.rag_report is not None:
+            return turn.rag_report
+
+        hits, _ = self._search_hits(query, int(cfg.get("candidates", 6)), filters, turn)
+        rows = [idx for idx, _ in hits]
+        # 관련도는 검색 점수(코사인 또는 RRF), 중복도는 저장된 청크 임베딩끼리의 코사인 유사도
+        relevance = np.array([score for _, score in hits], dtype=np.float32)
+        doc_vecs = self._row_vectors(rows) if len(rows) > 1 else None
+
+        order, duplicates = mmr_order(
+            relevance,
+            doc_vecs,
+            lambda_=float(cfg.get("mmr_lambda", 0.7)),
+            dedup_threshold=float(cfg.get("dedup_threshold", 0.92))
+        )
+        chunks = [(self.store.get_chunk(idx), self.store.get_metadata(idx)) for idx in rows]
+        report = pack_context(chunks, order, token_budget, self.count_tokens, max_chunks=max_chunks)
+        report.update({"candidates": len(rows), "duplicates": len(duplicates)})
+        if turn is not None:
+            turn.rag_key, turn.rag_report = key, report
+        return report
     
     def format_for_prompt(self, search_results: List[Tuple[str, float, dict]]) -> str:
         """검색 결과를 프롬프트 형식으로 변환"""
@@ -131,6 +515,7 @@ class RAGManager:
         
         formatted = "### 참고 지식:\n"
         for i, (chunk, score, meta) in enumerate(search_results, 1):
-            formatted += f"\n[{i}] (유사도: {score:.3f})\n{chunk}\n"
+            category = f", 분류: {meta['category']}" if meta.get("category") else ""
+            formatted += f"\n[{i}] (유사도: {score:.3f}{category})\n{chunk}\n"
         
         return formatted
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+LLM 응답 시맨틱 캐시
+같은 게임 상태(SAN 단계 / 호감도 단계 / 직전 감정)에서 의미가 거의 같은 입력("안녕", "안녕?")이 오면
+저장해 둔 응답 중 하나를 골라 LLM 호출 없이 바로 돌려줍니다.
+
+- 상태 키가 다르면 절대 재사용하지 않음 (상태별 버킷)
+- 버킷 안에서는 질문 임베딩 코사인 유사도가 threshold 이상인 항목만 적중
+- 항목마다 응답 변형을 여러 개 모아 두고, 변형이 min_variants개 이상 모인 뒤부터 무작위로 사용
+  (직전에 쓴 변형은 가능하면 피함)
+
+MIT License
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def state_key(san_label: str, likability_label: str, last_emotion: str) -> str:
+    return f"{san_label}|{likability_label}|{last_emotion}"
+
+
+class _Entry:
+    """대표 질문 하나 + 응답 변형들"""
+
+    def __init__(self, query: str, vector: np.ndarray):
+        self.query = query
+        self.vector = np.asarray(vector, dtype=np.float32)
+        self.variants: List[str] = []
+        self.last_served: Optional[int] = None
+        self.hits = 0
+
+
+class ResponseCache:
+    """(게임 상태, 질문 임베딩) → 저장된 LLM 응답 (스레드 안전)"""
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        min_variants: int = 2,
+        max_variants: int = 4,
+        max_entries_per_state: int = 64,
+        persist_path: Optional[str] = None
+    ):
+        """
+        Args:
+            threshold: 적중으로 볼 최소 코사인 유사도
+            min_variants: 이만큼 응답이 모여야 캐시에서 제공 (그 전에는 LLM 호출 후 변형 추가)
+            max_variants: 항목당 최대 응답 변형 수
+            max_entries_per_state: 상태 버킷당 최대 항목 수 (LRU)
+            persist_path: 저장 파일 (.json, None이면 메모리에만 보관)
+        """
+        self.threshold = threshold
+        self.min_variants = max(1, min_variants)
+        self.max_variants = max(self.min_variants, max_variants)
+        self.max_entries_per_state = max_entries_per_state
+        self.persist_path = persist_path
+        self._buckets: Dict[str, "OrderedDict[str, _Entry]"] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+
+        if persist_path:
+            self.load()
+
+    def _best_match(self, state: str, vector: np.ndarray) -> Optional[_Entry]:
+        bucket = self._buckets.get(state)
+        if not bucket:
+            return None
+        entries = list(bucket.values())
+        sims = np.stack([e.vector for e in entries]) @ np.asarray(vector, dtype=np.float32).reshape(-1)
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        bucket.move_to_end(entries[best].query)
+        return entries[best]
+
+    def lookup(self, state: str, vector: np.ndarray) -> Optional[str]:
+        """적중 시 응답 변형 하나 (없으면 None)"""
+        with self._lock:
+            self.lookups += 1
+            entry = self._best_match(state, vector)
+            if entry is None or len(entry.variants) < self.min_variants:
+                return None
+
+            choices = [i for i in range(len(entry.variants)) if i != entry.last_served] or [0]
+            pick = random.choice(choices)
+            entry.last_served = pick
+            entry.hits += 1
+            self.hits += 1
+            return entry.variants[pick]
+
+    def store(self, state: str, query: str, vector: np.ndarray, response: str) -> None:
+        """LLM 응답을 변형으로 추가 (비슷한 항목이 없으면 새 항목)"""
+        with self._lock:
+            entry = self._best_match(state, vector)
+            if entry is None:
+                bucket = self._buckets.setdefault(state, OrderedDict())
+                entry = _Entry(query, vector)
+                bucket[query] = entry
+                if len(bucket) > self.max_entries_per_state:
+                    bucket.popitem(last=False)
+
+            if response in entry.variants:
+                return
+            entry.variants.append(response)
+            if len(entry.variants) > self.max_variants:
+                entry.variants.pop(0)
+                entry.last_served = None
+            self.stores += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = sum(len(b) for b in self._buckets.values())
+            servable = sum(
+                1 for b in self._buckets.values() for e in b.values()
+                if len(e.variants) >= self.min_variants
+            )
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "stores": self.stores,
+                "states": len(self._buckets),
+                "entries": entries,
+                "servable_entries": servable,
+            }
+
+    # =================================================================
+    # 디스크 저장 / 복원
+    # =================================================================
+    def load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                for state, items in data.get("states", {}).items():
+                    bucket = self._buckets.setdefault(state, OrderedDict())
+                    for item in items:
+                        entry = _Entry(item["query"], np.array(item["vector"], dtype=np.float32))
+                        entry.variants = list(item["variants"])[-self.max_variants:]
+                        bucket[entry.query] = entry
+            print(f"[ResponseCache] 복원: {sum(len(b) for b in self._buckets.values())}개 항목")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ResponseCache] ⚠️ 캐시 파일 무시 ({e})")
+
+    def save(self) -> None:
+        if not self.persist_path:
+            return
+        with self._lock:
+            data = {
+                "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "states": {
+                    state: [
+                        {"query": e.query, "vector": e.vector.tolist(), "variants": e.variants}
+                        for e in bucket.values()
+                    ]
+                    for state, bucket in self._buckets.items()
+                },
+            }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+            tmp = f"{self.persist_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            print(f"[ResponseCache] ⚠️ 저장 실패: {e}")
@@ -0,0 +1,144 @@
+"""
+롤플레이 응답 스키마 / 검증·복구
+LLM에 네 필드짜리 JSON 출력을 강제하는 스키마(Ollama `format`, Gemini `response_schema`)와,
+그래도 형식이 조금 어긋난 응답을 버리지 않고 고쳐 쓰는 검증기.
+
+복구 범위:
+- 코드 블록(```json), 앞뒤 사족 제거
+- 끝에 붙은 쉼표 제거
+- 중간에 끊긴 응답은 완성된 필드까지만 사용 (JsonFieldStreamParser)
+- 누락 필드는 빈 값, 목록에 없는 감정은 가까운 감정 또는 "평온"
+- (allow_plain_text) JSON이 아예 없으면 원문 전체를 대사로 사용
+
+MIT License
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_stream import JsonFieldStreamParser
+
+# 출력 순서 = 스트리밍으로 화면에 나가는 순서 (행동 → 대사)
+ROLEPLAY_FIELDS = ("new_emotion", "action_pre", "dialogue", "action_post")
+
+# Character.OUTPUT_FORMAT의 감정 목록
+EMOTIONS = ("흥미", "만족", "탐닉", "당혹", "불안", "짜증", "혐오", "공포", "분노", "슬픔")
+DEFAULT_EMOTION = "평온"
+# 게임 쪽(호감도 계산, 초상화 매핑)과 로컬 대체 응답에서 쓰는 감정까지 포함한 허용 목록
+KNOWN_EMOTIONS = EMOTIONS + ("평온", "기쁨", "친밀감", "안도", "흥분", "경계", "우울", "애착", "무표정", "고통")
+
+# Ollama `format` (JSON Schema, 속성 순서대로 생성됨)
+ROLEPLAY_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "new_emotion": {"type": "string", "enum": list(EMOTIONS)},
+        "action_pre": {"type": "string"},
+        "dialogue": {"type": "string"},
+        "action_post": {"type": "string"},
+    },
+    "required": list(ROLEPLAY_FIELDS),
+}
+
+# Gemini `response_schema` (OpenAPI 부분집합, enum은 format=enum 필요)
+GEMINI_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "new_emotion": {"type": "string", "format": "enum", "enum": list(EMOTIONS)},
+        "action_pre": {"type": "string"},
+        "dialogue": {"type": "string"},
+        "action_post": {"type": "string"},
+    },
+    "required": list(ROLEPLAY_FIELDS),
+}
+
+_CODE_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _load_object(text: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """원문에서 최상위 JSON 객체 추출 (필요하면 고쳐서)"""
+    repairs: List[str] = []
+    start = text.find("{")
+    if start < 0:
+        return None, repairs
+    end = text.rfind("}")
+    if start > 0 or (end >= 0 and text[end + 1:].strip()):
+        repairs.append("extra_text")
+
+    if end > start:
+        candidate = text[start:end + 1]
+        try:
+            data = json.loads(candidate)
+            return (data if isinstance(data, dict) else None), repairs
+        except json.JSONDecodeError:
+            fixed = _TRAILING_COMMA.sub(r"\1", candidate)
+            if fixed != candidate:
+                try:
+                    data = json.loads(fixed)
+                    repairs.append("trailing_comma")
+                    return (data if isinstance(data, dict) else None), repairs
+                except json.JSONDecodeError:
+                    pass
+
+    # 닫히지 않았거나 깨진 객체 → 완성된 필드만 회수
+    parser = JsonFieldStreamParser()
+    parser.feed(text[start:])
+    if parser.fields:
+        repairs.append("truncated")
+        return dict(parser.fields), repairs
+    return None, repairs
+
+
+def _normalize_emotion(value: Any) -> Tuple[str, bool]:
+    emotion = str(value or "").strip()
+    if emotion in KNOWN_EMOTIONS:
+        return emotion, False
+    for candidate in KNOWN_EMOTIONS:
+        if candidate in emotion:
+            # "불안 (Anxious)" 처럼 설명이 붙은 경우
+            return candidate, True
+    return DEFAULT_EMOTION, True
+
+
+def parse_roleplay_reply(text: str, allow_plain_text: bool = False) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    롤플레이 응답 검증 + 복구
+
+    Args:
+        allow_plain_text: JSON이 없을 때 원문을 대사로 쓸지 (화면 표시용, 캐시/헤징 판정에는 사용 안 함)
+
+    Returns:
+        (네 필드가 모두 채워진 dict 또는 None, 적용한 복구 목록)
+        대사가 비어 있으면 None
+    """
+    text = (text or "").strip()
+    if "```" in text:
+        text = _CODE_FENCE.sub("", text).strip()
+
+    data, repairs = _load_object(text)
+    if data is None:
+        if not allow_plain_text or not text:
+            return None, repairs
+        data = {"dialogue": text}
+        repairs.append("plain_text")
+
+    reply: Dict[str, Any] = {}
+    for field in ROLEPLAY_FIELDS:
+        value = data.get(field)
+        if value is None:
+            if field != "new_emotion":
+                repairs.append(f"missing_{field}")
+            value = ""
+        elif not isinstance(value, str):
+            repairs.append(f"type_{field}")
+            value = json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+        reply[field] = value.strip()
+
+    reply["new_emotion"], changed = _normalize_emotion(data.get("new_emotion"))
+    if changed:
+        repairs.append("emotion")
+
+    if not reply["dialogue"]:
+        return None, repairs
+    return reply, repairs
@@ -1,5 +1,5 @@
 """
-STT(음성 인식) 매니저 - 비동기 지원 버전
+STT(음성 인식) 매니저 - 작업 스레드에서 호출하는 동기 버전 (취소 지원)
 OpenAI Whisper를 통한 음성 입력 처리
 
 MIT License
@@ -29,10 +29,9 @@ class SttManager:
         self.model = None
         self._temp_audio_path = "temp_audio.wav"
         
-        # 비동기 처리를 위한 상태 변수
+        # 작업 스레드에서 갱신하는 상태 변수
         self.is_processing = False   # 현재 녹음/변환 중인지
         self.status_message = ""     # 현재 상태 메시지 (UI 표시용)
-        self._result_text: Optional[str] = None # 변환 완료된 텍스트
 
         if self.enabled:
             # 모델 로딩도 오래 걸리므로 스레드로 처리 가능하지만, 
@@ -55,36 +54,30 @@ class SttManager:
             print(f"[SttManager] ❌ 모델 로드 실패: {e}")
             self.enabled = False
 
-    def start_listening(self, record_seconds: Optional[int] = None) -> None:
+    def listen(self, record_seconds: Optional[int] = None, cancel: Optional[threading.Event] = None) -> str:
         """
-        [비동기] 녹음 및 변환 작업 시작
-        이 함수는 즉시 반환되며, 작업은 백그라운드 스레드에서 실행됩니다.
-        결과는 check_result()를 통해 확인해야 합니다.
+        [동기] 녹음 + 변환 후 텍스트 반환 (턴 파이프라인의 작업 스레드에서 호출)
+
+        Args:
+            cancel: 녹음 중 set되면 녹음을 멈추고 빈 문자열 반환
+        Returns:
+            인식된 텍스트 (비활성화 / 실패 / 취소 시 빈 문자열)
         """
         if not self.enabled or not self.model:
             print("[SttManager] STT 비활성화 상태")
-            return
-
-        if self.is_processing:
-            print("[SttManager] 이미 작업 중입니다.")
-            return
+            return ""
 
         self.is_processing = True
-        self._result_text = None
-        self.status_message = "Listening..."
-        
-        seconds = record_seconds or self.record_seconds
-
-        # 데몬 스레드로 실행 (메인 프로그램 종료 시 같이 종료됨)
-        thread = threading.Thread(
-            target=self._listening_task, 
-            args=(seconds,),
-            daemon=True
-        )
-        thread.start()
+        try:
+            return self._record_and_transcribe(record_seconds or self.record_seconds, cancel)
+        except Exception as e:
+            print(f"[SttManager] ❌ 작업 오류: {e}")
+            return ""
+        finally:
+            self.is_processing = False
+            self.status_message = ""
 
-    def _listening_task(self, seconds: int):
-        """백그라운드 스레드에서 실행되는 실제 작업"""
+    def _record_and_transcribe(self, seconds: int, cancel: Optional[threading.Event] = None) -> str:
         try:
             # 1. 녹음
             print(f"[SttManager] 🎤 녹음 시작 ({seconds}s)...")
@@ -99,6 +92,11 @@ class SttManager:
                 channels=1,
                 dtype=np.float32
             )
+            if cancel is not None and cancel.wait(seconds):
+                # 녹음 도중 취소 (끼어들기 등)
+                sd.stop()
+                print("[SttManager] 녹음 취소")
+                return ""
             sd.wait() # 녹음 완료 대기
             
             # 2. 파일 저장
@@ -115,38 +113,13 @@ class SttManager:
             
             text = result.get("text", "").strip()
             print(f"[SttManager] ✅ 인식 결과: {text}")
-            
-            # 결과 저장
-            self._result_text = text
-
-        except Exception as e:
-            print(f"[SttManager] ❌ 스레드 작업 오류: {e}")
-            self._result_text = "" # 오류 시 빈 문자열
+            return text
         finally:
             # 4. 정리
             try:
                 Path(self._temp_audio_path).unlink()
             except:
                 pass
-            
-            self.is_processing = False
-            self.status_message = ""
-
-    def check_result(self) -> Optional[str]:
-        """
-        [메인 루프용] 작업 완료 여부 확인 및 결과 반환
-        
-        Returns:
-            str: 인식된 텍스트 (작업 완료 시)
-            None: 아직 작업 중이거나 결과가 없을 때
-        """
-        # 작업은 끝났는데 결과가 있다면 반환하고 초기화
-        if not self.is_processing and self._result_text is not None:
-            result = self._result_text
-            self._result_text = None # 한 번 읽으면 초기화
-            return result
-        
-        return None
 
     def get_status(self) -> str:
         """현재 상태 메시지 반환 (UI 표시용)"""
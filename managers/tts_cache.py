@@ -0,0 +1,149 @@
+"""
+TTS 디스크 캐시
+합성 조건(텍스트, 참조 음성, 언어, 합성 파라미터)의 해시를 키로 WAV를 저장하고,
+용량 한도를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다 (LRU).
+
+MIT License
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+INDEX_FILE = "index.json"
+
+
+class TtsCache:
+    """내용 주소 기반 WAV 캐시 (index.json + <해시>.wav)"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 캐시 디렉토리
+            max_bytes: 캐시 최대 용량 (바이트)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # key → {"size": int, "last_access": float}, 오래된 순서 유지
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._dirty_reads = 0  # 인덱스에 아직 반영 안 된 접근 수
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        print(f"[TtsCache] 로드 완료: {len(self._entries)}개, {self.bytes_used / 1024 / 1024:.1f}MB / {self.max_bytes / 1024 / 1024:.0f}MB")
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """합성 조건 → 캐시 키 (정렬된 JSON의 SHA-256)"""
+        raw = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def _load_index(self) -> None:
+        index_path = self.cache_dir / INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[TtsCache] ⚠️ 인덱스 손상, 비운 상태로 시작: {e}")
+            return
+
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1].get("last_access", 0)):
+            # 인덱스에는 있지만 파일이 사라진 항목은 버림
+            if self._path(key).exists():
+                self._entries[key] = entry
+                self.bytes_used += entry.get("size", 0)
+
+    def _save_index(self) -> None:
+        index_path = self.cache_dir / INDEX_FILE
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self._entries}, f)
+        os.replace(tmp_path, index_path)
+        self._dirty_reads = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시 조회 (적중 시 WAV 바이트, 없으면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                data = self._path(key).read_bytes()
+            except OSError:
+                # 외부에서 파일이 지워진 경우
+                self.bytes_used -= entry.get("size", 0)
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            entry["last_access"] = time.time()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._dirty_reads += 1
+            if self._dirty_reads >= 20:
+                self._save_index()
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """WAV 저장 후 용량 초과분 LRU 제거"""
+        size = len(data)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            try:
+                self._path(key).write_bytes(data)
+            except OSError as e:
+                print(f"[TtsCache] ❌ 저장 실패: {e}")
+                return
+
+            old = self._entries.pop(key, None)
+            if old:
+                self.bytes_used -= old.get("size", 0)
+            self._entries[key] = {"size": size, "last_access": time.time()}
+            self.bytes_used += size
+
+            while self.bytes_used > self.max_bytes and self._entries:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self.bytes_used -= old_entry.get("size", 0)
+                try:
+                    self._path(old_key).unlink()
+                except OSError:
+                    pass
+
+            self._save_index()
+
+    def flush(self) -> None:
+        """마지막 접근 기록을 인덱스에 반영"""
+        with self._lock:
+            if self._dirty_reads:
+                self._save_index()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """적중률 및 사용 용량"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_used": self.bytes_used,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,123 @@
+"""
+문장 단위 TTS 파이프라인
+대사를 문장/절 단위로 나눠 여러 합성 요청을 동시에 진행하고,
+앞 문장이 재생되는 동안 다음 문장을 합성합니다.
+
+MIT License
+"""
+
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# 문장 = 종결부호(마침표/물음표/느낌표/말줄임표/물결) + 닫는 따옴표·괄호까지, 줄바꿈은 항상 경계
+_SENTENCE = re.compile(r'[^.!?…~。！？\n]+(?:[.!?…~。！？]+["\'”’)\]]*)?|[.!?…~。！？]+')
+# 너무 긴 문장은 쉼표 기준으로 절 분할
+_CLAUSE_END = re.compile(r'(?<=[,，、])\s+')
+
+
+def split_sentences(text: str, min_chars: int = 6, max_chars: int = 60) -> List[str]:
+    """
+    대사를 합성 단위(문장/절)로 분할
+
+    Args:
+        text: 원본 대사
+        min_chars: 이보다 짧은 조각은 앞 조각에 붙임 ("아하하." 같은 짧은 웃음 처리)
+        max_chars: 이보다 긴 문장은 쉼표 기준으로 한 번 더 분할
+
+    Returns:
+        공백이 정리된 조각 리스트 (원문 순서 유지)
+    """
+    pieces: List[str] = []
+    for sentence in _SENTENCE.findall(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) > max_chars:
+            pieces.extend(p.strip() for p in _CLAUSE_END.split(sentence) if p.strip())
+        else:
+            pieces.append(sentence)
+
+    merged: List[str] = []
+    for piece in pieces:
+        if merged and (len(piece) < min_chars or len(merged[-1]) < min_chars):
+            merged[-1] = f"{merged[-1]} {piece}"
+        else:
+            merged.append(piece)
+    return merged
+
+
+class TtsPipeline:
+    """분할된 대사의 합성 작업 묶음 (순서 보장 재생용)"""
+
+    def __init__(
+        self,
+        segments: List[str],
+        synthesize_fn: Callable[[int, str], Optional[Any]],
+        max_in_flight: int = 2
+    ):
+        """
+        Args:
+            segments: split_sentences 결과
+            synthesize_fn: (조각 번호, 텍스트) → 재생 가능한 결과 (실패 시 None)
+            max_in_flight: 동시에 진행할 합성 요청 수
+        """
+        self.segments = segments
+        self._cursor = 0  # 다음에 재생할 조각 번호
+        self._cancelled = False
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, max_in_flight),
+            thread_name_prefix="tts-pipeline"
+        )
+        # 순서대로 제출 → 앞 문장이 항상 먼저 합성 슬롯을 얻음
+        self._futures: List[Future] = [
+            executor.submit(self._run, synthesize_fn, i, seg)
+            for i, seg in enumerate(segments)
+        ]
+        executor.shutdown(wait=False)
+
+    def _run(self, synthesize_fn: Callable[[int, str], Optional[Any]], index: int, text: str) -> Optional[Any]:
+        if self._cancelled:
+            return None
+        try:
+            return synthesize_fn(index, text)
+        except Exception as e:
+            print(f"[TtsPipeline] ❌ 조각 {index} 합성 오류: {e}")
+            return None
+
+    def wait_first(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """첫 조각 합성이 끝날 때까지 대기 (첫 음성까지의 지연 = 한 문장 합성 시간)"""
+        if not self._futures:
+            return None
+        try:
+            return self._futures[0].result(timeout=timeout)
+        except Exception:
+            return None
+
+    def pop_ready(self) -> Optional[Any]:
+        """
+        다음 순서의 조각이 준비되었으면 꺼냄
+        (실패한 조각은 건너뜀, 아직 합성 중이면 None)
+        """
+        while self._cursor < len(self._futures):
+            future = self._futures[self._cursor]
+            if not future.done():
+                return None
+            self._cursor += 1
+            if future.cancelled():
+                continue
+            result = future.result()
+            if result is not None:
+                return result
+        return None
+
+    def is_exhausted(self) -> bool:
+        """모든 조각을 꺼냈는지 여부"""
+        return self._cursor >= len(self._futures)
+
+    def cancel(self) -> None:
+        """아직 시작되지 않은 합성 요청 취소"""
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
@@ -0,0 +1,89 @@
+"""
+턴 컨텍스트
+한 턴 동안 사용자 입력의 임베딩과 RAG 검색 결과를 한 곳에 두고
+응답 캐시 조회 / 프롬프트 조립 등 필요한 곳에서 같이 씁니다.
+(입력 임베딩은 턴당 최대 1회만 계산, 로어 이름 fast path 턴은 0회)
+
+MIT License
+"""
+
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_turn_ids = itertools.count(1)
+
+
+class TurnContext:
+    """사용자 입력 하나에 대한 턴 단위 공유 상태"""
+
+    def __init__(self, user_input: str, rag_manager=None):
+        self.turn_id = next(_turn_ids)
+        self.user_input = user_input
+        self.rag_manager = rag_manager
+        self.started = time.perf_counter()
+
+        self.query_vec: Optional[np.ndarray] = None   # [1, dim]
+        self.rag_report: Optional[Dict[str, Any]] = None
+        self.rag_key: Optional[Any] = None             # rag_report를 만든 검색 조건 (필터, 예산)
+        self.vector_reuses = 0
+        # 이번 턴의 입력으로 임베딩 모델을 실행한 횟수 (배치 단위, RAGManager가 직접 더함)
+        # 다른 스레드(미리 계산 / 헤징 등)의 인코딩은 섞이지 않음
+        self.encode_calls = 0
+
+        # 입력 중 미리 계산한 턴 (TurnPrefetcher)
+        self.speculative = False
+        self.san_hits: Optional[List[Tuple[str, float]]] = None  # scan_san_keywords 결과
+        self.prefetched_encodes = 0
+
+    def query_vector(self) -> Optional[np.ndarray]:
+        """입력 임베딩 (처음 요청될 때 한 번만 계산, RAG가 없으면 None)"""
+        if self.query_vec is not None:
+            self.vector_reuses += 1
+            return self.query_vec
+        if self.rag_manager is None:
+            return None
+        self.query_vec = self.rag_manager.encode_query(self.user_input, turn=self)
+        return self.query_vec
+
+    def known_vector(self) -> Optional[np.ndarray]:
+        """이미 있는 입력 임베딩만 반환 (이번 턴에 계산했거나 임베딩 캐시에 있으면, 없으면 None — 인코딩하지 않음)"""
+        if self.query_vec is None and self.rag_manager is not None:
+            self.query_vec = self.rag_manager.cached_query(self.user_input)
+            return self.query_vec
+        if self.query_vec is not None:
+            self.vector_reuses += 1
+        return self.query_vec
+
+    def begin(self, user_input: Optional[str] = None) -> None:
+        """
+        미리 계산해 둔 턴을 실제 턴으로 시작 (입력 확정 시점부터 시간 / 인코딩 수를 다시 셈)
+
+        Args:
+            user_input: 미리 계산한 입력과 조금 다른 최종 입력 (임베딩 / 검색 결과는 그대로 쓰고 SAN은 다시 검사)
+        """
+        if user_input is not None and user_input != self.user_input:
+            self.user_input = user_input
+            self.san_hits = None
+        self.prefetched_encodes = self.encode_calls
+        self.encode_calls = 0
+        self.started = time.perf_counter()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "turn": self.turn_id,
+            "encode_calls": self.encode_calls,
+            "vector_reuses": self.vector_reuses,
+            "prefetched_encodes": self.prefetched_encodes,
+            "speculative": self.speculative,
+            "elapsed_ms": (time.perf_counter() - self.started) * 1000,
+        }
+
+    def log(self) -> None:
+        stats = self.summary()
+        warn = " ⚠️ 중복 인코딩" if stats["encode_calls"] + stats["prefetched_encodes"] > 1 else ""
+        prefetched = f", 입력 중 {stats['prefetched_encodes']}회" if stats["speculative"] else ""
+        print(f"[Turn] #{stats['turn']} 인코딩 {stats['encode_calls']}회{prefetched} "
+              f"(임베딩 재사용 {stats['vector_reuses']}회, {stats['elapsed_ms']:.0f}ms){warn}")
@@ -0,0 +1,264 @@
+"""
+턴 파이프라인
+한 턴(STT → SAN → RAG → LLM → TTS → 화면 표시)을 명시적인 단계 목록으로 실행합니다.
+
+- 단계는 워커 스레드의 asyncio 이벤트 루프에서 순서대로 실행 (무거운 작업은 run_blocking으로 작업 스레드에 위임)
+- 단계마다 기한(deadline): 넘기면 해당 단계를 건너뛰고(required=False) 다음 단계로, 필수 단계면 턴 종료
+- 턴 전체 취소 가능: 새 턴을 시작하면 이전 턴을 취소 (끼어들기)
+  취소되면 진행 중인 단계의 cancel 이벤트가 set되어 LLM 스트림 / 녹음 등이 바로 멈춤
+- 화면(pygame)은 메인 스레드 전용 → 단계는 post / on_main으로 완료 알림 채널(CompletionChannel)에
+  작업을 넘기고, 메인 루프가 채널을 drain할 때 실행 (취소된 턴의 작업은 버림)
+
+MIT License
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .completion_channel import CompletionChannel
+
+
+class Stage:
+    """파이프라인 단계 하나"""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[["TurnTask"], Awaitable[Optional[bool]]],
+        deadline: Optional[float] = None,
+        required: bool = True,
+        when: Optional[Callable[["TurnTask"], bool]] = None
+    ):
+        """
+        Args:
+            run: async (task) → False를 반환하면 턴을 여기서 끝냄 (예: 음성 인식 실패)
+            deadline: 기한 (초, None이면 무제한)
+            required: False면 기한을 넘겨도 턴을 계속 진행 (다음 단계가 빠진 결과를 처리)
+            when: 이 단계를 실행할지 (None이면 항상)
+        """
+        self.name = name
+        self.run = run
+        self.deadline = deadline
+        self.required = required
+        self.when = when
+
+
+class TurnTask:
+    """진행 중인 턴 하나 (단계 간 값은 data에 저장)"""
+
+    def __init__(self, pipeline: "TurnPipeline", turn_id: int, user_input: Optional[str]):
+        self.pipeline = pipeline
+        self.turn_id = turn_id
+        self.user_input = user_input  # 음성 턴은 STT 단계에서 채움
+        self.data: Dict[str, Any] = {}
+        self.stage: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.skipped: List[str] = []
+        self.cancelled = False
+        self.done = False
+        self.started = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def post(self, fn: Callable[..., Any], *args: Any) -> None:
+        """메인 스레드에서 실행할 작업 (결과를 기다리지 않음, 어느 스레드에서나 호출 가능)"""
+        self.pipeline.channel.post(self.pipeline._deliver, self, fn, args, None)
+
+    async def on_main(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """메인 스레드에서 실행하고 결과를 기다림 (단계 코루틴에서 호출)"""
+        future: Future = Future()
+        self.pipeline.channel.post(self.pipeline._deliver, self, fn, args, future)
+        return await asyncio.wrap_future(future)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "turn": self.turn_id,
+            "timings_ms": {name: round(t * 1000) for name, t in self.timings.items()},
+            "skipped": list(self.skipped),
+            "cancelled": self.cancelled,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000),
+        }
+
+
+class TurnPipeline:
+    """단계 목록 + 워커 이벤트 루프 (한 번에 한 턴, 새 턴은 이전 턴을 취소)"""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        channel: CompletionChannel,
+        on_finish: Optional[Callable[[TurnTask], None]] = None
+    ):
+        """
+        Args:
+            channel: 메인 스레드 작업을 넘길 완료 알림 채널
+            on_finish: 턴이 끝나면(완료 / 취소 / 오류) 메인 스레드에서 호출 (취소된 턴도 항상 호출)
+        """
+        self.stages = stages
+        self.on_finish = on_finish
+        self.channel = channel
+        self.current: Optional[TurnTask] = None
+        self._ids = itertools.count(1)
+        self.stats: Dict[str, int] = {"turns": 0, "completed": 0, "cancelled": 0, "timeouts": 0, "errors": 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="turn-pipeline", daemon=True)
+        self._thread.start()
+
+    # =================================================================
+    # 메인 스레드 API
+    # =================================================================
+    @property
+    def active(self) -> bool:
+        task = self.current
+        return task is not None and not task.done
+
+    @property
+    def stage(self) -> Optional[str]:
+        """현재 턴이 실행 중인 단계 이름 (없으면 None)"""
+        task = self.current
+        return task.stage if task is not None and not task.done else None
+
+    def start(self, user_input: Optional[str] = None) -> TurnTask:
+        """새 턴 시작 (진행 중인 턴은 취소)"""
+        self.cancel()
+        task = TurnTask(self, next(self._ids), user_input)
+        self.current = task
+        self.stats["turns"] += 1
+        asyncio.run_coroutine_threadsafe(self._start(task), self._loop)
+        return task
+
+    def cancel(self) -> bool:
+        """진행 중인 턴 취소 (취소할 턴이 있었으면 True)"""
+        task = self.current
+        if task is None or task.done or task.cancelled:
+            return False
+        task.cancelled = True
+        print(f"[Turn] #{task.turn_id} 취소 요청 (단계: {task.stage})")
+        self._loop.call_soon_threadsafe(self._cancel_task, task)
+        return True
+
+    def _deliver(
+        self,
+        task: TurnTask,
+        fn: Callable[..., Any],
+        args: tuple,
+        future: Optional[Future]
+    ) -> None:
+        """채널에서 꺼낸 턴 작업 실행 (메인 스레드)"""
+        if task.cancelled and fn != self._finish:
+            # 취소된 턴의 화면 작업은 버림
+            if future is not None:
+                future.cancel()
+            return
+        try:
+            result = fn(*args)
+        except Exception as e:
+            print(f"[Turn] ⚠️ 메인 스레드 작업 오류 ({getattr(fn, '__name__', fn)}): {e}")
+            if future is not None and not future.cancelled():
+                future.set_exception(e)
+        else:
+            if future is not None and not future.cancelled():
+                future.set_result(result)
+
+    def close(self) -> None:
+        self.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    # =================================================================
+    # 워커 루프
+    # =================================================================
+    async def _start(self, task: TurnTask) -> None:
+        task._task = asyncio.current_task()
+        if task.cancelled:
+            task._task.cancel()
+        await self._run(task)
+
+    @staticmethod
+    def _cancel_task(task: TurnTask) -> None:
+        if task._task is not None:
+            task._task.cancel()
+
+    async def _run(self, task: TurnTask) -> None:
+        try:
+            for stage in self.stages:
+                if stage.when is not None and not stage.when(task):
+                    continue
+                task.stage = stage.name
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(stage.run(task), stage.deadline)
+                except asyncio.TimeoutError:
+                    self.stats["timeouts"] += 1
+                    task.skipped.append(stage.name)
+                    print(f"[Turn] #{task.turn_id} ⚠️ {stage.name} 단계 기한 초과 ({stage.deadline}s)"
+                          f"{'' if stage.required else ' → 건너뜀'}")
+                    if stage.required:
+                        return
+                    result = None
+                finally:
+                    task.timings[stage.name] = time.perf_counter() - started
+                if result is False:
+                    return
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            task.cancelled = True
+            self.stats["cancelled"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[Turn] #{task.turn_id} ❌ {task.stage} 단계 오류: {e}")
+        finally:
+            task.stage = None
+            task.done = True
+            timings = ", ".join(f"{name} {t * 1000:.0f}ms" for name, t in task.timings.items())
+            state = "취소" if task.cancelled else "완료"
+            print(f"[Turn] #{task.turn_id} {state} ({timings})")
+            self.channel.post(self._deliver, task, self._finish, (task,), None)
+
+    def _finish(self, task: TurnTask) -> None:
+        if self.on_finish is not None:
+            self.on_finish(task)
+
+    async def run_blocking(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        cancel: Optional[threading.Event] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        블로킹 함수를 작업 스레드(데몬)에서 실행하고 결과를 기다림
+
+        Args:
+            cancel: 주면 fn에 cancel=으로 넘기고, 기다리던 단계가 취소 / 기한 초과되면 set
+        """
+        if cancel is not None:
+            kwargs["cancel"] = cancel
+        try:
+            return await asyncio.wrap_future(self.spawn(fn, *args, **kwargs))
+        except asyncio.CancelledError:
+            if cancel is not None:
+                cancel.set()
+            raise
+
+    @staticmethod
+    def spawn(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """데몬 스레드에서 fn 실행 (종료 시 기다리지 않음)"""
+        future: Future = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
@@ -0,0 +1,161 @@
+"""
+입력 중 턴 미리 계산
+플레이어가 입력창에 글을 쓰는 동안, 입력이 debounce_s 이상 멈추면
+SAN 키워드 검사 + 입력 임베딩 + RAG 컨텍스트를 백그라운드에서 미리 계산해 둡니다.
+전송한 최종 입력이 같거나 충분히 비슷하면 그 결과(TurnContext)를 그대로 이어 씁니다.
+
+- 한 번에 하나만 계산 (계산 중에 입력이 또 바뀌면 끝난 뒤 최신 입력으로 다시 계산)
+- "비슷함": 정규화(구두점/공백/대소문자 무시) 결과가 같거나 rapidfuzz ratio >= similarity
+  (미리 검사한 SAN 키워드는 RAG 필터용 SAN 단계 예상에만 사용, 실제 SAN 감소는 최종 입력으로 검사)
+- SAN 단계가 바뀌어 RAG 필터가 달라지면 임베딩만 재사용하고 검색은 다시 수행
+- 최종 입력과 다르면 계산 중인 작업을 취소 (인코딩 / 검색 사이마다 확인, 턴의 인코딩과 겹치지 않게)
+
+MIT License
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from rapidfuzz import fuzz
+
+from .embedding_cache import normalize_query
+from .turn_context import TurnContext
+
+
+class _Job:
+    __slots__ = ("text", "future", "cancelled")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.future: Optional[Future] = None
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()  # 아직 시작 전이면 실행하지 않음
+
+
+class TurnPrefetcher:
+    """입력창 내용 → (멈추면) 백그라운드에서 턴 컨텍스트 미리 계산"""
+
+    def __init__(
+        self,
+        game_system,
+        character=None,
+        rag_manager=None,
+        debounce_s: float = 0.6,
+        min_chars: int = 4,
+        similarity: int = 95
+    ):
+        """
+        Args:
+            character: RAG 컨텍스트를 프롬프트와 같은 조건(필터, 토큰 예산)으로 만들기 위해 사용
+            debounce_s: 입력이 이 시간 동안 그대로면 계산 시작
+            min_chars: 이보다 짧은 입력은 계산하지 않음
+            similarity: 최종 입력과 이 값(0~100) 이상 비슷하면 결과 재사용
+        """
+        self.game_system = game_system
+        self.character = character
+        self.rag_manager = rag_manager
+        self.debounce_s = debounce_s
+        self.min_chars = min_chars
+        self.similarity = similarity
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="turn-prefetch")
+        self._lock = threading.Lock()
+        self._text = ""
+        self._changed_at = 0.0
+        self._job: Optional[_Job] = None
+        self.stats: Dict[str, int] = {"started": 0, "hits": 0, "near_hits": 0, "misses": 0, "failed": 0}
+
+    def on_text(self, text: str, now: Optional[float] = None) -> None:
+        """입력창 내용 전달 (매 프레임 호출해도 됨)"""
+        text = text.strip()
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if text != self._text:
+                self._text, self._changed_at = text, now
+                return
+            if len(text) < self.min_chars or now - self._changed_at < self.debounce_s:
+                return
+            job = self._job
+            if job is not None and (job.text == text or not job.future.done()):
+                return
+            job = _Job(text)
+            job.future = self._executor.submit(self._compute, job)
+            self._job = job
+            self.stats["started"] += 1
+
+    def _compute(self, job: _Job) -> TurnContext:
+        """SAN 키워드 검사 → 예상 SAN 단계로 RAG 컨텍스트 (게임 상태는 바꾸지 않음, 취소되면 중간에 멈춤)"""
+        text = job.text
+        turn = TurnContext(text, self.rag_manager)
+        turn.speculative = True
+        turn.san_hits = self.game_system.scan_san_keywords(text)
+
+        if self.rag_manager is not None and not job.cancelled.is_set():
+            san = self.game_system.san_after_scan(turn.san_hits)
+            san_label = self.game_system.get_san_label(san)
+            # 임베딩을 먼저 (취소되면 검색은 건너뜀)
+            turn.query_vector()
+            if self.character is not None and not job.cancelled.is_set():
+                self.character.build_rag_context(text, san_label, turn)
+        return turn
+
+    def _matches(self, prepared: str, final: str) -> Optional[bool]:
+        """같으면 True, 비슷하면 False, 다르면 None"""
+        if prepared == final:
+            return True
+        if normalize_query(prepared) == normalize_query(final):
+            return False
+        if fuzz.ratio(prepared, final) >= self.similarity:
+            return False
+        return None
+
+    def take(self, user_input: str) -> Optional[TurnContext]:
+        """
+        최종 입력에 맞는 미리 계산한 턴 (없거나 다르면 None)
+        계산 중이면 끝날 때까지 기다림 (처음부터 다시 계산하는 것보다 빠름)
+        """
+        user_input = user_input.strip()
+        with self._lock:
+            job, self._job = self._job, None
+            self._text = ""
+        if job is None:
+            return None
+
+        exact = self._matches(job.text, user_input)
+        if exact is None:
+            # 다른 입력으로 계산 중인 작업은 멈춤 (턴의 인코딩과 모델을 두고 경합하지 않게)
+            job.cancel()
+            self.stats["misses"] += 1
+            return None
+        try:
+            turn = job.future.result()
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"[Prefetch] ⚠️ 미리 계산 실패: {e}")
+            return None
+
+        self.stats["hits" if exact else "near_hits"] += 1
+        turn.begin(user_input)
+        print(f"[Prefetch] 입력 중 계산 결과 사용 ({'일치' if exact else '유사'}: \"{job.text}\")")
+        return turn
+
+    def cancel(self) -> None:
+        """대기 중인 결과 폐기 (계산 중인 작업은 끝까지 돌고 버려짐)"""
+        with self._lock:
+            job, self._job = self._job, None
+            self._text = ""
+        if job is not None:
+            job.cancel()
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
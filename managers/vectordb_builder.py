@@ -0,0 +1,459 @@
+"""
+벡터DB 빌더
+세계관(로어) 문서를 청크로 나누고, RAGManager와 같은 KURE 모델/mean pooling으로
+배치 임베딩(멀티 프로세스)한 뒤 mmap 형식 벡터DB로 저장합니다.
+증분 모드는 내용 해시가 바뀐 청크만 임베딩해 추가하고, 사라진 청크는 삭제 표시 후 나중에 압축합니다.
+
+MIT License
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from multiprocessing import Pool, cpu_count
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .embedding_backends import create_backend, load_tokenizer
+from .faiss_index import build_index, describe_index, resolve_params
+from .vectordb_store import (
+    INDEX_FILE, MANIFEST_FILE, MmapChunkStore, append_mmap_store, detect_format,
+    load_hashes, load_tombstones, load_vectors, read_index, save_tombstones, write_mmap_store
+)
+
+SOURCE_EXTENSIONS = (".txt", ".md")
+_FRONT_MATTER = re.compile(r"\A---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+
+
+# =================================================================
+# 1. 문서 → 청크
+# =================================================================
+def _parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    문서 맨 앞의 '---' 블록을 메타데이터로 사용
+    (값은 JSON으로 해석 가능하면 JSON, 아니면 문자열)
+
+        ---
+        category: 인물
+        spoiler_level: 2
+        ---
+    """
+    match = _FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+
+    meta: Dict[str, Any] = {}
+    for line in match.group(1).splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        value = value.strip()
+        try:
+            meta[key.strip()] = json.loads(value)
+        except json.JSONDecodeError:
+            meta[key.strip()] = value
+    return meta, text[match.end():]
+
+
+def chunk_text(text: str, max_chars: int = 500) -> List[str]:
+    """
+    문단 단위로 자르고, max_chars를 넘지 않는 범위에서 이웃 문단을 합침
+    (한 문단이 max_chars보다 길면 그 문단은 단독 청크)
+    """
+    chunks: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def load_source_chunks(source_dir: str, max_chars: int = 500) -> Tuple[List[str], List[dict]]:
+    """
+    source_dir 아래 모든 .txt/.md 문서를 청크로 변환 (파일 경로 순 정렬 → 재현 가능)
+
+    Returns:
+        (청크 텍스트 리스트, 메타데이터 리스트)
+    """
+    paths = []
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if name.lower().endswith(SOURCE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    paths.sort()
+
+    chunks: List[str] = []
+    metadata: List[dict] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            doc_meta, body = _parse_front_matter(f.read())
+        source = os.path.relpath(path, source_dir).replace(os.sep, "/")
+        for chunk in chunk_text(body, max_chars):
+            meta = dict(doc_meta)
+            meta["source"] = source
+            chunks.append(chunk)
+            metadata.append(meta)
+    return chunks, metadata
+
+
+def content_hash(text: str) -> str:
+    """문자열 해시"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def chunk_key(chunk: str, meta: dict) -> str:
+    """
+    청크 변경 감지용 해시 (본문 + 메타데이터)
+    문서 안에서 위치만 바뀐 청크는 같은 키 → 다시 임베딩하지 않음
+    """
+    return content_hash(json.dumps({"text": chunk, "meta": meta}, ensure_ascii=False, sort_keys=True, default=str))
+
+
+# =================================================================
+# 2. 병렬 배치 임베딩
+# =================================================================
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, backend: str, onnx_dir: Optional[str], num_threads: int) -> None:
+    """워커 프로세스마다 모델을 한 번만 로드"""
+    if backend.startswith("torch"):
+        import torch
+        torch.set_num_threads(num_threads)
+    _worker["tokenizer"] = load_tokenizer(model_path)
+    _worker["backend"] = create_backend(backend, model_path, onnx_dir=onnx_dir, num_threads=num_threads)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    encoded = _worker["tokenizer"](
+        texts,
+        padding="longest",
+        truncation=True,
+        max_length=512,
+        return_tensors="np"
+    )
+    return _worker["backend"].encode(encoded)
+
+
+def embed_texts(
+    texts: List[str],
+    model_path: str,
+    backend: str = "torch-fp32",
+    workers: int = 1,
+    batch_size: int = 32,
+    onnx_dir: Optional[str] = None
+) -> np.ndarray:
+    """
+    텍스트 리스트 임베딩 (길이순 배치 → 패딩 최소화, workers > 1이면 프로세스 병렬)
+
+    Returns: [len(texts), dim] float32 (입력 순서 유지)
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches = [
+        [texts[i] for i in order[start:start + batch_size]]
+        for start in range(0, len(order), batch_size)
+    ]
+
+    workers = max(1, min(workers, len(batches)))
+    num_threads = max(1, cpu_count() // workers)
+    init_args = (model_path, backend, onnx_dir, num_threads)
+    started = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(*init_args)
+        results = [_encode_batch(batch) for batch in batches]
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = pool.map(_encode_batch, batches)
+
+    sorted_vecs = np.concatenate(results, axis=0)
+    vectors = np.empty_like(sorted_vecs)
+    vectors[order] = sorted_vecs
+
+    elapsed = time.perf_counter() - started
+    print(f"[Builder] 임베딩 완료: {len(texts)}개, {elapsed:.1f}초 ({workers} workers × {num_threads} threads)")
+    return vectors
+
+
+# =================================================================
+# 3. 빌드
+# =================================================================
+def _read_manifest(vectordb_path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(vectordb_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def build_vectordb(
+    source_dir: str,
+    output_path: str,
+    model_path: str,
+    backend: str = "torch-fp32",
+    workers: int = 1,
+    batch_size: int = 32,
+    max_chars: int = 500,
+    onnx_dir: Optional[str] = None,
+    index_type: str = "flat",
+    index_params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    문서 폴더로 벡터DB 전체 빌드 (index_type: flat / ivf-flat / hnsw / ivf-pq)
+
+    임시 폴더에 먼저 쓰고 마지막에 교체하므로, 빌드 도중 실패해도 기존 DB는 그대로 남습니다.
+    직전 DB는 '<output_path>.prev'로 보관됩니다.
+
+    Returns:
+        기록된 manifest
+    """
+    chunks, metadata = load_source_chunks(source_dir, max_chars)
+    if not chunks:
+        raise ValueError(f"청크로 만들 문서가 없습니다: {source_dir}")
+    print(f"[Builder] {len(chunks)}개 청크 생성 ({source_dir})")
+
+    vectors = embed_texts(chunks, model_path, backend, workers, batch_size, onnx_dir)
+    index_params = resolve_params(index_type, index_params, len(chunks), vectors.shape[1])
+    index = build_index(vectors, np.arange(len(chunks)), index_type, index_params)
+    hashes = [chunk_key(c, m) for c, m in zip(chunks, metadata)]
+
+    previous = _read_manifest(output_path)
+    manifest_extra = {
+        "build_version": previous.get("build_version", 0) + 1,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model": os.path.basename(os.path.normpath(model_path)),
+        "embedding_backend": backend,
+        "dim": int(vectors.shape[1]),
+        "index": {"type": index_type, "params": index_params},
+        "chunking": {"max_chars": max_chars},
+        "source_hash": content_hash("".join(hashes)),
+    }
+
+    staging = f"{os.path.normpath(output_path)}.building"
+    backup = f"{os.path.normpath(output_path)}.prev"
+    shutil.rmtree(staging, ignore_errors=True)
+    write_mmap_store(
+        staging, chunks, metadata,
+        index=index, extra_manifest=manifest_extra, hashes=hashes, vectors=vectors
+    )
+
+    if os.path.exists(output_path):
+        shutil.rmtree(backup, ignore_errors=True)
+        os.replace(output_path, backup)
+    os.replace(staging, output_path)
+
+    manifest = _read_manifest(output_path)
+    print(f"[Builder] ✅ 빌드 완료: v{manifest.get('build_version')} → {output_path}")
+    return manifest
+
+
+def _write_manifest(vectordb_path: str, manifest: Dict[str, Any]) -> None:
+    with open(os.path.join(vectordb_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def _load_id_index(vectordb_path: str):
+    """
+    증분 업데이트용 인덱스 로드
+    예전 빌드의 순번 인덱스(Flat)는 벡터를 복원해 IndexIDMap2로 감쌈 (id = 행 번호)
+    """
+    index = read_index(vectordb_path, use_mmap=False)
+    if isinstance(index, faiss.IndexIDMap2):
+        return index
+    if isinstance(index, faiss.IndexIDMap):
+        raise ValueError("IndexIDMap(복원 불가) 인덱스는 증분 업데이트를 지원하지 않습니다. 전체 빌드하세요.")
+    try:
+        vectors = index.reconstruct_n(0, index.ntotal)
+    except RuntimeError as e:
+        raise ValueError(f"벡터를 복원할 수 없는 인덱스입니다 ({e}). 전체 빌드하세요.")
+    print("[Builder] 순번 인덱스를 id 인덱스로 변환")
+    return build_index(vectors, np.arange(index.ntotal), "flat")
+
+
+def _stored_vectors(vectordb_path: str, rows: List[int]) -> np.ndarray:
+    """
+    행 번호 → 원본 임베딩
+    vectors.npy가 없는 예전 DB는 인덱스에서 복원 (flat만 정확, 그 외 종류는 실패)
+    """
+    vectors = load_vectors(vectordb_path)
+    if vectors is not None:
+        return np.asarray(vectors[rows], dtype=np.float32)
+
+    index = _load_id_index(vectordb_path)
+    if rows and describe_index(index) != "flat":
+        raise ValueError("vectors.npy가 없고 인덱스에서 원본 벡터를 복원할 수 없습니다. 전체 빌드하세요.")
+    if not rows:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return np.stack([index.reconstruct(int(row)) for row in rows])
+
+
+def update_vectordb(
+    source_dir: str,
+    output_path: str,
+    model_path: str,
+    backend: str = "torch-fp32",
+    workers: int = 1,
+    batch_size: int = 32,
+    max_chars: int = 500,
+    onnx_dir: Optional[str] = None,
+    compact_ratio: float = 0.3
+) -> Dict[str, Any]:
+    """
+    증분 업데이트: 내용 해시로 기존 청크와 비교해
+    - 새로 생긴/바뀐 청크만 임베딩해서 추가
+    - 사라진 청크는 인덱스에서 제거하고 삭제 표시(tombstone)
+    - 삭제 표시 비율이 compact_ratio를 넘으면 압축
+
+    DB가 없거나 legacy 형식이면 전체 빌드합니다.
+    """
+    if detect_format(output_path) != "mmap" or not any(load_hashes(output_path)):
+        print("[Builder] 증분 정보가 없는 DB → 전체 빌드")
+        return build_vectordb(source_dir, output_path, model_path, backend, workers, batch_size, max_chars, onnx_dir)
+
+    manifest = _read_manifest(output_path)
+    if manifest.get("embedding_backend", backend) != backend:
+        raise ValueError(f"DB는 {manifest['embedding_backend']} 백엔드로 만들어졌습니다. 같은 백엔드를 쓰거나 전체 빌드하세요.")
+
+    chunks, metadata = load_source_chunks(source_dir, max_chars)
+    new_keys = [chunk_key(c, m) for c, m in zip(chunks, metadata)]
+
+    # 살아 있는 기존 행: 키 → 행 id 목록 (같은 내용이 여러 번 나올 수 있음)
+    tombstones = set(load_tombstones(output_path))
+    live: Dict[str, List[int]] = {}
+    for row, key in enumerate(load_hashes(output_path)):
+        if row not in tombstones and key is not None:
+            live.setdefault(key, []).append(row)
+
+    added: List[int] = []  # chunks 안의 위치
+    for i, key in enumerate(new_keys):
+        if live.get(key):
+            live[key].pop()  # 그대로 재사용
+        else:
+            added.append(i)
+    removed = [row for rows in live.values() for row in rows]
+
+    print(f"[Builder] 증분 비교: 추가 {len(added)}개, 삭제 {len(removed)}개, 유지 {len(chunks) - len(added)}개")
+    if not added and not removed:
+        return manifest
+
+    index = _load_id_index(output_path)
+    if removed:
+        try:
+            index.remove_ids(np.array(removed, dtype=np.int64))
+        except RuntimeError:
+            # hnsw 등 삭제 미지원 인덱스 → 검색 시 tombstone으로 걸러냄 (압축 때 실제 제거)
+            print(f"[Builder] {describe_index(index)} 인덱스는 삭제 미지원 → 삭제 표시만 기록")
+        tombstones.update(removed)
+        save_tombstones(output_path, list(tombstones))
+
+    if added:
+        add_chunks = [chunks[i] for i in added]
+        vectors = embed_texts(add_chunks, model_path, backend, workers, batch_size, onnx_dir)
+        row_ids = append_mmap_store(
+            output_path,
+            add_chunks,
+            [metadata[i] for i in added],
+            [new_keys[i] for i in added],
+            vectors=vectors
+        )
+        index.add_with_ids(vectors, np.array(row_ids, dtype=np.int64))
+
+    faiss.write_index(index, os.path.join(output_path, INDEX_FILE))
+
+    total_rows = len(load_hashes(output_path))
+    manifest.update({
+        "build_version": manifest.get("build_version", 0) + 1,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "count": total_rows,
+        "live_count": int(index.ntotal),
+        "source_hash": content_hash("".join(new_keys)),
+    })
+    _write_manifest(output_path, manifest)
+    print(f"[Builder] ✅ 증분 업데이트 완료: v{manifest['build_version']} (임베딩 {len(added)}개)")
+
+    if total_rows and len(tombstones) / total_rows > compact_ratio:
+        manifest = compact_vectordb(output_path)
+    return manifest
+
+
+def compact_vectordb(vectordb_path: str) -> Dict[str, Any]:
+    """
+    삭제 표시된 행을 실제로 지우고 id를 0부터 다시 매김 (재임베딩 없음)
+    """
+    tombstones = set(load_tombstones(vectordb_path))
+    manifest = _read_manifest(vectordb_path)
+    if not tombstones:
+        print("[Builder] 압축할 항목 없음")
+        return manifest
+
+    store = MmapChunkStore(vectordb_path)
+    hashes = load_hashes(vectordb_path)
+    keep = [row for row in range(len(store)) if row not in tombstones]
+    chunks = [store.get_chunk(row) for row in keep]
+    metadata = [store.get_metadata(row) for row in keep]
+    store.close()
+
+    vectors = _stored_vectors(vectordb_path, keep)
+    spec = manifest.get("index", {})
+    new_index = build_index(vectors, np.arange(len(keep)), spec.get("type", "flat"), spec.get("params"))
+
+    manifest.update({"live_count": len(keep), "compacted_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    manifest.pop("count", None)
+    manifest.pop("metadata_columns", None)
+    write_mmap_store(
+        vectordb_path, chunks, metadata,
+        index=new_index,
+        extra_manifest={k: v for k, v in manifest.items() if k not in ("format", "version")},
+        hashes=[hashes[row] if row < len(hashes) else None for row in keep],
+        vectors=vectors
+    )
+    print(f"[Builder] ✅ 압축 완료: {len(tombstones)}개 제거 → {len(keep)}개")
+    return _read_manifest(vectordb_path)
+
+
+def reindex_vectordb(
+    vectordb_path: str,
+    index_type: str,
+    index_params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    저장된 임베딩으로 인덱스만 다른 종류로 다시 생성 (재임베딩 없음)
+    """
+    tombstones = set(load_tombstones(vectordb_path))
+    if detect_format(vectordb_path) == "mmap":
+        store = MmapChunkStore(vectordb_path)
+        n_rows = len(store)
+        store.close()
+    else:
+        n_rows = read_index(vectordb_path, use_mmap=False).ntotal
+    rows = [row for row in range(n_rows) if row not in tombstones]
+    vectors = _stored_vectors(vectordb_path, rows)
+
+    index_params = resolve_params(index_type, index_params, len(rows), vectors.shape[1])
+    started = time.perf_counter()
+    index = build_index(vectors, np.array(rows, dtype=np.int64), index_type, index_params)
+    faiss.write_index(index, os.path.join(vectordb_path, INDEX_FILE))
+    print(f"[Builder] ✅ 인덱스 재생성: {index_type} {index_params} ({time.perf_counter() - started:.1f}초)")
+
+    manifest = _read_manifest(vectordb_path)
+    if manifest:
+        manifest["index"] = {"type": index_type, "params": index_params}
+        _write_manifest(vectordb_path, manifest)
+    return manifest
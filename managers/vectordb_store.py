@@ -0,0 +1,369 @@
+"""
+벡터DB 저장 형식
+- legacy : yuhwa.index + chunks.pkl + metadata.pkl (시작 시 전체를 파이썬 객체로 로드)
+- mmap   : yuhwa.index (FAISS mmap) + chunks.bin/chunks.offsets.npy + metadata.codes.npy/metadata.columns.json
+           (검색 결과로 뽑힌 청크만 그때그때 디코딩)
+           + chunks.hashes.json (행별 내용 해시) / tombstones.npy (삭제된 행 id) → 증분 업데이트용
+           + vectors.npy (원본 임베딩) → 인덱스 종류 변경/압축/성능 측정 시 재임베딩 없이 사용
+
+MIT License
+"""
+
+import json
+import mmap
+import os
+import pickle
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_FILE = "yuhwa.index"
+MANIFEST_FILE = "manifest.json"
+CHUNKS_BLOB_FILE = "chunks.bin"
+CHUNKS_OFFSETS_FILE = "chunks.offsets.npy"
+METADATA_CODES_FILE = "metadata.codes.npy"
+METADATA_COLUMNS_FILE = "metadata.columns.json"
+HASHES_FILE = "chunks.hashes.json"
+TOMBSTONES_FILE = "tombstones.npy"
+VECTORS_FILE = "vectors.npy"
+LEGACY_CHUNKS_FILE = "chunks.pkl"
+LEGACY_METADATA_FILE = "metadata.pkl"
+
+FORMAT_NAME = "isolation-vectordb"
+FORMAT_VERSION = 1
+
+
+def _as_list(value: Any) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+
+def value_matches(value: Any, allowed: Any) -> bool:
+    """메타데이터 값(단일 값 또는 리스트)이 허용 값 중 하나라도 포함하면 True"""
+    allowed = _as_list(allowed)
+    return any(v in allowed for v in _as_list(value))
+
+
+def metadata_matches(meta: dict, filters: Dict[str, Any]) -> bool:
+    """
+    필터 판정 (필드가 없는 청크는 제한 없음 → 통과)
+    예) {"san": "균열"} → san이 "균열"이거나 ["균열", "착란"]을 포함하거나, san 필드가 없는 청크
+    """
+    return all(field not in meta or value_matches(meta[field], allowed) for field, allowed in filters.items())
+
+
+class PickleChunkStore:
+    """기존 pickle 형식 (전체 로드)"""
+
+    format = "legacy"
+    tombstones: frozenset = frozenset()
+
+    def __init__(self, vectordb_path: str):
+        with open(os.path.join(vectordb_path, LEGACY_CHUNKS_FILE), 'rb') as f:
+            self.chunks: List[str] = pickle.load(f)
+
+        metadata_file = os.path.join(vectordb_path, LEGACY_METADATA_FILE)
+        if os.path.exists(metadata_file):
+            with open(metadata_file, 'rb') as f:
+                self.metadata: List[dict] = pickle.load(f)
+        else:
+            self.metadata = [{} for _ in self.chunks]
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def get_chunk(self, idx: int) -> str:
+        return self.chunks[idx]
+
+    def get_metadata(self, idx: int) -> dict:
+        return self.metadata[idx]
+
+    def filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """필터를 통과하는 행 id (오름차순)"""
+        return np.array(
+            [i for i, meta in enumerate(self.metadata) if metadata_matches(meta, filters)],
+            dtype=np.int64
+        )
+
+    def distinct_values(self, field: str) -> List[Any]:
+        values: List[Any] = []
+        for meta in self.metadata:
+            for v in _as_list(meta.get(field, [])):
+                if v not in values:
+                    values.append(v)
+        return values
+
+
+class MmapChunkStore:
+    """
+    mmap 형식 (지연 로드)
+    - 청크 텍스트: UTF-8 바이트를 이어 붙인 chunks.bin + 경계 오프셋 [n+1]
+    - 메타데이터: 컬럼별 고유값 사전(JSON) + 코드 행렬 [n, 컬럼 수] (-1 = 값 없음)
+    """
+
+    format = "mmap"
+
+    def __init__(self, vectordb_path: str):
+        self._offsets = np.load(os.path.join(vectordb_path, CHUNKS_OFFSETS_FILE), mmap_mode='r')
+        self._blob_file = open(os.path.join(vectordb_path, CHUNKS_BLOB_FILE), 'rb')
+        # 빈 파일은 mmap 불가
+        self._blob = (
+            mmap.mmap(self._blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.fstat(self._blob_file.fileno()).st_size else b""
+        )
+
+        with open(os.path.join(vectordb_path, METADATA_COLUMNS_FILE), 'r', encoding='utf-8') as f:
+            columns = json.load(f)["columns"]
+        self.column_names: List[str] = [c["name"] for c in columns]
+        self.column_values: List[List[Any]] = [c["values"] for c in columns]
+        self._codes = np.load(os.path.join(vectordb_path, METADATA_CODES_FILE), mmap_mode='r')
+        self.tombstones = frozenset(load_tombstones(vectordb_path))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def get_chunk(self, idx: int) -> str:
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        return self._blob[start:end].decode('utf-8')
+
+    def get_metadata(self, idx: int) -> dict:
+        if not self.column_names:
+            return {}
+        row = self._codes[idx]
+        return {
+            name: values[code]
+            for name, values, code in zip(self.column_names, self.column_values, row)
+            if code >= 0
+        }
+
+    def filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        필터를 통과하는 행 id (오름차순, 삭제 표시 제외)
+        컬럼 사전에서 허용 코드만 고른 뒤 코드 행렬을 한 번에 비교 (청크 디코딩 없음)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for field, allowed in filters.items():
+            if field not in self.column_names:
+                continue  # 이 필드를 가진 청크가 없음 → 모두 제한 없음
+            col = self.column_names.index(field)
+            codes = [code for code, value in enumerate(self.column_values[col]) if value_matches(value, allowed)]
+            column = np.asarray(self._codes[:, col])
+            mask &= (column < 0) | np.isin(column, codes)
+        if self.tombstones:
+            mask[[i for i in self.tombstones if i < len(mask)]] = False
+        return np.flatnonzero(mask).astype(np.int64)
+
+    def distinct_values(self, field: str) -> List[Any]:
+        if field not in self.column_names:
+            return []
+        values: List[Any] = []
+        for value in self.column_values[self.column_names.index(field)]:
+            for v in _as_list(value):
+                if v not in values:
+                    values.append(v)
+        return values
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._blob_file.close()
+
+
+def load_tombstones(vectordb_path: str) -> List[int]:
+    """삭제 처리된 행 id 목록 (없으면 빈 리스트)"""
+    path = os.path.join(vectordb_path, TOMBSTONES_FILE)
+    if not os.path.exists(path):
+        return []
+    return np.load(path).astype(np.int64).tolist()
+
+
+def save_tombstones(vectordb_path: str, ids: List[int]) -> None:
+    np.save(os.path.join(vectordb_path, TOMBSTONES_FILE), np.array(sorted(set(ids)), dtype=np.int64))
+
+
+def load_hashes(vectordb_path: str) -> List[Optional[str]]:
+    """행별 내용 해시 (해시 파일이 없는 DB는 빈 리스트)"""
+    path = os.path.join(vectordb_path, HASHES_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_hashes(vectordb_path: str, hashes: List[Optional[str]]) -> None:
+    with open(os.path.join(vectordb_path, HASHES_FILE), 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+
+
+def load_vectors(vectordb_path: str, mmap: bool = True) -> Optional[np.ndarray]:
+    """행별 원본 임베딩 [n, dim] (예전 빌드라 파일이 없으면 None)"""
+    path = os.path.join(vectordb_path, VECTORS_FILE)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def detect_format(vectordb_path: str) -> Optional[str]:
+    """'mmap' / 'legacy' / None (DB 없음)"""
+    if os.path.exists(os.path.join(vectordb_path, MANIFEST_FILE)):
+        return "mmap"
+    if os.path.exists(os.path.join(vectordb_path, LEGACY_CHUNKS_FILE)):
+        return "legacy"
+    return None
+
+
+def read_index(vectordb_path: str, use_mmap: bool = True):
+    """FAISS 인덱스 로드 (가능하면 mmap, 인덱스 종류가 지원하지 않으면 일반 로드)"""
+    index_file = os.path.join(vectordb_path, INDEX_FILE)
+    if use_mmap:
+        try:
+            return faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            print(f"[VectorDB] mmap 로드 미지원 인덱스 → 일반 로드 ({e})")
+    return faiss.read_index(index_file)
+
+
+def open_vectordb(vectordb_path: str) -> Tuple[Any, Any]:
+    """
+    벡터DB 열기 (mmap 형식 우선, 없으면 legacy pickle)
+
+    Returns:
+        (FAISS 인덱스, 청크 저장소)
+    """
+    fmt = detect_format(vectordb_path)
+    if fmt is None or not os.path.exists(os.path.join(vectordb_path, INDEX_FILE)):
+        raise FileNotFoundError(f"벡터 DB 파일이 경로에 없습니다: {vectordb_path}")
+
+    if fmt == "mmap":
+        return read_index(vectordb_path, use_mmap=True), MmapChunkStore(vectordb_path)
+    return read_index(vectordb_path, use_mmap=False), PickleChunkStore(vectordb_path)
+
+
+def _encode_metadata_columns(metadata: List[dict]) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """메타데이터 dict 리스트 → (컬럼 사전, 코드 행렬)"""
+    names: List[str] = []
+    for meta in metadata:
+        for key in meta:
+            if key not in names:
+                names.append(key)
+
+    columns = []
+    codes = np.full((len(metadata), len(names)), -1, dtype=np.int32)
+    for col, name in enumerate(names):
+        values: List[Any] = []
+        lookup: Dict[str, int] = {}
+        for row, meta in enumerate(metadata):
+            if name not in meta:
+                continue
+            value = meta[name]
+            # 리스트/딕셔너리 값도 고유값 판정이 가능하도록 JSON 문자열로 비교
+            signature = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+            if signature not in lookup:
+                lookup[signature] = len(values)
+                values.append(value)
+            codes[row, col] = lookup[signature]
+        columns.append({"name": name, "values": values})
+    return columns, codes
+
+
+def write_mmap_store(
+    vectordb_path: str,
+    chunks: List[str],
+    metadata: List[dict],
+    index: Any = None,
+    extra_manifest: Optional[Dict[str, Any]] = None,
+    hashes: Optional[List[Optional[str]]] = None,
+    vectors: Optional[np.ndarray] = None
+) -> None:
+    """
+    mmap 형식으로 저장 (index / vectors를 주면 yuhwa.index / vectors.npy도 함께 기록)
+    manifest.json을 마지막에 써서, 중간에 실패하면 legacy 형식으로 계속 읽히도록 함
+    전체를 새로 쓰므로 삭제 표시(tombstone)는 비워짐
+    """
+    os.makedirs(vectordb_path, exist_ok=True)
+
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    with open(os.path.join(vectordb_path, CHUNKS_BLOB_FILE), 'wb') as f:
+        for b in encoded:
+            f.write(b)
+    np.save(os.path.join(vectordb_path, CHUNKS_OFFSETS_FILE), offsets)
+
+    columns, codes = _encode_metadata_columns(metadata)
+    with open(os.path.join(vectordb_path, METADATA_COLUMNS_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"columns": columns}, f, ensure_ascii=False, default=str)
+    np.save(os.path.join(vectordb_path, METADATA_CODES_FILE), codes)
+
+    _save_hashes(vectordb_path, hashes if hashes is not None else [None] * len(chunks))
+    save_tombstones(vectordb_path, [])
+
+    if vectors is not None:
+        np.save(os.path.join(vectordb_path, VECTORS_FILE), np.asarray(vectors, dtype=np.float32))
+    if index is not None:
+        faiss.write_index(index, os.path.join(vectordb_path, INDEX_FILE))
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "count": len(chunks),
+        "metadata_columns": [c["name"] for c in columns],
+    }
+    if extra_manifest:
+        manifest.update(extra_manifest)
+    with open(os.path.join(vectordb_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def append_mmap_store(
+    vectordb_path: str,
+    chunks: List[str],
+    metadata: List[dict],
+    hashes: List[Optional[str]],
+    vectors: Optional[np.ndarray] = None
+) -> List[int]:
+    """
+    기존 mmap 저장소 뒤에 청크 추가 (청크 본문은 이어 쓰기, 오프셋/메타데이터/해시만 재기록)
+    vectors.npy가 있는 DB면 임베딩도 뒤에 붙임
+
+    Returns:
+        새로 부여된 행 id 리스트
+    """
+    store = MmapChunkStore(vectordb_path)
+    old_count = len(store)
+    old_metadata = [store.get_metadata(i) for i in range(old_count)]
+    offsets = np.array(store._offsets, dtype=np.int64)
+    store.close()
+
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    with open(os.path.join(vectordb_path, CHUNKS_BLOB_FILE), 'ab') as f:
+        for b in encoded:
+            f.write(b)
+    new_offsets = offsets[-1] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    np.save(os.path.join(vectordb_path, CHUNKS_OFFSETS_FILE), np.concatenate([offsets, new_offsets]))
+
+    columns, codes = _encode_metadata_columns(old_metadata + list(metadata))
+    with open(os.path.join(vectordb_path, METADATA_COLUMNS_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"columns": columns}, f, ensure_ascii=False, default=str)
+    np.save(os.path.join(vectordb_path, METADATA_CODES_FILE), codes)
+
+    old_hashes = load_hashes(vectordb_path) or [None] * old_count
+    _save_hashes(vectordb_path, old_hashes + list(hashes))
+
+    old_vectors = load_vectors(vectordb_path, mmap=False)
+    if old_vectors is not None and vectors is not None:
+        np.save(
+            os.path.join(vectordb_path, VECTORS_FILE),
+            np.concatenate([old_vectors, np.asarray(vectors, dtype=np.float32)])
+        )
+
+    return list(range(old_count, old_count + len(chunks)))
+
+
+def convert_pickle_to_mmap(vectordb_path: str) -> None:
+    """legacy pickle DB를 같은 폴더에 mmap 형식으로 변환 (pickle 파일은 남겨 둠)"""
+    store = PickleChunkStore(vectordb_path)
+    print(f"[VectorDB] 변환 시작: {len(store)}개 청크 ({vectordb_path})")
+    write_mmap_store(vectordb_path, store.chunks, store.metadata)
+    print("[VectorDB] ✅ mmap 형식 변환 완료")
@@ -1,6 +1,7 @@
 import pygame
+import asyncio
 import json
-import re
+import os
 import threading
 import time
 from pathlib import Path
@@ -8,6 +9,11 @@ from ui.state_base import GameState
 from ui.components import TextInput, AnimatedPortrait, DialogueBox
 from ui.animator import AnimatedSprite
 from ui.theme_manager import get_theme
+from managers.response_cache import state_key
+from managers.response_schema import parse_roleplay_reply
+from managers.turn_context import TurnContext
+from managers.turn_pipeline import Stage, TurnPipeline, TurnTask
+from managers.turn_prefetch import TurnPrefetcher
 
 
 class GameplayState(GameState):
@@ -44,17 +50,32 @@ class GameplayState(GameState):
         self.next_emotion = "neutral"
         self.last_emotion = "평온"
         self.last_topic = "새로운 관리자를 기다리는 중"
-        self.is_pipeline_running = False
-        self.is_recording = False
-        self.is_processing_tts = False
-        self.current_user_msg = ""
         self.thinking_trigger = False  # 디버깅용 트리거
         
-        # [수정] TTS 관련 상태 변수
-        self._tts_audio_path = None  # TTS 합성 결과 저장
-        self._tts_ready = False  # TTS 합성 완료 플래그
-        self._pending_llm_data = None  # LLM 응답 임시 저장 (TTS 완료 대기 중)
-        self._llm_response_processed = False
+        # 표시 중인 응답의 음성 (Sound, 문장 단위 파이프라인) — 대사 출력 시작 시 재생
+        self._voice = (None, None)
+
+        # [스트리밍] 필드 단위 선행 출력 상태
+        self._shown_parts = set()  # 이미 DialogueBox에 출력된 필드
+
+        # 입력 중 SAN/RAG 미리 계산 (입력이 멈추면 백그라운드에서, 전송 시 결과 재사용)
+        self.prefetcher = None
+        spec_conf = self.media_config.get("rag", {}).get("speculative", {})
+        if spec_conf.get("enabled", False) and os.getenv("RAG_SPECULATIVE", "1") == "1":
+            self.prefetcher = TurnPrefetcher(
+                self.game_system,
+                character=self.character,
+                rag_manager=self.rag_manager,
+                debounce_s=spec_conf.get("debounce_s", 0.6),
+                min_chars=spec_conf.get("min_chars", 4),
+                similarity=spec_conf.get("similarity", 95)
+            )
+
+        # 턴 파이프라인 (STT → SAN → RAG → LLM → TTS → 표시, 단계별 기한)
+        # barge_in이면 응답 중에도 입력을 받아 진행 중인 턴을 취소하고 바로 다음 턴 시작
+        turn_conf = self.media_config.get("turn_pipeline", {})
+        self.barge_in = turn_conf.get("barge_in", True)
+        self.turns = self._build_turn_pipeline(turn_conf.get("deadlines", {}))
 
         self._load_objects()
         self._init_ui_components()
@@ -154,217 +175,355 @@ class GameplayState(GameState):
         """입력창 비활성화 상태 설정"""
         self.text_input.set_disabled(busy)
 
+    def _tts_enabled(self) -> bool:
+        return bool(self.audio_manager and self.audio_manager.enabled)
+
     def _on_dialogue_start(self):
         """
         DialogueBox에서 대사가 출력되기 시작할 때 호출
         (행동 출력 완료 후, 대사 출력 시작)
-        
+
         [핵심] 이 시점에서 이미 TTS 합성이 완료된 음성을 재생
         """
-        if self._tts_audio_path and self.audio_manager and self.audio_manager.enabled:
+        sound, pipeline = self._voice
+        if sound is not None and self._tts_enabled():
             print(f"[Gameplay] 대사 출력 시작 → 음성 재생!")
-            self.audio_manager.play(self._tts_audio_path)
-
-    # [수정] emotion 인자 받기
-    def _synthesize_tts(self, dialogue: str, emotion: str = "평온") -> bool:
+            if pipeline:
+                self.audio_manager.play_pipeline(pipeline)
+            else:
+                self.audio_manager.play(sound)
+
+    # ========== 턴 파이프라인 ==========
+
+    def _build_turn_pipeline(self, deadlines: dict) -> TurnPipeline:
+        """단계 목록 구성 (기한은 config/media.json의 turn_pipeline.deadlines, 초)"""
+        record_seconds = getattr(self.stt_manager, "record_seconds", 5)
+        return TurnPipeline([
+            # 음성 턴만 (텍스트 턴은 입력이 이미 있음), 인식 실패 시 턴 종료
+            Stage("stt", self._stage_stt, deadlines.get("stt", record_seconds + 30),
+                  when=lambda task: task.user_input is None),
+            # SAN은 게임 상태 변경이라 기한 없이 항상 실행 (키워드 스캔만이라 가벼움)
+            Stage("san", self._stage_san),
+            # 기한을 넘기면 건너뛰고 다음 단계가 빠진 결과를 대신함
+            Stage("rag", self._stage_rag, deadlines.get("rag", 5.0), required=False),
+            Stage("llm", self._stage_llm, deadlines.get("llm", 90.0), required=False),
+            Stage("tts", self._stage_tts, deadlines.get("tts", 30.0), required=False),
+            Stage("display", self._stage_display, deadlines.get("display", 5.0)),
+        ], self.game.channel, on_finish=self._on_turn_finished)
+
+    async def _stage_stt(self, task: TurnTask):
+        """음성 입력 (녹음 → 변환, 취소되면 녹음 중단)"""
+        await task.on_main(self._on_listen_start, task)
         try:
-            print(f"[TTS Thread] 음성 합성 시작: {dialogue[:30]}... (감정: {emotion})")
-            
-            # [수정] emotion 전달
-            audio_path = self.audio_manager.synthesize(dialogue, emotion=emotion)
-            
-            if not audio_path:
-                print("[TTS Thread] TTS 합성 실패")
-                return False
-            
-            self._tts_audio_path = audio_path
-            return True
-        except Exception as e:
-            # ... (동일)
-            print(f"[TTS Thread] ❌ 오류: {e}")
-            import traceback
-            traceback.print_exc()
+            text = await self.turns.run_blocking(self.stt_manager.listen, cancel=threading.Event())
+        finally:
+            task.post(self._on_listen_end, task)
+
+        if not text.strip():
+            print("[STT] 인식 실패 또는 침묵")
             return False
+        print(f"[STT] 결과 수신: {text}")
+        task.user_input = text.strip()
+
+    async def _stage_san(self, task: TurnTask):
+        """
+        SAN 키워드 검사 (미리 계산 결과를 기다리지 않고 최종 입력으로 바로 검사)
+        검출만 작업 스레드에서, 턴 증가 / SAN 감소는 메인 스레드에서 반영
+        """
+        print(f"\n▶ [User] \"{task.user_input}\"")
+        print(f"[GameSystem] SAN 키워드 스캔 중... (입력 길이: {len(task.user_input)})")
+        hits = await self.turns.run_blocking(self.game_system.scan_san_keywords, task.user_input)
+        await task.on_main(self._apply_san, hits)
+
+    def _apply_san(self, hits):
+        self.game_system.increment_turn()
+        self.game_system.apply_san_hits(hits)
 
-    def _display_llm_response_after_tts(self):
+        # 👉 [추가] 변경된 SAN 수치를 사운드 매니저에 즉시 반영 (BGM 교체)
+        if self.sound_manager:
+            self.sound_manager.update_san(getattr(self.game_system, 'san', 100))
+
+    def _new_turn_context(self, user_msg: str) -> TurnContext:
+        """입력 중 미리 계산한 턴이 있으면 그대로 이어 씀"""
+        context = self.prefetcher.take(user_msg) if self.prefetcher else None
+        return context or TurnContext(user_msg, self.rag_manager)
+
+    async def _stage_rag(self, task: TurnTask):
+        """응답 캐시 조회 + RAG 컨텍스트"""
+        status = self.game_system.get_status_summary()
+        task.data["context_data"] = {
+            "san_label": status['san_label'],
+            "likability_label": status['likability_label'],
+            "last_emotion": self.last_emotion,
+            "last_topic": self.last_topic
+        }
+
+        # 입력 임베딩 / RAG 결과는 턴 컨텍스트 하나로 공유 (턴당 인코딩 최대 1회, 로어 이름 fast path면 0회)
+        # 입력 중 미리 계산 중이면 기다림 → 기한을 넘기면 RAG 없이 진행
+        task.data["context"] = await self.turns.run_blocking(self._new_turn_context, task.user_input)
+        task.data["cache_query"], task.data["cached_reply"] = await self.turns.run_blocking(
+            self._retrieve, task.data["context"], task.data["context_data"]
+        )
+        task.data["rag_ready"] = True
+
+    def _retrieve(self, context: TurnContext, context_data: dict):
+        """(응답 캐시 조회 키, 캐시된 응답 또는 None) — RAG 컨텍스트를 턴에 준비한 뒤 응답 캐시 조회"""
+        # RAG 먼저: 로어 이름 fast path면 임베딩 없이 끝나고, dense 검색이면 계산한 임베딩을 응답 캐시 조회에 그대로 씀
+        if self.rag_manager:
+            try:
+                self.character.build_rag_context(context.user_input, context_data["san_label"], context)
+            except Exception as e:
+                print(f"[RAG][Error] {e}")
+        # 같은 상태 + 비슷한 입력이면 저장된 응답 사용 (LLM/프롬프트 조립 생략)
+        cache_query = self._response_cache_query(context, context_data)
+        cached = self.llm_manager.lookup_cached(*cache_query) if cache_query else None
+        return cache_query, cached
+
+    def _response_cache_query(self, turn: TurnContext, context_data: dict):
+        """
+        응답 캐시 조회용 (상태 키, 입력, 입력 임베딩) — 캐시나 RAG가 없으면 None
+        이미 있는 임베딩만 씀 (캐시 조회만을 위해 인코딩하지 않음 → 임베딩이 없는 fast path 턴은 응답 캐시를 건너뜀)
+        """
+        if not self.rag_manager or not getattr(self.llm_manager, "response_cache", None):
+            return None
+        query_vec = turn.known_vector()
+        if query_vec is None:
+            return None
+        state = state_key(context_data["san_label"], context_data["likability_label"], context_data["last_emotion"])
+        return state, turn.user_input, query_vec[0]
+
+    async def _stage_llm(self, task: TurnTask):
+        """응답 생성 (캐시 적중이면 생략, 완성된 필드는 바로 화면으로)"""
+        reply_text = task.data.get("cached_reply")
+        if reply_text is None:
+            # RAG 단계가 기한을 넘겼으면 참고 지식 없이 진행
+            prompt = await self.turns.run_blocking(
+                self.character.generate_prompt,
+                task.user_input,
+                task.data["context_data"],
+                turn=task.data.get("context"),
+                use_rag=task.data.get("rag_ready", False)
+            )
+            reply_text = await self.turns.run_blocking(
+                self.llm_manager.generate_roleplay,
+                prompt,
+                cache_query=task.data.get("cache_query"),
+                cancel=threading.Event(),
+                on_field=lambda field, value: self._on_llm_field(task, field, value)
+            )
+        task.data["reply_text"] = reply_text
+
+        # 요약 결과는 완료 알림 채널로 메인 스레드에 도착 (다음 턴 프롬프트의 last_topic)
+        self.llm_manager.call_summary(
+            task.user_input, reply_text, self.last_topic, self.game.summary_model_name,
+            on_done=lambda topic: self.game.channel.post(self._on_summary, topic)
+        )
+
+    def _on_summary(self, topic: str):
+        self.last_topic = topic
+
+    def _on_llm_field(self, task: TurnTask, field: str, value):
+        """
+        [스트리밍] LLM 작업 스레드에서 JSON 필드가 닫힐 때마다 호출
+        - dialogue: TTS 활성화 시 응답 전체를 기다리지 않고 바로 합성 시작
+        - 화면 반영은 메인 스레드로 넘김
+        """
+        if task.cancelled:
+            return
+        fields = task.data.setdefault("fields", {})
+        fields[field] = value
+        if field == "dialogue" and isinstance(value, str) and value and self._tts_enabled():
+            self._begin_tts(task, value, fields.get("new_emotion", "평온"))
+        task.post(self._on_stream_field, field, value)
+
+    def _parse_reply(self, task: TurnTask):
+        """응답 스키마 검증 + 가벼운 복구 (JSON이 없으면 원문을 대사로 사용, LLM 단계가 기한을 넘겼으면 침묵)"""
+        if "reply" not in task.data:
+            raw_text = task.data.get("reply_text") or self.llm_manager.silent_reply()
+            task.data["reply_text"] = raw_text
+            print("\n[System] LLM 응답 도착, 파싱 시작...")
+            data, repairs = parse_roleplay_reply(raw_text, allow_plain_text=True)
+            if data and repairs:
+                print(f"[System] 응답 복구: {', '.join(repairs)}")
+            task.data["reply"] = data
+        return task.data["reply"]
+
+    def _begin_tts(self, task: TurnTask, dialogue: str, emotion: str):
+        """대사 합성 시작 (턴당 한 번)"""
+        if "tts" in task.data:
+            return
+        print(f"[System] TTS 합성 시작 (감정: {emotion})")
+        if self.audio_manager.pipeline_enabled:
+            # 문장 단위 파이프라인: 첫 문장만 준비되면 바로 출력 시작
+            task.data["tts"] = (self.audio_manager.start_pipeline(dialogue, emotion=emotion), None)
+        else:
+            # 디코딩까지 작업 스레드에서 끝냄
+            task.data["tts"] = (None, self.turns.spawn(self.audio_manager.synthesize_sound, dialogue, emotion))
+
+    async def _stage_tts(self, task: TurnTask):
+        """음성 합성 (스트리밍 중 대사가 먼저 도착했으면 이미 시작된 합성을 기다림)"""
+        data = self._parse_reply(task)
+        if not data or not data.get("dialogue") or not self._tts_enabled():
+            return
+
+        self._begin_tts(task, data["dialogue"], data.get("new_emotion", "평온"))
+        pipeline, job = task.data["tts"]
+        try:
+            if pipeline is not None:
+                sound = await self.turns.run_blocking(pipeline.wait_first, self.audio_manager.timeout)
+            elif job is not None:
+                sound = await asyncio.wrap_future(job)
+            else:
+                sound = None
+        except asyncio.CancelledError:
+            if pipeline is not None:
+                pipeline.cancel()
+            raise
+
+        if sound is None:
+            print("[TTS] TTS 합성 실패 → 텍스트만 표시")
+            return
+        task.data["voice"] = (sound, pipeline)
+
+    async def _stage_display(self, task: TurnTask):
+        """화면 표시 (메인 스레드)"""
+        await task.on_main(self._show_reply, task)
+
+    def _show_reply(self, task: TurnTask):
         """
         TTS 합성 완료 후 LLM 응답을 화면에 표시
         """
-        if not self._pending_llm_data:
-            print("[Display] 대기 중인 LLM 데이터 없음")
+        data = self._parse_reply(task)
+        if not data:
+            print("[Error] Response Parsing Failed: No JSON found")
+            self.dialogue_box.set_text(task.data.get("reply_text", ""))
             return
-        
-        data = self._pending_llm_data
+
         dialogue = data.get("dialogue", "")
         action_pre = data.get("action_pre", "")
         action_post = data.get("action_post", "")
         emotion_kor = data.get("new_emotion", "평온")
-        
+
         self.game_system.update_likability(self.last_emotion, emotion_kor)
-        
+
         # [기존 코드] 호감도 업데이트
         self.game_system.update_likability(self.last_emotion, emotion_kor)
-        
+
         # 👉 [추가] SAN/호감도 변화 후 사운드 상태 동기화
         if self.sound_manager:
             current_san = getattr(self.game_system, 'san', 100)
             self.sound_manager.update_san(current_san)
-        
+
         self.last_emotion = emotion_kor
         self.next_emotion = self.emotion_map.get(emotion_kor, 'neutral')
+        self._voice = task.data.get("voice", (None, None))
 
-        # 텍스트 구성
+        # 텍스트 구성 (스트리밍으로 먼저 출력된 부분은 제외)
         full_text = ""
-        if action_pre:
+        if action_pre and "action_pre" not in self._shown_parts:
             full_text += f"({action_pre})\n"
-        full_text += f"{dialogue}"
+        if "dialogue" not in self._shown_parts:
+            full_text += f"{dialogue}"
         if action_post:
             full_text += f"\n({action_post})"
 
         print(f"[Display] DialogueBox에 텍스트 표시: {full_text[:50]}...")
-        self.dialogue_box.set_text(full_text)
-        
-        # 정리
-        self._pending_llm_data = None
-        self._set_busy(False)
+        if self._shown_parts:
+            self.dialogue_box.append_text(full_text)
+        else:
+            self.dialogue_box.set_text(full_text)
         print("[Display] ✅ LLM 응답 표시 완료")
 
-    def _process_llm_response(self, raw_text: str):
-        try:
-            print("\n[System] LLM 응답 도착, 파싱 시작...")
-            self.is_pipeline_running = False
-
-            json_match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group(0))
-                dialogue = data.get("dialogue", "")
-                
-                # [중요] 감정 키워드 추출 (예: "슬픔")
-                emotion_kor = data.get("new_emotion", "평온")
-
-                self._pending_llm_data = data
-                
-                if self.audio_manager and self.audio_manager.enabled and dialogue:
-                    print(f"[System] TTS 합성 시작 (감정: {emotion_kor})")
-                    self.is_processing_tts = True
-                    
-                    tts_thread = threading.Thread(
-                        target=self._synthesize_tts,
-                        # [수정] emotion_kor를 인자로 전달!
-                        args=(dialogue, emotion_kor) 
-                    )
-                    tts_thread.daemon = True
-                    tts_thread.start()
-                else:
-                    # TTS 비활성화 상태 → 즉시 텍스트 표시
-                    print("[System] TTS 비활성화 → 텍스트 즉시 표시")
-                    self._display_llm_response_after_tts()
-                    
-            else:
-                raise ValueError("No JSON found")
+    def _on_stream_field(self, field: str, value):
+        """
+        [스트리밍] 완성된 JSON 필드 화면 반영 (메인 스레드)
+        - action_pre: 즉시 DialogueBox 출력 시작
+        - dialogue: TTS 비활성화 시 바로 이어서 출력 (활성화 시 합성 완료 후 표시)
+        """
+        if not isinstance(value, str) or not value:
+            return
 
-        except Exception as e:
-            print(f"[Error] Response Parsing Failed: {e}")
-            self.dialogue_box.set_text(raw_text)
-            self._set_busy(False)
-            self.is_pipeline_running = False
-            self.is_processing_tts = False
+        if field == "action_pre" and not self._shown_parts:
+            self.dialogue_box.set_text(f"({value})\n")
+            self._shown_parts.add("action_pre")
 
-    def _run_rag_and_llm_pipeline(self, user_msg):
-        """RAG 및 LLM 파이프라인 실행 (스레드)"""
-        try:
-            # [추가] 새 메시지 처리 시작 - 플래그 초기화
-            self._llm_response_processed = False
-            self._tts_ready = False
-            self._tts_audio_path = None
-            self._pending_llm_data = None
-            
-            print(f"\n▶ [User] \"{user_msg}\"")
-            self.game_system.increment_turn()
-            self.game_system.check_san_keywords(user_msg)
-
-            # 👉 [추가] 변경된 SAN 수치를 사운드 매니저에 즉시 반영 (BGM 교체)
-            if self.sound_manager:
-                # game_system에 san 속성이 있다고 가정 (없으면 .get_san() 등 확인 필요)
-                current_san = getattr(self.game_system, 'san', 100) 
-                self.sound_manager.update_san(current_san)
-
-            status = self.game_system.get_status_summary()
-
-            status = self.game_system.get_status_summary()
-            summary_update = self.llm_manager.get_summary_update()
-            if summary_update:
-                self.last_topic = summary_update
-
-            if self.rag_manager:
-                self.rag_manager.search(user_msg, top_k=3)
-
-            context_data = {
-                "san_label": status['san_label'],
-                "likability_label": status['likability_label'],
-                "last_emotion": self.last_emotion,
-                "last_topic": self.last_topic
-            }
-
-            prompt = self.character.generate_prompt(user_msg, context_data)
-            self.current_user_msg = user_msg
-            self.llm_manager.call_roleplay(prompt)
-
-        except Exception as e:
-            print(f"[Thread Error] {e}")
-            self.is_pipeline_running = False
+        elif field == "dialogue" and not self._tts_enabled():
+            self.dialogue_box.append_text(value)
+            self._shown_parts.add("dialogue")
+
+    def _on_listen_start(self, task: TurnTask):
+        # 👉 [추가] STT 시작 전 배경음/탭핑 일시정지
+        task.data["listening"] = True
+        if self.sound_manager:
+            self.sound_manager.pause_for_stt()
+
+    def _on_listen_end(self, task: TurnTask):
+        # 👉 [추가] 녹음 끝났으니 배경음/탭핑 다시 재생 (취소된 턴도 한 번만)
+        if task.data.pop("listening", False) and self.sound_manager:
+            self.sound_manager.resume_after_stt()
+
+    def _on_turn_finished(self, task: TurnTask):
+        """턴 종료 (완료 / 취소 / 실패) 정리 — 취소된 턴도 항상 호출됨"""
+        self._on_listen_end(task)
+        if task.cancelled:
+            # 표시 전에 취소된 턴의 음성 합성 중단
+            pipeline, _ = task.data.get("tts", (None, None))
+            if pipeline is not None:
+                pipeline.cancel()
+        context = task.data.get("context")
+        if context is not None:
+            context.log()
+        if task is self.turns.current:
+            self._set_busy(False)
 
     # ========== 입출력 메서드 ==========
 
+    def _start_turn(self, user_msg=None):
+        """
+        턴 시작 (user_msg가 None이면 음성 입력)
+        진행 중인 턴이 있으면 barge_in일 때만 취소하고 시작 (아니면 무시)
+        """
+        if self.turns.active and not self.barge_in:
+            return
+
+        if user_msg:
+            print(f"[Pipeline] 메시지 처리 시작: {user_msg}")
+        else:
+            print("[Lamp] STT 녹음 요청 시작...")
+        if self.barge_in:
+            if self.turns.active:
+                print("[Pipeline] 끼어들기 → 진행 중인 턴 취소")
+            # 재생 중인 이전 응답 음성 중단
+            self._voice = (None, None)
+            if self.audio_manager:
+                self.audio_manager.stop()
+        else:
+            self._set_busy(True)
+
+        self.text_input.set_text("")
+        self._shown_parts = set()
+        self.turns.start(user_msg)
+
     def _handle_lamp_click(self):
         """램프 클릭 처리"""
-        # [Safety Lock] 작업 중이면 무조건 리턴
-        if self.is_pipeline_running or self.is_processing_tts or self.is_recording:
+        # [Safety Lock] 끼어들기를 쓰지 않으면 작업 중에는 무조건 리턴
+        if self.turns.active and not self.barge_in:
             return
-        
+
         # 👉 [추가 1] 램프 클릭 효과음 재생 (딸깍!)
         if self.sound_manager:
             self.sound_manager.play_click()
 
+        # 텍스트가 있으면 바로 전송, 없으면 녹음 (STT 단계부터)
         user_input = self.text_input.get_text().strip()
-
-        if user_input:
-            # 텍스트가 있으면 바로 전송
-            self._start_llm_pipeline(user_input)
-        else:
-            # 텍스트가 없으면 비동기 녹음 시작
-            print("[Lamp] STT 녹음 요청 시작...")
-            
-            # 👉 [추가 2] STT 시작 전 배경음/탭핑 일시정지
-            if self.sound_manager:
-                self.sound_manager.pause_for_stt()
-
-            self.is_recording = True
-            self.stt_manager.start_listening()
-
-    def _start_llm_pipeline(self, user_msg: str):
-        """LLM 처리 스레드 시작 (코드 중복 제거용 헬퍼)"""
-        print(f"[Pipeline] 메시지 처리 시작: {user_msg}")
-        self.text_input.set_text("")
-        self._set_busy(True)
-        self.is_pipeline_running = True # [Lock] 파이프라인 잠금
-        
-        thread = threading.Thread(
-            target=self._run_rag_and_llm_pipeline,
-            args=(user_msg,)
-        )
-        thread.daemon = True
-        thread.start()
+        self._start_turn(user_input or None)
 
     def _send_message(self):
         """엔터키 입력 처리용"""
-        # 램프 클릭과 동일한 로직을 타되, 엔터키는 텍스트 전송만 담당하게 제한할 수도 있음
-        # 여기서는 텍스트가 있을 때만 전송하도록 처리
+        # 램프 클릭과 동일한 로직을 타되, 엔터키는 텍스트 전송만 담당
         user_input = self.text_input.get_text().strip()
         if user_input:
-             # 작업 중이 아닐 때만
-            if not (self.is_pipeline_running or self.is_processing_tts or self.is_recording):
-                self._start_llm_pipeline(user_input)
+            self._start_turn(user_input)
 
     # ========== 이벤트 처리 ==========
 
@@ -387,11 +546,9 @@ class GameplayState(GameState):
             # 대화창 스킵 기능 (입력창/램프 클릭이 아닐 때만)
             self.dialogue_box.skip()
 
-        # [수정 3] 엔터키 처리 (작업 중이 아닐 때만)
+        # [수정 3] 엔터키 처리 (진행 중인 턴 확인은 _start_turn에서)
         if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-            # 이미 작업 중이면 엔터키도 무시
-            if not (self.is_pipeline_running or self.is_processing_tts or self.is_recording):
-                self._send_message()
+            self._send_message()
 
     # ========== 업데이트 ==========
 
@@ -400,41 +557,20 @@ class GameplayState(GameState):
         self.bg_anim.update(dt)
         self.dialogue_box.update(dt)
         self.text_input.update(dt)
+        if self.prefetcher and not self.text_input.disabled:
+            self.prefetcher.on_text(self.text_input.get_text())
 
         # 👉 [추가] 사운드 매니저 업데이트 (자동 탭핑 타이머 계산용)
         if self.sound_manager:
             self.sound_manager.update(dt)
 
-        # ---------------------------------------------------------
-        # [1] 비동기 STT 결과 모니터링 (Polling)
-        # ---------------------------------------------------------
-        if self.is_recording:
-            stt_result = self.stt_manager.check_result()
-            
-            if stt_result is not None:
-                # 녹음 종료됨
-                self.is_recording = False 
-                
-                # 👉 [추가] 녹음 끝났으니 배경음/탭핑 다시 재생
-                if self.sound_manager:
-                    self.sound_manager.resume_after_stt()
-
-                if stt_result.strip():
-                    print(f"[STT] 결과 수신: {stt_result}")
-                    self._start_llm_pipeline(stt_result)
-                else:
-                    print("[STT] 인식 실패 또는 침묵")
-                    # 실패했더라도 소리는 다시 켜줘야 함 (위에서 이미 처리됨)
-        # ---------------------------------------------------------
+        # 문장 단위 TTS 파이프라인의 다음 조각 채널 대기열 보충
+        if self.audio_manager:
+            self.audio_manager.update()
 
         # --- [애니메이션 상태 관리] ---
-        # 생각 중 상태: 파이프라인 도는 중 OR 녹음 중 OR TTS 중
-        is_thinking = (
-            self.is_pipeline_running or
-            self.llm_manager.is_thinking() or
-            self.is_processing_tts or 
-            self.is_recording  # 녹음 중에도 생각하는 표정(혹은 듣는 표정)
-        )
+        # 생각 중 상태: 녹음 ~ 음성 합성 단계 (녹음 중에도 생각하는 표정(혹은 듣는 표정))
+        is_thinking = self.turns.stage not in (None, "display") or self.llm_manager.is_thinking()
 
         if is_thinking:
             self.char_portrait.set_state('thinking_loop')
@@ -443,26 +579,9 @@ class GameplayState(GameState):
 
         self.char_portrait.update(dt)
 
-        # [수정] TTS 합성 완료 감지 및 DialogueBox 표시
-        if self.is_processing_tts and self._tts_audio_path and self._pending_llm_data:
-            # TTS 합성이 완료되었고, 대기 중인 LLM 데이터가 있음
-            print("[Update] TTS 합성 완료 감지 → DialogueBox에 텍스트 표시")
-            self.is_processing_tts = False
-            self._display_llm_response_after_tts()
-
-        # [기존] LLM 응답 체크
-        response = self.llm_manager.get_response()
-        if response and not self._llm_response_processed:
-            self._llm_response_processed = True
-            
-            if hasattr(self, 'current_user_msg'):
-                self.llm_manager.call_summary(
-                    self.current_user_msg,
-                    response,
-                    self.last_topic,
-                    self.game.summary_model_name
-                )
-            self._process_llm_response(response)
+    def is_idle(self) -> bool:
+        """턴이 없고 대사 출력도 끝났으면 쉼 (배경 애니메이션 / 음성 조각 보충은 느린 프레임으로 충분)"""
+        return not self.turns.active and self.dialogue_box.finished
 
     # ========== 렌더링 ==========
 
@@ -475,7 +594,7 @@ class GameplayState(GameState):
             screen.blit(self.desk_img, self.desk_pos)
 
         target_img = (
-            self.lamp_img if self.is_recording
+            self.lamp_img if self.turns.stage == "stt"
             else (self.lamp_on_img or self.lamp_img)
         )
         if target_img:
@@ -1,3 +1,4 @@
+import atexit
 import pygame
 import threading
 import json
@@ -134,7 +135,56 @@ class LoadingState(GameState):
             self.progress = 0.3
 
             llm_provider = os.getenv("LLM_PROVIDER", "gemini-3-pro")
-            self.game.llm_manager = LLMManager(provider=llm_provider)
+            llm_stream = os.getenv("LLM_STREAM", "1") == "1"
+
+            # 시맨틱 응답 캐시 (배포 환경별로 LLM_RESPONSE_CACHE=0이면 끔)
+            response_cache = None
+            cache_config = media_config.get("llm", {}).get("response_cache", {})
+            if cache_config.get("enabled", False) and os.getenv("LLM_RESPONSE_CACHE", "1") == "1":
+                from managers.response_cache import ResponseCache
+                response_cache = ResponseCache(
+                    threshold=cache_config.get("threshold", 0.92),
+                    min_variants=cache_config.get("min_variants", 2),
+                    max_variants=cache_config.get("max_variants", 4),
+                    max_entries_per_state=cache_config.get("max_entries_per_state", 64),
+                    persist_path=cache_config.get("persist_path")
+                )
+                atexit.register(response_cache.save)
+
+            # 헤징: 주 모델이 첫 토큰을 늦게 내면 로컬 모델과 경주 (LLM_HEDGE=0이면 끔)
+            hedge_config = media_config.get("llm", {}).get("hedge", {})
+            hedge_model = None
+            if hedge_config.get("enabled", False) and os.getenv("LLM_HEDGE", "1") == "1":
+                hedge_model = hedge_config.get("secondary_model")
+
+            # Ollama: (SAN, 호감도) 조합별 시스템 프롬프트 컨텍스트 재사용 + 모델 상주 시간
+            from managers.ollama_context import OllamaContextCache
+            ollama_config = media_config.get("llm", {}).get("ollama", {})
+            ollama_context = OllamaContextCache(
+                keep_alive=ollama_config.get("keep_alive", "30m"),
+                reuse=ollama_config.get("reuse_context", True),
+                system_templates=ollama_config.get("system_templates")
+            )
+
+            # Gemini: 시스템 프롬프트별 모델 객체 재사용 (+ 선택적으로 서버 측 캐시)
+            from managers.gemini_models import GeminiModelPool
+            gemini_config = media_config.get("llm", {}).get("gemini", {})
+            gemini_models = GeminiModelPool(
+                cached_content=gemini_config.get("cached_content", False),
+                cache_ttl_s=gemini_config.get("cache_ttl_s", 3600)
+            )
+            atexit.register(gemini_models.close)
+
+            self.game.llm_manager = LLMManager(
+                provider=llm_provider,
+                stream=llm_stream,
+                response_cache=response_cache,
+                hedge_model=hedge_model,
+                hedge_deadline=hedge_config.get("first_token_deadline", 4.0),
+                ollama_context=ollama_context,
+                gemini_models=gemini_models,
+                structured_output=media_config.get("llm", {}).get("structured_output", True)
+            )
             self.game.game_system = GameSystemManager()
 
             from managers.sound_manager import SoundManager
@@ -158,6 +208,9 @@ class LoadingState(GameState):
             self.progress = 0.5
             from managers.audio_manager import AudioManager
             self.game.audio_manager = AudioManager(media_config.get("tts", {}))
+            if self.game.audio_manager.cache:
+                # 아직 인덱스에 기록하지 않은 접근 시각 저장 (LRU 정리 순서 유지)
+                atexit.register(self.game.audio_manager.cache.flush)
 
             # --- [Step 6] RAG (수정됨: 프로젝트 내부 assets 경로 사용) ---
             self.current_task = "지식 베이스(RAG) 로드 중..."
@@ -180,9 +233,20 @@ class LoadingState(GameState):
                 try:
                     from managers.rag_manager import RAGManager
                     # 절대 경로로 변환하여 전달 (안전성 확보)
+                    rag_config = media_config.get("rag", {})
                     rag_manager = RAGManager(
                         os.path.abspath(model_path), 
-                        os.path.abspath(vectordb_path)
+                        os.path.abspath(vectordb_path),
+                        query_cache_size=rag_config.get("query_cache_size", 512),
+                        query_cache_path=rag_config.get("query_cache_path"),
+                        backend=rag_config.get("backend", "torch-fp32"),
+                        onnx_dir=rag_config.get("onnx_dir"),
+                        auto_convert_db=rag_config.get("auto_convert_db", False),
+                        lexical=rag_config.get("lexical"),
+                        nprobe=rag_config.get("nprobe"),
+                        ef_search=rag_config.get("ef_search"),
+                        partition_fields=rag_config.get("partition_fields"),
+                        context=rag_config.get("context")
                     )
                     print("[Loading] RAG 시스템 로드 성공")
                 except Exception as e:
@@ -200,7 +264,8 @@ class LoadingState(GameState):
             self.game.character = Character(
                 name="유화",
                 model_name=self.game.current_model_name,
-                rag_manager=rag_manager
+                rag_manager=rag_manager,
+                rag_token_budget=media_config.get("rag", {}).get("context", {}).get("token_budget", 600)
             )
 
             # --- [Step 8] 애니메이션 ---
@@ -0,0 +1 @@
+"""개발용 명령줄 도구 (벡터DB 빌드, 임베딩 변환/평가 등)"""
@@ -0,0 +1,137 @@
+"""
+FAISS 인덱스 종류별 재현율 / 지연 / 메모리 측정
+
+정확 검색(flat) 결과를 정답으로 두고, 각 인덱스 종류와 검색 파라미터 조합마다
+recall@k, 질문 1개 검색 지연 p50/p99, 인덱스 크기를 표로 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    # 평가 질문 파일을 임베딩해서 측정
+    python -m tools.benchmark_index
+
+    # 모델 없이: 저장된 청크 임베딩 200개를 질문으로 떼어 내고(held-out) 나머지로 인덱스 생성
+    python -m tools.benchmark_index --holdout 200 --json report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from managers.faiss_index import (
+    INDEX_TYPES, apply_search_params, build_index, default_nlist, evaluate_index, resolve_params
+)
+from managers.vectordb_store import MmapChunkStore, detect_format, load_tombstones, load_vectors, read_index
+
+DEFAULT_MODEL = os.path.join("assets", "models", "embedding", "KURE-v1-yuhwa-final")
+DEFAULT_VECTORDB = os.path.join("assets", "database", "vectordb")
+DEFAULT_QUERIES = os.path.join("config", "rag_eval_queries.txt")
+
+# 인덱스 종류별 검색 파라미터 후보
+SEARCH_GRID = {
+    "flat": [{}],
+    "ivf-flat": [{"nprobe": p} for p in (1, 4, 8, 16, 32)],
+    "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128)],
+    "ivf-pq": [{"nprobe": p} for p in (4, 16, 32)],
+}
+
+
+def _load_corpus(vectordb_path: str) -> np.ndarray:
+    """살아 있는 행의 임베딩 (vectors.npy, 없으면 flat 인덱스에서 복원)"""
+    tombstones = set(load_tombstones(vectordb_path))
+    vectors = load_vectors(vectordb_path, mmap=False)
+    if vectors is None:
+        index = read_index(vectordb_path, use_mmap=False)
+        print("[Bench] vectors.npy 없음 → 인덱스에서 벡터 복원 (flat 인덱스만 가능)")
+        vectors = index.reconstruct_n(0, index.ntotal)
+    if detect_format(vectordb_path) == "mmap":
+        store = MmapChunkStore(vectordb_path)
+        vectors = vectors[:len(store)]
+        store.close()
+    rows = [row for row in range(len(vectors)) if row not in tombstones]
+    return np.ascontiguousarray(vectors[rows], dtype=np.float32)
+
+
+def _encode_queries(args) -> np.ndarray:
+    from managers.embedding_backends import create_backend, load_tokenizer
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    tokenizer = load_tokenizer(args.model)
+    backend = create_backend(args.backend, args.model, onnx_dir=args.onnx_dir)
+    encoded = tokenizer(queries, padding="longest", truncation=True, max_length=512, return_tensors="np")
+    return backend.encode(encoded)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 recall@k / 지연 / 메모리 비교")
+    parser.add_argument("--vectordb", default=DEFAULT_VECTORDB)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backend", default="torch-fp32")
+    parser.add_argument("--onnx-dir", default=None)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="평가 질문 파일 (한 줄에 하나)")
+    parser.add_argument("--holdout", type=int, default=0,
+                        help="질문 파일 대신 청크 임베딩 N개를 질문으로 사용 (인덱스에서는 제외)")
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3, help="지연 측정 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="결과 저장 경로")
+    args = parser.parse_args()
+
+    corpus = _load_corpus(args.vectordb)
+    if args.holdout:
+        rng = np.random.default_rng(args.seed)
+        picked = rng.choice(len(corpus), size=min(args.holdout, len(corpus) // 2), replace=False)
+        mask = np.ones(len(corpus), dtype=bool)
+        mask[picked] = False
+        queries, corpus = corpus[picked], corpus[mask]
+    else:
+        queries = _encode_queries(args).astype(np.float32)
+
+    n, dim = corpus.shape
+    ids = np.arange(n)
+    print(f"[Bench] 벡터 {n}개 × {dim}차원, 질문 {len(queries)}개, nlist 기본값 {default_nlist(n)}")
+
+    exact = build_index(corpus, ids, "flat")
+    _, ground_truth = exact.search(queries, args.top_k)
+
+    rows = []
+    for index_type in args.types:
+        params = resolve_params(index_type, {"nlist": args.nlist}, n, dim)
+        started = time.perf_counter()
+        try:
+            index = build_index(corpus, ids, index_type, params)
+        except RuntimeError as e:
+            print(f"[Bench] ⚠️ {index_type} 생성 실패: {e}")
+            continue
+        build_s = time.perf_counter() - started
+
+        for search_params in SEARCH_GRID[index_type]:
+            if "nprobe" in search_params and search_params["nprobe"] > params.get("nlist", 0):
+                continue
+            apply_search_params(index, **search_params)
+            report = evaluate_index(index, queries, ground_truth, top_k=args.top_k, repeat=args.repeat)
+            row = {"type": index_type, "build_params": params, "search_params": search_params, "build_s": build_s}
+            row.update(report)
+            rows.append(row)
+
+    recall_key = f"recall@{args.top_k}"
+    print(f"\n{'type':<9} {'search':<16} {recall_key:>9} {'p50(ms)':>8} {'p99(ms)':>8} {'mem(MB)':>8} {'build(s)':>8}")
+    for row in rows:
+        search = ",".join(f"{k}={v}" for k, v in row["search_params"].items()) or "-"
+        print(f"{row['type']:<9} {search:<16} {row[recall_key]:>9.3f} {row['p50_ms']:>8.3f} "
+              f"{row['p99_ms']:>8.3f} {row['memory_mb']:>8.2f} {row['build_s']:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vectors": n, "dim": dim, "queries": len(queries), "results": rows}, f, indent=2)
+        print(f"\n[Bench] 결과 저장: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Ollama 기본 컨텍스트 재사용 prefill 비교
+
+같은 (SAN 단계, 호감도 단계) 조합의 턴을 두 방식으로 보내고
+Ollama가 돌려주는 prompt_eval_count / prompt_eval_duration 으로 prefill 토큰 수와 시간을 비교합니다.
+
+- full  : 매 턴 시스템 프롬프트 전체 전송 (기존 방식)
+- reuse : 조합별로 프라이밍한 context(시스템 블록 토큰) 뒤에 사용자 입력만 전송
+          (게임에서는 백그라운드로 프라이밍하지만, 여기서는 측정 전에 미리 만들어 둠)
+
+사용법 (프로젝트 루트에서, Ollama 서버 실행 중):
+    python -m tools.benchmark_ollama_context --model exaone3.5:7.8b --turns 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import requests
+
+from character import Character
+from managers.ollama_context import OLLAMA_GENERATE_URL, OllamaContextCache
+
+SAMPLE_INPUTS = [
+    "안녕, 오늘은 좀 어때?",
+    "어젯밤에 잠은 잤어?",
+    "네가 말하던 유적 이야기를 더 해줘.",
+    "배고프지 않아? 뭐 좀 가져다줄까?",
+    "나를 어떻게 생각하는지 솔직하게 말해 봐.",
+]
+
+
+def _run(cache: OllamaContextCache, prompts, num_predict: int):
+    """턴마다 (prefill 토큰 수, prefill ms, 전체 ms)"""
+    records = []
+    for prompt_data in prompts:
+        payload, _ = cache.prepare(dict(prompt_data, stream=False))
+        payload["options"] = dict(payload.get("options", {}), num_predict=num_predict)
+        started = time.perf_counter()
+        response = requests.post(cache.url, json=payload, timeout=cache.timeout)
+        response.raise_for_status()
+        data = response.json()
+        records.append((
+            data.get("prompt_eval_count", 0),
+            data.get("prompt_eval_duration", 0) / 1e6,
+            (time.perf_counter() - started) * 1000,
+        ))
+    return records
+
+
+def _summary(name: str, records) -> str:
+    tokens = statistics.mean(r[0] for r in records)
+    prefill = [r[1] for r in records]
+    total = [r[2] for r in records]
+    return (f"{name:<6} prefill {tokens:>7.0f} 토큰  {statistics.mean(prefill):>8.0f}ms (중앙값 "
+            f"{statistics.median(prefill):.0f}ms)  턴 전체 {statistics.mean(total):>8.0f}ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ollama context 재사용 전후 prefill 시간 비교")
+    parser.add_argument("--model", required=True, help="Ollama 모델명 (예: exaone3.5:7.8b)")
+    parser.add_argument("--url", default=OLLAMA_GENERATE_URL)
+    parser.add_argument("--san", default="안정")
+    parser.add_argument("--likability", default="무관심")
+    parser.add_argument("--turns", type=int, default=len(SAMPLE_INPUTS))
+    parser.add_argument("--num-predict", type=int, default=16, help="턴마다 생성할 토큰 수 (prefill 측정이 목적이므로 짧게)")
+    parser.add_argument("--keep-alive", default="30m")
+    args = parser.parse_args()
+
+    character = Character(model_name=args.model)
+    context_data = {"san_label": args.san, "likability_label": args.likability}
+    prompts = [
+        character.generate_prompt(SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)], context_data)
+        for i in range(args.turns)
+    ]
+
+    full = OllamaContextCache(url=args.url, keep_alive=args.keep_alive, reuse=False)
+    reuse = OllamaContextCache(url=args.url, keep_alive=args.keep_alive)
+    if not reuse.warm(dict(prompts[0], stream=False)):
+        print(f"[Bench] ⚠️ 기본 컨텍스트 생성 실패 (시스템 블록 템플릿이 없는 모델이면 system_templates에 추가)")
+        return 1
+
+    print(f"[Bench] {args.model} / {args.san} · {args.likability} / {args.turns}턴")
+    _run(full, prompts[:1], args.num_predict)  # 모델 로드 (측정 제외)
+    full_records = _run(full, prompts, args.num_predict)
+    reuse_records = _run(reuse, prompts, args.num_predict)
+
+    print(_summary("full", full_records))
+    print(_summary("reuse", reuse_records))
+    saved = statistics.mean(r[1] for r in full_records) - statistics.mean(r[1] for r in reuse_records)
+    print(f"[Bench] 턴당 prefill 절감: {saved:.0f}ms (프라이밍 {reuse.primes}회는 별도)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+벡터DB 빌드 도구 (로어 문서 → yuhwa.index + mmap 청크 저장소)
+
+사용법 (프로젝트 루트에서):
+    python -m tools.build_vectordb --source lore/ --workers 4
+    python -m tools.build_vectordb --source lore/ --incremental   # 바뀐 청크만 임베딩
+    python -m tools.build_vectordb --compact                      # 삭제 표시된 청크 정리
+    python -m tools.build_vectordb --reindex --index-type hnsw    # 저장된 임베딩으로 인덱스 종류만 변경
+
+문서 형식:
+    - .txt / .md, 빈 줄로 문단 구분
+    - 맨 앞에 '---' 블록을 두면 해당 문서의 모든 청크에 메타데이터로 들어감
+"""
+
+import argparse
+import os
+import sys
+
+from managers.embedding_backends import BACKENDS
+from managers.faiss_index import INDEX_TYPES
+from managers.vectordb_builder import build_vectordb, compact_vectordb, reindex_vectordb, update_vectordb
+
+DEFAULT_MODEL = os.path.join("assets", "models", "embedding", "KURE-v1-yuhwa-final")
+DEFAULT_VECTORDB = os.path.join("assets", "database", "vectordb")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="로어 문서로 RAG 벡터DB 빌드")
+    parser.add_argument("--source", help="로어 문서 폴더 (.txt/.md)")
+    parser.add_argument("--output", default=DEFAULT_VECTORDB, help="벡터DB 출력 폴더")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="임베딩 모델 폴더")
+    parser.add_argument("--backend", default="torch-fp32", choices=BACKENDS,
+                        help="임베딩 백엔드 (검색 시 백엔드와 맞추는 것을 권장)")
+    parser.add_argument("--onnx-dir", default=None)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="임베딩 워커 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-chars", type=int, default=500, help="청크 최대 글자 수")
+    parser.add_argument("--incremental", action="store_true",
+                        help="기존 DB와 내용 해시를 비교해 바뀐 청크만 추가/삭제")
+    parser.add_argument("--compact-ratio", type=float, default=0.3,
+                        help="증분 업데이트 후 삭제 표시 비율이 이 값을 넘으면 자동 압축")
+    parser.add_argument("--compact", action="store_true", help="삭제 표시된 청크를 지우고 id 재정렬")
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES,
+                        help="FAISS 인덱스 종류 (tools.benchmark_index로 비교 후 선택)")
+    parser.add_argument("--nlist", type=int, default=None, help="ivf 클러스터 수 (기본값: 약 4·√n)")
+    parser.add_argument("--nprobe", type=int, default=None, help="ivf 기본 탐색 클러스터 수")
+    parser.add_argument("--hnsw-m", type=int, default=None, help="hnsw 노드당 연결 수")
+    parser.add_argument("--ef-search", type=int, default=None, help="hnsw 기본 탐색 폭")
+    parser.add_argument("--pq-m", type=int, default=None, help="ivf-pq 부분 벡터 수")
+    parser.add_argument("--reindex", action="store_true", help="재임베딩 없이 인덱스만 --index-type으로 재생성")
+    args = parser.parse_args()
+
+    index_params = {
+        "nlist": args.nlist,
+        "nprobe": args.nprobe,
+        "m": args.hnsw_m,
+        "ef_search": args.ef_search,
+        "pq_m": args.pq_m,
+    }
+
+    if args.compact:
+        compact_vectordb(args.output)
+        return 0
+
+    if args.reindex:
+        reindex_vectordb(args.output, args.index_type, index_params)
+        return 0
+
+    if not args.source:
+        parser.error("--source가 필요합니다.")
+
+    if args.incremental:
+        update_vectordb(
+            args.source,
+            args.output,
+            args.model,
+            backend=args.backend,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            max_chars=args.max_chars,
+            onnx_dir=args.onnx_dir,
+            compact_ratio=args.compact_ratio,
+        )
+        return 0
+
+    build_vectordb(
+        args.source,
+        args.output,
+        args.model,
+        backend=args.backend,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_chars=args.max_chars,
+        onnx_dir=args.onnx_dir,
+        index_type=args.index_type,
+        index_params=index_params,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
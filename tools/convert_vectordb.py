@@ -0,0 +1,50 @@
+"""
+벡터DB 형식 변환 도구 (chunks.pkl / metadata.pkl → mmap 형식)
+
+사용법 (프로젝트 루트에서):
+    python -m tools.convert_vectordb [--vectordb assets/database/vectordb]
+"""
+
+import argparse
+import os
+import sys
+
+from managers.vectordb_store import MmapChunkStore, PickleChunkStore, convert_pickle_to_mmap, detect_format
+
+DEFAULT_VECTORDB = os.path.join("assets", "database", "vectordb")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="legacy pickle 벡터DB를 mmap 형식으로 변환")
+    parser.add_argument("--vectordb", default=DEFAULT_VECTORDB)
+    parser.add_argument("--force", action="store_true", help="이미 변환된 경우에도 다시 변환")
+    args = parser.parse_args()
+
+    fmt = detect_format(args.vectordb)
+    if fmt is None:
+        print(f"[Convert] ❌ 벡터DB 없음: {args.vectordb}")
+        return 1
+    if fmt == "mmap" and not args.force:
+        print("[Convert] 이미 mmap 형식입니다. (--force로 재변환)")
+        return 0
+
+    convert_pickle_to_mmap(args.vectordb)
+
+    # 변환 결과 검증: 모든 청크/메타데이터가 원본과 같아야 함
+    legacy = PickleChunkStore(args.vectordb)
+    converted = MmapChunkStore(args.vectordb)
+    mismatches = sum(
+        1 for i in range(len(legacy))
+        if legacy.get_chunk(i) != converted.get_chunk(i) or legacy.get_metadata(i) != converted.get_metadata(i)
+    )
+    converted.close()
+    if mismatches or len(legacy) != len(converted):
+        print(f"[Convert] ❌ 검증 실패: {mismatches}개 불일치")
+        return 1
+
+    print(f"[Convert] ✅ 검증 완료: {len(converted)}개 청크 일치")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
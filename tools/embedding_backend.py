@@ -0,0 +1,85 @@
+"""
+임베딩 백엔드 변환 / 정합성 검사 도구
+
+사용법 (프로젝트 루트에서):
+    # ONNX fp32 + int8 변환
+    python -m tools.embedding_backend export
+
+    # 각 백엔드를 torch-fp32 기준과 비교 (코사인 오차, top-k 일치율, 지연)
+    python -m tools.embedding_backend parity --backends torch-int8 onnx-fp32 onnx-int8
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import faiss
+
+from managers.embedding_backends import BACKENDS, check_parity, create_backend, export_onnx, load_tokenizer
+
+DEFAULT_MODEL = os.path.join("assets", "models", "embedding", "KURE-v1-yuhwa-final")
+DEFAULT_VECTORDB = os.path.join("assets", "database", "vectordb")
+DEFAULT_QUERIES = os.path.join("config", "rag_eval_queries.txt")
+
+
+def _load_queries(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def cmd_export(args) -> int:
+    created = export_onnx(args.model, args.onnx_dir, opset=args.opset, quantize=not args.no_int8)
+    for path in created:
+        print(f"[Export] ✅ {path} ({os.path.getsize(path) / 1024 / 1024:.1f}MB)")
+    return 0
+
+
+def cmd_parity(args) -> int:
+    queries = _load_queries(args.queries)
+    tokenizer = load_tokenizer(args.model)
+    reference = create_backend("torch-fp32", args.model)
+
+    index = None
+    index_file = os.path.join(args.vectordb, "yuhwa.index")
+    if os.path.exists(index_file):
+        index = faiss.read_index(index_file)
+    else:
+        print(f"[Parity] ⚠️ 인덱스 없음 ({index_file}) → 코사인 오차만 측정")
+
+    all_identical = True
+    for name in args.backends:
+        candidate = create_backend(name, args.model, onnx_dir=args.onnx_dir)
+        report = check_parity(tokenizer, reference, candidate, queries, index=index, top_k=args.top_k)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        if report.get("topk_identical_ratio", 1.0) < 1.0:
+            all_identical = False
+
+    # 검색 결과가 하나라도 달라지면 실패 코드 (CI/스크립트에서 판단용)
+    return 0 if all_identical else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="KURE 임베딩 백엔드 변환 / 정합성 검사")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="HuggingFace 모델 폴더")
+    parser.add_argument("--onnx-dir", default=None, help="ONNX 파일 폴더 (기본값: <model>/onnx)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="ONNX (fp32 + int8) 변환")
+    export.add_argument("--opset", type=int, default=17)
+    export.add_argument("--no-int8", action="store_true", help="int8 양자화본 생략")
+    export.set_defaults(func=cmd_export)
+
+    parity = sub.add_parser("parity", help="torch-fp32 기준 정합성 검사")
+    parity.add_argument("--backends", nargs="+", default=[b for b in BACKENDS if b != "torch-fp32"], choices=BACKENDS)
+    parity.add_argument("--queries", default=DEFAULT_QUERIES, help="평가 질문 파일 (한 줄에 하나)")
+    parity.add_argument("--vectordb", default=DEFAULT_VECTORDB)
+    parity.add_argument("--top-k", type=int, default=3)
+    parity.set_defaults(func=cmd_parity)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
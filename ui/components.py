@@ -200,7 +200,24 @@ class DialogueBox(UIComponent):
         # 형식: "(action_pre)\ndialogue\n(action_post)"
         self.action_end_pos = None
         self.dialogue_start_pos = None
-        
+        self._locate_markers(text)
+
+    def append_text(self, text):
+        """
+        [스트리밍] 이미 출력 중인 텍스트 뒤에 이어 붙임
+        (출력 위치와 콜백 상태는 유지)
+        """
+        if not self.full_text:
+            self.set_text(text)
+            return
+
+        self.full_text += text
+        self.finished = False
+        if self.action_end_pos is None:
+            self._locate_markers(self.full_text)
+
+    def _locate_markers(self, text):
+        """행동(action_pre) 끝 / 대사 시작 위치 계산"""
         # 첫 번째 닫는 괄호 찾기
         close_paren_idx = text.find(')')
         if close_paren_idx != -1:
@@ -270,7 +287,9 @@ class DialogueBox(UIComponent):
             self._action_callback_fired = True
             if self.on_action_finished:
                 self.on_action_finished()
-        if self.dialogue_start_pos and not self._dialogue_callback_fired:
+        if (self.dialogue_start_pos and not self._dialogue_callback_fired and
+                self.dialogue_start_pos < len(self.full_text)):
+            # 스트리밍 중 아직 대사가 붙지 않았다면 콜백은 대사 도착 후로 미룸
             self._dialogue_callback_fired = True
             if self.on_dialogue_start:
                 self.on_dialogue_start()
@@ -29,6 +29,10 @@ class GameState(ABC):
         """화면에 그리기"""
         pass
 
+    def is_idle(self) -> bool:
+        """진행 중인 작업이 없으면 True (메인 루프가 입력 / 완료 알림이 올 때까지 쉼)"""
+        return False
+
     def on_enter(self) -> None:
         """상태 진입 시 호출"""
         pass